@@ -2,10 +2,12 @@
 Chat API endpoints for Stock Market Crawler.
 """
 
+import json
 import logging
 import uuid
 import hashlib
 from fastapi import APIRouter, HTTPException, Depends, Query, UploadFile, File
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
 from pydantic import BaseModel
 from pathlib import Path
@@ -23,6 +25,7 @@ from common.src.services.aws_background_service import aws_background_service
 from common.src.services.document_service import document_service
 
 from common.src.services.document_processing_service import document_processing_service
+from common.src.services.answer_cache_service import answer_cache_service
 from common.src.core.exceptions import ChatError
 
 import os
@@ -149,6 +152,47 @@ async def send_message(
         logger.error(f"Error sending message: {e}")
         raise HTTPException(status_code=500, detail="Failed to send message")
 
+def _sse_event(event: str, data: dict) -> str:
+    """Format one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.post("/sessions/{session_id}/messages/stream")
+async def stream_message(
+    session_id: str,
+    message: MessageCreate,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """
+    Send a user message and stream the AI response as Server-Sent Events.
+    
+    Emits "token" events with {"content": <delta>} as the answer is generated, then
+    a "done" event with the full answer once it has been stored in the session,
+    or an "error" event if generation fails.
+    """
+    if message.role.value != "user":
+        raise HTTPException(status_code=400, detail="Only user messages can be streamed")
+    
+    session_context = await chat_service.get_session_context(session_id, current_user.user_id)
+    if not session_context:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    async def event_stream():
+        parts = []
+        try:
+            async for delta in chat_service.stream_ai_response(session_id, current_user.user_id, message.content):
+                parts.append(delta)
+                yield _sse_event("token", {"content": delta})
+            yield _sse_event("done", {"session_id": session_id, "role": "assistant", "content": "".join(parts).strip()})
+        except Exception as e:
+            logger.error(f"Error streaming message: {e}")
+            yield _sse_event("error", {"detail": "Failed to generate response"})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post("/message", response_model=MessageResponse)
 async def send_message_compatibility(
     request: dict,
@@ -793,12 +837,8 @@ async def upload_document_background(
 async def get_cache_stats(current_user: UserResponse = Depends(get_current_user)):
     """Get cache statistics for monitoring performance."""
     try:
-        # Cache service removed for AWS deployment
         return {
-            "cache_stats": {
-                "status": "disabled",
-                "message": "Cache service removed for AWS deployment"
-            },
+            "cache_stats": await answer_cache_service.get_stats(current_user.user_id),
             "message": "Cache statistics retrieved successfully"
         }
     except Exception as e:
@@ -807,12 +847,12 @@ async def get_cache_stats(current_user: UserResponse = Depends(get_current_user)
 
 @router.post("/cache/clear")
 async def clear_cache(current_user: UserResponse = Depends(get_current_user)):
-    """Clear all cache entries."""
+    """Clear all cache entries of the current user."""
     try:
-        # Cache service removed for AWS deployment
+        deleted_count = await answer_cache_service.clear(current_user.user_id)
         return {
             "message": "Cache cleared successfully",
-            "note": "Cache service removed for AWS deployment"
+            "deleted_entries": deleted_count
         }
     except Exception as e:
         logger.error(f"Error clearing cache: {e}")
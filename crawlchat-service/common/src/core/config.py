@@ -114,7 +114,70 @@ class Settings(BaseSettings):
     openai_model: str = "gpt-4o-mini"
     openai_max_tokens: int = 4000
     openai_temperature: float = 0.1
-    
+    openai_max_connections: int = Field(default=100, description="Maximum concurrent connections of the shared OpenAI client")
+    openai_max_keepalive_connections: int = Field(default=20, description="Idle keep-alive connections kept by the shared OpenAI client")
+    openai_keepalive_expiry: float = Field(default=30.0, description="Seconds an idle OpenAI connection is kept alive")
+    openai_timeout: float = Field(default=60.0, description="OpenAI request timeout in seconds")
+    openai_connect_timeout: float = Field(default=10.0, description="OpenAI connect timeout in seconds")
+    openai_max_retries: int = Field(default=2, description="Retries the OpenAI client makes on transient errors")
+
+    # Vector store readiness tracking
+    vector_store_readiness_ttl: float = Field(default=10.0, description="Seconds a cached file status list stays fresh")
+    vector_store_ready_wait: float = Field(default=3.0, description="Max seconds a search waits when no file is processed yet")
+    vector_store_poll_interval: float = Field(default=1.0, description="Initial background poll interval for pending files")
+    vector_store_max_poll_interval: float = Field(default=5.0, description="Maximum background poll interval")
+    vector_store_poll_timeout: float = Field(default=300.0, description="Stop background polling after this many seconds")
+
+    # Retrieval backend: "openai" (OpenAI vector stores) or "local" (in-process NumPy index persisted to S3)
+    vector_store_backend: str = Field(default="openai", description="Retrieval backend (openai or local)")
+    local_embedder: str = Field(default="openai", description="Local backend embedder (openai or hashing)")
+    local_embedding_model: str = Field(default="text-embedding-3-small", description="Embedding model of the local backend")
+    local_embedding_batch_size: int = Field(default=64, description="Texts per embedding request")
+    local_hashing_dim: int = Field(default=512, description="Dimension of the deterministic hashing embedder")
+    local_index_chunk_chars: int = Field(default=1500, description="Maximum characters per indexed chunk")
+    local_index_chunk_overlap: int = Field(default=200, description="Characters carried over when a paragraph is split")
+    local_index_ivf_min_vectors: int = Field(default=2048, description="Index size from which IVF search replaces exhaustive search")
+    local_index_nprobe: int = Field(default=8, description="IVF lists scanned per query")
+    local_index_s3_prefix: str = Field(default="vector_indexes/", description="S3 prefix of persisted local indexes")
+    local_index_cache_dir: str = Field(default="/tmp/vector_indexes", description="Local directory indexes are memory-mapped from")
+    local_index_refresh_seconds: float = Field(default=30.0, description="How often an in-memory index is checked against S3")
+
+    # Hybrid retrieval: per-session BM25 keyword index fused with vector search
+    hybrid_search_enabled: bool = Field(default=True, description="Index documents for keyword search and fuse it with vector search")
+    keyword_index_refresh_seconds: float = Field(default=30.0, description="How often an in-memory keyword index is checked against MongoDB")
+    rrf_k: int = Field(default=60, description="Reciprocal-rank fusion constant")
+
+    # Scanned PDF OCR fallback (page images sent to Textract)
+    textract_ocr_dpi: int = Field(default=300, description="Resolution PDF pages are rendered at for OCR")
+    textract_ocr_concurrency: int = Field(default=4, description="Pages rendered and OCR'd concurrently")
+    textract_sync_max_bytes: int = Field(default=10 * 1024 * 1024, description="Largest page image sent to Textract as bytes")
+
+    # PDF extraction router: text layer first, OCR only for pages without usable text
+    pdf_router_sample_pages: int = Field(default=3, description="Pages sampled to decide whether a PDF has a text layer")
+    pdf_text_min_chars_per_page: int = Field(default=80, description="Fewer text-layer characters than this sends a page to OCR")
+    pdf_text_max_garbage_ratio: float = Field(default=0.05, description="Share of unmapped or garbage glyphs above which a page is OCR'd")
+
+    # Async Textract jobs: adaptive polling, optional SNS -> SQS completion notifications
+    textract_poll_initial_interval: float = Field(default=0.5, description="First status check of an analysis job (seconds)")
+    textract_poll_max_interval: float = Field(default=5.0, description="Maximum interval between status checks")
+    textract_job_timeout: float = Field(default=900.0, description="Give up waiting for an analysis job after this many seconds")
+    textract_sns_topic_arn: str = Field(default="", description="SNS topic Textract publishes job completion to")
+    textract_sns_role_arn: str = Field(default="", description="IAM role Textract uses to publish to the topic")
+    textract_sqs_queue_url: str = Field(default="", description="SQS queue subscribed to the topic (one per instance)")
+
+    # PDF/Office text extraction in worker processes, off the event loop
+    extraction_workers: int = Field(default=0, description="Extraction worker processes (0 = one per CPU, at most 4)")
+    extraction_task_timeout: float = Field(default=60.0, description="Seconds one extraction task may run before its pool is recycled")
+    extraction_memory_limit_mb: int = Field(default=1024, description="Address-space limit of each worker process (0 = unlimited)")
+    extraction_pages_per_task: int = Field(default=8, description="PDF pages extracted per worker task")
+
+    # Calculation context cache
+    context_cache_max_sessions: int = Field(default=1024, description="Sessions whose calculation context is kept in memory")
+    context_cache_ttl: float = Field(default=3600.0, description="Seconds a calculation context stays in memory")
+
+    # Answer cache
+    answer_cache_ttl: int = Field(default=21600, description="Seconds a cached chat answer stays valid")
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
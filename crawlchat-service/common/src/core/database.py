@@ -3,16 +3,37 @@ Database connection management for Stock Market Crawler using MongoDB.
 """
 
 import motor.motor_asyncio
+from pymongo import ASCENDING, IndexModel
 from .config import config
 import os
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Indexes created once per process when the first connection is made
+COLLECTION_INDEXES = {
+    "processed_documents": [
+        IndexModel([("id", ASCENDING)], name="id"),
+        IndexModel([("vector_store_file_id", ASCENDING)], name="vector_store_file_id"),
+        IndexModel([("content_hash", ASCENDING), ("attributes.session_id", ASCENDING)], name="content_hash_session"),
+    ],
+    "answer_cache": [
+        IndexModel([("expires_at", ASCENDING)], name="expires_at", expireAfterSeconds=0),
+        IndexModel([("session_id", ASCENDING)], name="session_id"),
+        IndexModel([("document_ids", ASCENDING)], name="document_ids"),
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+    ],
+    "keyword_chunks": [
+        IndexModel([("session_id", ASCENDING), ("document_id", ASCENDING), ("chunk_index", ASCENDING)], name="session_document_chunk"),
+        IndexModel([("document_id", ASCENDING)], name="document_id"),
+    ],
+}
+
 class MongoDB:
     def __init__(self):
         self.client = None
         self.db = None
+        self._indexes_ensured = False
 
     async def connect(self):
         """Connect to MongoDB with Lambda-optimized settings."""
@@ -44,6 +65,8 @@ class MongoDB:
             self.db = self.client[config.mongodb_db]
             logger.info(f"MongoDB connected successfully to database: {config.mongodb_db}")
             
+            await self.ensure_indexes()
+            
         except Exception as e:
             logger.error(f"MongoDB connection failed: {e}")
             logger.error(f"Connection error type: {type(e).__name__}")
@@ -52,6 +75,20 @@ class MongoDB:
             self.db = None
             raise
 
+    async def ensure_indexes(self):
+        """Create the indexes hot queries rely on (idempotent, one request per collection)."""
+        if self._indexes_ensured:
+            return
+        for collection_name, indexes in COLLECTION_INDEXES.items():
+            try:
+                await self.db[collection_name].create_indexes(indexes)
+            except Exception as e:
+                # Missing indexes only cost performance; never fail the connection for them
+                logger.warning(f"Could not ensure indexes on {collection_name}: {e}")
+                return
+        self._indexes_ensured = True
+        logger.info(f"MongoDB indexes ensured for: {', '.join(COLLECTION_INDEXES)}")
+
     async def disconnect(self):
         if self.client:
             self.client.close()
@@ -0,0 +1,108 @@
+"""
+Shared async OpenAI client for Stock Market Crawler.
+"""
+
+import os
+import asyncio
+import logging
+from typing import Optional, Set
+
+import httpx
+from openai import AsyncOpenAI
+
+from .config import config
+
+logger = logging.getLogger(__name__)
+
+
+class OpenAIClientPool:
+    """
+    Process-wide AsyncOpenAI client.
+    
+    One client (and one httpx connection pool with keep-alive) is shared by all
+    services, so concurrent requests reuse connections instead of opening a new
+    client per call. The httpx pool belongs to the event loop it was created on,
+    so a new client is created if the running loop changes and the superseded
+    one is closed. close() runs from the application's shutdown hook.
+    """
+    
+    def __init__(self):
+        self._client: Optional[AsyncOpenAI] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Close tasks of superseded clients, referenced until they finish
+        self._closing: Set[asyncio.Future] = set()
+    
+    def get_client(self) -> Optional[AsyncOpenAI]:
+        """Get the shared client, or None when OPENAI_API_KEY is not set."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        
+        if self._client is not None and (loop is None or self._loop in (None, loop)):
+            if self._loop is None:
+                self._loop = loop
+            return self._client
+        
+        api_key = os.environ.get('OPENAI_API_KEY')
+        if not api_key:
+            logger.warning("[OPENAI] OPENAI_API_KEY environment variable not found")
+            return None
+        
+        if self._client is not None:
+            self._close_superseded(self._client, self._loop, loop)
+        self._client = self._create_client(api_key)
+        self._loop = loop
+        logger.info(f"[OPENAI] Created shared client (max_connections={config.openai_max_connections}, keepalive={config.openai_max_keepalive_connections})")
+        return self._client
+    
+    def _create_client(self, api_key: str) -> AsyncOpenAI:
+        """Create an AsyncOpenAI client with tuned connection limits."""
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=config.openai_max_connections,
+                max_keepalive_connections=config.openai_max_keepalive_connections,
+                keepalive_expiry=config.openai_keepalive_expiry
+            ),
+            timeout=httpx.Timeout(config.openai_timeout, connect=config.openai_connect_timeout)
+        )
+        return AsyncOpenAI(
+            api_key=api_key,
+            http_client=http_client,
+            max_retries=config.openai_max_retries
+        )
+    
+    def _close_superseded(self, client: AsyncOpenAI, client_loop: Optional[asyncio.AbstractEventLoop],
+                          loop: asyncio.AbstractEventLoop):
+        """Close a client replaced because the event loop changed, on its own loop while that still runs."""
+        logger.info("[OPENAI] Event loop changed, closing the previous shared client")
+        if client_loop is not None and client_loop.is_running():
+            future = asyncio.run_coroutine_threadsafe(self._close_quietly(client), client_loop)
+        else:
+            # The old loop is gone; release what can still be released from this one
+            future = loop.create_task(self._close_quietly(client))
+        self._closing.add(future)
+        future.add_done_callback(self._closing.discard)
+    
+    @staticmethod
+    async def _close_quietly(client: AsyncOpenAI):
+        try:
+            await client.close()
+        except Exception as e:
+            logger.warning(f"[OPENAI] Error closing previous client: {e}")
+    
+    async def close(self):
+        """Close the shared client and its connections."""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+            self._loop = None
+
+
+# Global instance
+openai_client_pool = OpenAIClientPool()
+
+
+def get_openai_client() -> Optional[AsyncOpenAI]:
+    """Get the process-wide AsyncOpenAI client."""
+    return openai_client_pool.get_client()
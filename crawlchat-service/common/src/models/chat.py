@@ -3,10 +3,12 @@ Chat models for Stock Market Crawler.
 """
 
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from datetime import datetime
 from enum import Enum
 
+from .documents import Document
+
 
 class MessageRole(str, Enum):
     """Message role enumeration."""
@@ -35,6 +37,20 @@ class ChatSession(BaseModel):
     uploaded_documents: List[str] = Field(default=[], description="List of associated uploaded document IDs")
 
 
+class SessionContext(BaseModel):
+    """Everything the chat pipeline needs about a session, built once per request."""
+    session_id: str = Field(..., description="Session ID")
+    user_id: str = Field(..., description="User ID")
+    updated_at: Optional[datetime] = Field(None, description="Session updated_at the context was built from")
+    recent_messages: List[ChatMessage] = Field(default=[], description="Last messages of the session")
+    crawl_tasks: List[str] = Field(default=[], description="Linked crawl task IDs")
+    uploaded_documents: List[str] = Field(default=[], description="Linked uploaded document IDs")
+    filenames: List[str] = Field(default=[], description="Filenames of the uploaded documents")
+    crawl_documents: List[Document] = Field(default=[], description="Documents of the linked crawl tasks")
+    vector_store_id: Optional[str] = Field(None, description="Session vector store ID, if known")
+    calculation_context: Dict[str, Any] = Field(default_factory=dict, description="Figures extracted from earlier answers for no-LLM calculations")
+
+
 class ChatHistory(BaseModel):
     """Chat history model - represents user conversation history."""
     session_id: str = Field(..., description="Session ID")
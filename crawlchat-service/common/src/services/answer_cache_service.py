@@ -0,0 +1,195 @@
+"""
+Answer cache for repeated chat questions over the same document set.
+Answers are keyed by the normalized search query, a fingerprint of the
+session's documents, the prompt type and the conversation history the prompt
+includes, and stored in MongoDB with a small in-process LRU in front of it.
+"""
+
+import logging
+import hashlib
+import re
+import time
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Tuple
+from collections import OrderedDict
+
+from common.src.core.database import mongodb
+from common.src.core.config import config
+
+logger = logging.getLogger(__name__)
+
+ANSWER_CACHE_COLLECTION = "answer_cache"
+
+# Query types whose answers depend on per-session state rather than only on the documents
+UNCACHEABLE_QUERY_TYPES = {"calculation", "multi_year_calculation", "simple_acknowledgment"}
+
+# Words that do not change what is being asked
+FILLER_WORDS = {"please", "pls", "kindly", "can", "could", "would", "you", "me", "the", "a", "an", "just"}
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, drop punctuation and filler words, collapse whitespace."""
+    words = re.findall(r"[a-z0-9]+", query.lower())
+    return " ".join(word for word in words if word not in FILLER_WORDS)
+
+
+def document_fingerprint(document_ids: List[str]) -> str:
+    """Order-independent fingerprint of a set of document ids."""
+    joined = "\n".join(sorted(set(doc_id for doc_id in document_ids if doc_id)))
+    return hashlib.sha256(joined.encode("utf-8")).hexdigest()
+
+
+class AnswerCacheService:
+    """Cache of generated answers, shared through MongoDB and fronted by a local LRU."""
+
+    def __init__(self, max_local_entries: int = 1024, local_ttl_seconds: float = 300.0):
+        self.max_local_entries = max_local_entries
+        self.local_ttl_seconds = local_ttl_seconds
+        self._local: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._stats = {"hits": 0, "local_hits": 0, "misses": 0, "stores": 0, "invalidations": 0, "errors": 0}
+
+    @staticmethod
+    def is_cacheable(query_type: str) -> bool:
+        return query_type not in UNCACHEABLE_QUERY_TYPES
+
+    @staticmethod
+    def make_key(query: str, document_ids: List[str], query_type: str, history: str = "") -> str:
+        """
+        Cache key for a query over a document set.
+        
+        ``history`` is the conversation context that goes into the prompt: a
+        follow-up ("and for 2023?") only shares an answer with the same history.
+        """
+        history_fingerprint = hashlib.sha256(history.encode("utf-8")).hexdigest() if history else ""
+        raw = f"{normalize_query(query)}|{document_fingerprint(document_ids)}|{query_type}|{history_fingerprint}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def _collection(self):
+        if not mongodb.is_connected():
+            await mongodb.connect()
+        return mongodb.get_collection(ANSWER_CACHE_COLLECTION)
+
+    def _get_local(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._local.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] > self.local_ttl_seconds:
+            del self._local[key]
+            return None
+        self._local.move_to_end(key)
+        return entry[1]
+
+    def _put_local(self, key: str, entry: Dict[str, Any]):
+        self._local[key] = (time.monotonic(), entry)
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_local_entries:
+            self._local.popitem(last=False)
+
+    def _drop_local(self, predicate) -> int:
+        keys = [key for key, (_, entry) in self._local.items() if predicate(entry)]
+        for key in keys:
+            del self._local[key]
+        return len(keys)
+
+    async def get(self, key: str) -> Optional[str]:
+        """Cached answer for a key, or None."""
+        entry = self._get_local(key)
+        if entry is not None:
+            self._stats["hits"] += 1
+            self._stats["local_hits"] += 1
+            return entry["answer"]
+
+        try:
+            collection = await self._collection()
+            entry = await collection.find_one(
+                {"_id": key, "expires_at": {"$gt": datetime.utcnow()}},
+                projection={"answer": 1, "session_id": 1, "user_id": 1, "document_ids": 1}
+            )
+        except Exception as e:
+            self._stats["errors"] += 1
+            logger.warning(f"[ANSWER_CACHE] Lookup failed: {e}")
+            return None
+
+        if not entry:
+            self._stats["misses"] += 1
+            return None
+
+        self._stats["hits"] += 1
+        self._put_local(key, entry)
+        return entry["answer"]
+
+    async def put(self, key: str, answer: str, query: str, query_type: str,
+                  document_ids: List[str], session_id: str, user_id: str):
+        """Store an answer (failures are logged, never raised)."""
+        now = datetime.utcnow()
+        entry = {
+            "_id": key,
+            "answer": answer,
+            "query": normalize_query(query),
+            "query_type": query_type,
+            "fingerprint": document_fingerprint(document_ids),
+            "document_ids": sorted(set(document_ids)),
+            "session_id": session_id,
+            "user_id": user_id,
+            "created_at": now,
+            "expires_at": now + timedelta(seconds=config.answer_cache_ttl)
+        }
+        self._put_local(key, entry)
+        try:
+            collection = await self._collection()
+            await collection.replace_one({"_id": key}, entry, upsert=True)
+            self._stats["stores"] += 1
+        except Exception as e:
+            self._stats["errors"] += 1
+            logger.warning(f"[ANSWER_CACHE] Store failed: {e}")
+
+    async def invalidate_session(self, session_id: str) -> int:
+        """Drop the answers cached for a session (its document set changed)."""
+        self._drop_local(lambda entry: entry.get("session_id") == session_id)
+        return await self._delete_many({"session_id": session_id})
+
+    async def invalidate_document(self, document_id: str) -> int:
+        """Drop every answer that was generated from a document."""
+        self._drop_local(lambda entry: document_id in entry.get("document_ids", []))
+        return await self._delete_many({"document_ids": document_id})
+
+    async def clear(self, user_id: Optional[str] = None) -> int:
+        """Drop all answers, or all answers of one user."""
+        if user_id is None:
+            self._local.clear()
+            return await self._delete_many({})
+        self._drop_local(lambda entry: entry.get("user_id") == user_id)
+        return await self._delete_many({"user_id": user_id})
+
+    async def _delete_many(self, query: Dict[str, Any]) -> int:
+        try:
+            collection = await self._collection()
+            result = await collection.delete_many(query)
+            self._stats["invalidations"] += result.deleted_count
+            return result.deleted_count
+        except Exception as e:
+            self._stats["errors"] += 1
+            logger.warning(f"[ANSWER_CACHE] Invalidation failed for {query}: {e}")
+            return 0
+
+    async def get_stats(self, user_id: Optional[str] = None) -> Dict[str, Any]:
+        """Hit/miss counters of this process plus the number of stored entries."""
+        lookups = self._stats["hits"] + self._stats["misses"]
+        stats = dict(self._stats)
+        stats["lookups"] = lookups
+        stats["hit_rate"] = round(self._stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["local_entries"] = len(self._local)
+        try:
+            collection = await self._collection()
+            query = {"expires_at": {"$gt": datetime.utcnow()}}
+            if user_id:
+                query["user_id"] = user_id
+            stats["stored_entries"] = await collection.count_documents(query)
+        except Exception as e:
+            logger.warning(f"[ANSWER_CACHE] Could not count entries: {e}")
+            stats["stored_entries"] = None
+        return stats
+
+
+# Global instance
+answer_cache_service = AnswerCacheService()
@@ -9,13 +9,17 @@ import boto3
 import time
 import json
 from botocore.exceptions import ClientError
-from typing import Optional, Dict, Any, List, Tuple
+from typing import Optional, Dict, Any, List, Tuple, Union
 from enum import Enum
 import asyncio
 import io
 from io import BytesIO
 from PIL import Image, ImageOps, ImageFilter
 import tempfile
+from collections import Counter
+
+from common.src.services.textract_job_tracker import TextractJobTracker, SqsNotificationChannel
+from common.src.utils.textract_blocks import BlockGraph
 
 logger = logging.getLogger(__name__)
 
@@ -38,6 +42,7 @@ class AWSTextractService:
         self.textract_client = None
         self.s3_client = None
         self._clients_initialized = False
+        self._job_tracker = None
     
     def _init_clients(self):
         """Initialize AWS clients."""
@@ -97,6 +102,26 @@ class AWSTextractService:
             self._init_clients()
             self._clients_initialized = True
 
+    def _get_job_tracker(self) -> TextractJobTracker:
+        """Shared tracker that waits for all async analysis jobs of this service."""
+        if self._job_tracker is None:
+            from common.src.core.config import config
+            
+            notifications = None
+            if config.textract_sqs_queue_url:
+                sqs_client = boto3.client('sqs', region_name=os.getenv('AWS_REGION', 'ap-south-1'))
+                notifications = SqsNotificationChannel(sqs_client, config.textract_sqs_queue_url)
+                logger.info(f"🔔 AWS Textract: Job notifications from {config.textract_sqs_queue_url}")
+            
+            self._job_tracker = TextractJobTracker(
+                get_status=lambda job_id: self.textract_client.get_document_analysis(JobId=job_id, MaxResults=1),
+                notifications=notifications,
+                initial_interval=config.textract_poll_initial_interval,
+                max_interval=config.textract_poll_max_interval,
+                default_timeout=config.textract_job_timeout
+            )
+        return self._job_tracker
+
     def _is_running_in_lambda(self) -> bool:
         """Check if running in AWS Lambda environment."""
         return bool(
@@ -475,9 +500,21 @@ class AWSTextractService:
             
             logger.info(f"🚀 AWS Textract: Starting async job for s3://{s3_bucket}/{s3_key}")
             
-            response = self.textract_client.start_document_analysis(
-                DocumentLocation={'S3Object': {'Bucket': s3_bucket, 'Name': s3_key}},
-                FeatureTypes=feature_types
+            from common.src.core.config import config
+            
+            request = {
+                "DocumentLocation": {'S3Object': {'Bucket': s3_bucket, 'Name': s3_key}},
+                "FeatureTypes": feature_types
+            }
+            if config.textract_sns_topic_arn and config.textract_sns_role_arn:
+                request["NotificationChannel"] = {
+                    "SNSTopicArn": config.textract_sns_topic_arn,
+                    "RoleArn": config.textract_sns_role_arn
+                }
+            
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(
+                None, lambda: self.textract_client.start_document_analysis(**request)
             )
             
             job_id = response['JobId']
@@ -494,9 +531,15 @@ class AWSTextractService:
             logger.error(f"Unexpected error starting document analysis job: {e}")
             raise TextractError(f"Unexpected error: {e}")
 
-    async def wait_for_job_completion(self, job_id: str, poll_interval: int = 5) -> None:
+    async def wait_for_job_completion(self, job_id: str, timeout: Optional[float] = None) -> None:
         """
         Wait for a document analysis job to complete.
+        
+        Status checks back off from ``textract_poll_initial_interval`` to
+        ``textract_poll_max_interval`` and run off the event loop; an SNS/SQS
+        notification (when configured) triggers an immediate check. Raises
+        TextractError when the job fails or exceeds ``timeout`` seconds
+        (default ``textract_job_timeout``).
         """
         try:
             self._ensure_clients_initialized()
@@ -505,24 +548,25 @@ class AWSTextractService:
                 raise TextractError("AWS Textract client not available")
             
             logger.info(f"⏳ AWS Textract: Waiting for job completion - {job_id}")
+            started = time.time()
             
-            while True:
-                result = self.textract_client.get_document_analysis(JobId=job_id)
-                status = result['JobStatus']
-                
-                if status == 'SUCCEEDED':
-                    logger.info(f"✅ AWS Textract: Job {job_id} completed successfully")
-                    return
-                elif status == 'FAILED':
-                    error_message = result.get('StatusMessage', 'Unknown error')
-                    logger.error(f"❌ AWS Textract: Job {job_id} failed: {error_message}")
-                    raise TextractError(f"Textract job failed: {error_message}")
-                elif status == 'IN_PROGRESS':
-                    await asyncio.sleep(poll_interval)
-                else:
-                    logger.warning(f"⚠️ AWS Textract: Unknown job status: {status}")
-                    await asyncio.sleep(poll_interval)
+            try:
+                result = await self._get_job_tracker().wait(job_id, timeout=timeout)
+            except asyncio.TimeoutError:
+                logger.error(f"❌ AWS Textract: Job {job_id} still running after {time.time() - started:.0f}s")
+                raise TextractError(f"Textract job {job_id} timed out")
+            
+            status = result['JobStatus']
+            if status == 'FAILED':
+                error_message = result.get('StatusMessage', 'Unknown error')
+                logger.error(f"❌ AWS Textract: Job {job_id} failed: {error_message}")
+                raise TextractError(f"Textract job failed: {error_message}")
+            if status == 'PARTIAL_SUCCESS':
+                logger.warning(f"⚠️ AWS Textract: Job {job_id} partially succeeded: {result.get('StatusMessage', '')}")
+            logger.info(f"✅ AWS Textract: Job {job_id} completed successfully in {time.time() - started:.1f}s")
                     
+        except TextractError:
+            raise
         except ClientError as e:
             error_code = e.response['Error']['Code']
             error_message = e.response['Error']['Message']
@@ -532,6 +576,19 @@ class AWSTextractService:
             logger.error(f"Unexpected error waiting for job completion: {e}")
             raise TextractError(f"Unexpected error: {e}")
 
+    async def wait_for_jobs(self, job_ids: List[str], timeout: Optional[float] = None) -> Dict[str, Optional[TextractError]]:
+        """
+        Wait for several analysis jobs at once.
+        
+        Returns a map of job id to None (succeeded) or the TextractError that
+        ended the wait for that job.
+        """
+        results = await asyncio.gather(
+            *[self.wait_for_job_completion(job_id, timeout=timeout) for job_id in job_ids],
+            return_exceptions=True
+        )
+        return {job_id: result for job_id, result in zip(job_ids, results)}
+
     async def get_all_blocks_from_job(self, job_id: str) -> List[Dict[str, Any]]:
         """
         Get all blocks from a completed document analysis job.
@@ -546,42 +603,30 @@ class AWSTextractService:
             
             blocks = []
             next_token = None
-            page_count = 0
             
+            loop = asyncio.get_running_loop()
             while True:
+                request = {"JobId": job_id}
                 if next_token:
-                    response = self.textract_client.get_document_analysis(
-                        JobId=job_id, 
-                        NextToken=next_token
-                    )
-                else:
-                    response = self.textract_client.get_document_analysis(JobId=job_id)
+                    request["NextToken"] = next_token
+                response = await loop.run_in_executor(
+                    None, lambda: self.textract_client.get_document_analysis(**request)
+                )
                 
                 current_blocks = response['Blocks']
                 blocks.extend(current_blocks)
-                
-                # Count block types for debugging
-                block_types = {}
-                for block in current_blocks:
-                    btype = block.get('BlockType', 'UNKNOWN')
-                    block_types[btype] = block_types.get(btype, 0) + 1
-                
-                logger.info(f"📊 AWS Textract: Retrieved {len(current_blocks)} blocks in this batch")
-                logger.info(f"📊 AWS Textract: Block types in this batch: {block_types}")
+                logger.debug(f"📊 AWS Textract: Retrieved {len(current_blocks)} blocks in this batch")
                 
                 next_token = response.get("NextToken")
                 
                 if not next_token:
                     break
             
-            # Final analysis of all blocks
-            total_block_types = {}
-            for block in blocks:
-                btype = block.get('BlockType', 'UNKNOWN')
-                total_block_types[btype] = total_block_types.get(btype, 0) + 1
+            # Count block types once over all batches
+            total_block_types = Counter(block.get('BlockType', 'UNKNOWN') for block in blocks)
             
             logger.info(f"✅ AWS Textract: Retrieved {len(blocks)} total blocks from job {job_id}")
-            logger.info(f"📊 AWS Textract: Total block types: {total_block_types}")
+            logger.info(f"📊 AWS Textract: Total block types: {dict(total_block_types)}")
             
             # Check for potential issues
             if len(blocks) == 0:
@@ -605,29 +650,12 @@ class AWSTextractService:
     def organize_blocks_by_type(self, blocks: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
         """
         Organize blocks by their type for easier processing.
+        Blocks are grouped as returned by Textract, without copying.
         """
         try:
             organized = {}
             for block in blocks:
-                btype = block['BlockType']
-                if btype not in organized:
-                    organized[btype] = []
-                
-                organized[btype].append({
-                    "Text": block.get("Text", ""),
-                    "Confidence": block.get("Confidence"),
-                    "Id": block.get("Id"),
-                    "Page": block.get("Page"),
-                    "TextType": block.get("TextType", ""),
-                    "Geometry": block.get("Geometry", {}),
-                    "EntityTypes": block.get("EntityTypes", []),
-                    "SelectionStatus": block.get("SelectionStatus", ""),
-                    "RowIndex": block.get("RowIndex"),
-                    "ColumnIndex": block.get("ColumnIndex"),
-                    "RowSpan": block.get("RowSpan"),
-                    "ColumnSpan": block.get("ColumnSpan"),
-                    "Relationships": block.get("Relationships", [])
-                })
+                organized.setdefault(block.get('BlockType', 'UNKNOWN'), []).append(block)
             
             logger.info(f"📊 AWS Textract: Organized {len(blocks)} blocks into {len(organized)} types")
             return organized
@@ -636,6 +664,15 @@ class AWSTextractService:
             logger.error(f"Error organizing blocks: {e}")
             return {}
 
+    @staticmethod
+    def _as_block_graph(blocks: Union[BlockGraph, Dict[str, List[Dict[str, Any]]], List[Dict[str, Any]]]) -> BlockGraph:
+        """BlockGraph for a graph, organized blocks or a plain block list."""
+        if isinstance(blocks, BlockGraph):
+            return blocks
+        if isinstance(blocks, dict):
+            return BlockGraph.from_organized(blocks)
+        return BlockGraph(blocks)
+
     async def process_document_async_comprehensive(self, s3_bucket: str, s3_key: str, 
                                                  feature_types: List[str] = None,
                                                  save_organized_blocks: bool = False,
@@ -668,13 +705,14 @@ class AWSTextractService:
             # Log detailed block analysis
             self._log_block_analysis_diagnostics(all_blocks, job_id)
             
-            # Organize blocks by type
-            organized_blocks = self.organize_blocks_by_type(all_blocks)
+            # Index blocks once; every extraction below uses the same graph
+            block_graph = BlockGraph(all_blocks)
+            organized_blocks = block_graph.organized()
             
             # Debug: Log block details
             logger.info(f"🔍 AWS Textract: Block analysis - Total: {len(all_blocks)}")
-            for block_type, blocks in organized_blocks.items():
-                logger.info(f"🔍 AWS Textract: {block_type}: {len(blocks)} blocks")
+            for block_type, count in block_graph.type_counts().items():
+                logger.info(f"🔍 AWS Textract: {block_type}: {count} blocks")
             
             # Prepare results
             results = {
@@ -688,7 +726,7 @@ class AWSTextractService:
             }
             
             # Extract specific data types
-            results.update(self._extract_specific_data_types(organized_blocks))
+            results.update(self._extract_specific_data_types(block_graph))
             
             # Save organized blocks if requested
             if save_organized_blocks:
@@ -708,9 +746,9 @@ class AWSTextractService:
             logger.error(f"Comprehensive async document processing failed: {e}")
             raise TextractError(f"Async processing failed: {e}")
 
-    def _extract_specific_data_types(self, organized_blocks: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+    def _extract_specific_data_types(self, organized_blocks: Union[BlockGraph, Dict[str, List[Dict[str, Any]]]]) -> Dict[str, Any]:
         """
-        Extract specific data types from organized blocks.
+        Extract specific data types from organized blocks (or a BlockGraph).
         """
         extracted_data = {
             "text_lines": [],
@@ -723,146 +761,67 @@ class AWSTextractService:
         }
         
         try:
+            block_graph = self._as_block_graph(organized_blocks)
+            
             # Extract text lines
-            if "LINE" in organized_blocks:
-                extracted_data["text_lines"] = [
-                    block["Text"] for block in organized_blocks["LINE"] 
-                    if block["Text"].strip()
-                ]
+            lines = block_graph.of_type("LINE")
+            extracted_data["text_lines"] = [
+                block["Text"] for block in lines
+                if block.get("Text", "").strip()
+            ]
             
             # Extract paragraphs (optimized for vector storage and AI generation)
-            if "LINE" in organized_blocks:
-                extracted_data["paragraphs"] = self.extract_paragraphs_from_blocks(organized_blocks)
-                extracted_data["paragraphs_for_vector"] = self.extract_paragraphs_for_vector_storage(organized_blocks)
+            if lines:
+                extracted_data["paragraphs"] = self.extract_paragraphs_from_blocks(block_graph)
+                extracted_data["paragraphs_for_vector"] = self.extract_paragraphs_for_vector_storage(
+                    block_graph, paragraphs=extracted_data["paragraphs"]
+                )
             
             # Extract page count
-            if "PAGE" in organized_blocks:
-                extracted_data["page_count"] = len(organized_blocks["PAGE"])
+            extracted_data["page_count"] = len(block_graph.by_type.get("PAGE", ()))
             
             # Extract form data (key-value pairs)
-            if "KEY_VALUE_SET" in organized_blocks:
-                extracted_data["form_data"] = self._extract_form_data_from_blocks(organized_blocks)
+            if "KEY_VALUE_SET" in block_graph.by_type:
+                extracted_data["form_data"] = self._extract_form_data_from_blocks(block_graph)
             
             # Extract tables
-            if "TABLE" in organized_blocks:
-                extracted_data["tables"] = self._extract_tables_from_blocks(organized_blocks)
+            if "TABLE" in block_graph.by_type:
+                extracted_data["tables"] = self._extract_tables_from_blocks(block_graph)
             
             # Extract signatures
-            if "SIGNATURE" in organized_blocks:
-                extracted_data["signatures"] = [
-                    block for block in organized_blocks["SIGNATURE"]
-                ]
+            extracted_data["signatures"] = block_graph.of_type("SIGNATURE")
             
         except Exception as e:
             logger.error(f"❌ AWS Textract: Error extracting specific data types: {e}")
         
         return extracted_data
 
-    def _extract_form_data_from_blocks(self, organized_blocks: Dict[str, List[Dict[str, Any]]]) -> Dict[str, List[str]]:
+    def _extract_form_data_from_blocks(self, organized_blocks: Union[BlockGraph, Dict[str, List[Dict[str, Any]]]]) -> Dict[str, List[str]]:
         """
         Extract form data (key-value pairs) from organized blocks.
         """
         try:
-            from collections import defaultdict
-            
-            key_map = {}
-            value_map = {}
-            block_map = {}
-            
-            # Build block map
-            for block_type, blocks in organized_blocks.items():
-                for block in blocks:
-                    block_map[block["Id"]] = block
-            
-            # Separate keys and values
-            if "KEY_VALUE_SET" in organized_blocks:
-                for block in organized_blocks["KEY_VALUE_SET"]:
-                    if "KEY" in block.get("EntityTypes", []):
-                        key_map[block["Id"]] = block
-                    else:
-                        value_map[block["Id"]] = block
-            
-            # Build key-value relationships
-            kvs = defaultdict(list)
-            for block_id, key_block in key_map.items():
-                value_block = self._find_value_block_for_key(key_block, value_map)
-                key = self._get_text_from_block(key_block, block_map)
-                val = self._get_text_from_block(value_block, block_map)
-                if key and val:
-                    kvs[key].append(val)
-            
-            return dict(kvs)
-            
+            return self._as_block_graph(organized_blocks).key_values()
         except Exception as e:
             logger.error(f"❌ AWS Textract: Error extracting form data: {e}")
             return {}
 
-    def _find_value_block_for_key(self, key_block: Dict[str, Any], value_map: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Find the value block associated with a key block.
-        """
-        try:
-            for relationship in key_block.get("Relationships", []):
-                if relationship["Type"] == "VALUE":
-                    for value_id in relationship["Ids"]:
-                        if value_id in value_map:
-                            return value_map[value_id]
-            return {}
-        except Exception as e:
-            logger.error(f"❌ AWS Textract: Error finding value block: {e}")
-            return {}
-
-    def _get_text_from_block(self, block: Dict[str, Any], block_map: Dict[str, Any]) -> str:
-        """
-        Extract text from a block by following relationships.
-        """
-        try:
-            text = ""
-            if "Relationships" in block:
-                for relationship in block["Relationships"]:
-                    if relationship["Type"] == "CHILD":
-                        for child_id in relationship["Ids"]:
-                            if child_id in block_map:
-                                child_block = block_map[child_id]
-                                if child_block["BlockType"] == "WORD":
-                                    text += child_block["Text"] + " "
-                                elif child_block["BlockType"] == "SELECTION_ELEMENT":
-                                    if child_block.get("SelectionStatus") == "SELECTED":
-                                        text += "X"
-            return text.strip()
-        except Exception as e:
-            logger.error(f"❌ AWS Textract: Error getting text from block: {e}")
-            return ""
-
-    def _extract_tables_from_blocks(self, organized_blocks: Dict[str, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    def _extract_tables_from_blocks(self, organized_blocks: Union[BlockGraph, Dict[str, List[Dict[str, Any]]]]) -> List[Dict[str, Any]]:
         """
         Extract table data from organized blocks.
         """
         try:
+            block_graph = self._as_block_graph(organized_blocks)
             tables = []
             
-            if "TABLE" in organized_blocks:
-                for table_block in organized_blocks["TABLE"]:
-                    table_data = {
-                        "table_id": table_block["Id"],
-                        "page": table_block.get("Page", 1),
-                        "rows": [],
-                        "cells": []
-                    }
-                    
-                    # Extract cells for this table
-                    if "Relationships" in table_block:
-                        for relationship in table_block["Relationships"]:
-                            if relationship["Type"] == "CHILD":
-                                for cell_id in relationship["Ids"]:
-                                    # Find cell block in organized blocks
-                                    for block_type, blocks in organized_blocks.items():
-                                        if block_type == "CELL":
-                                            for cell_block in blocks:
-                                                if cell_block["Id"] == cell_id:
-                                                    table_data["cells"].append(cell_block)
-                    
-                    tables.append(table_data)
+            for table_position in block_graph.by_type.get("TABLE", ()):
+                table_block = block_graph.blocks[table_position]
+                tables.append({
+                    "table_id": table_block["Id"],
+                    "page": table_block.get("Page", 1),
+                    "rows": [],
+                    "cells": block_graph.table_cells(table_position)
+                })
             
             return tables
             
@@ -870,7 +829,7 @@ class AWSTextractService:
             logger.error(f"❌ AWS Textract: Error extracting tables: {e}")
             return []
 
-    def extract_paragraphs_from_blocks(self, organized_blocks: Dict[str, List[Dict[str, Any]]], 
+    def extract_paragraphs_from_blocks(self, organized_blocks: Union[BlockGraph, Dict[str, List[Dict[str, Any]]]], 
                                      max_line_distance: float = 50.0,
                                      min_paragraph_length: int = 10) -> List[Dict[str, Any]]:
         """
@@ -878,7 +837,7 @@ class AWSTextractService:
         This is optimized for vector storage and AI generation.
         
         Args:
-            organized_blocks: Organized blocks by type
+            organized_blocks: Organized blocks by type, or a BlockGraph
             max_line_distance: Maximum vertical distance between lines to consider them part of same paragraph
             min_paragraph_length: Minimum character length for a paragraph to be included
             
@@ -887,23 +846,17 @@ class AWSTextractService:
         """
         try:
             paragraphs = []
+            block_graph = self._as_block_graph(organized_blocks)
             
-            if "LINE" not in organized_blocks:
+            if "LINE" not in block_graph.by_type:
                 logger.warning("⚠️ AWS Textract: No LINE blocks found for paragraph extraction")
                 return paragraphs
             
-            # Group lines by page
-            lines_by_page = {}
-            for line_block in organized_blocks["LINE"]:
-                page = line_block.get("Page", 1)
-                if page not in lines_by_page:
-                    lines_by_page[page] = []
-                lines_by_page[page].append(line_block)
-            
             # Process each page separately
-            for page_num, page_lines in lines_by_page.items():
+            for page_num, page_lines in block_graph.lines_by_page().items():
                 # Sort lines by vertical position (top to bottom)
-                sorted_lines = sorted(page_lines, key=lambda x: x.get("Geometry", {}).get("BoundingBox", {}).get("Top", 0))
+                sorted_lines = sorted(page_lines, key=block_graph.top)
+                previous_position = None
                 
                 current_paragraph = {
                     "text": "",
@@ -915,36 +868,32 @@ class AWSTextractService:
                     "word_count": 0
                 }
                 
-                for i, line_block in enumerate(sorted_lines):
+                for position in sorted_lines:
+                    line_block = block_graph.blocks[position]
                     line_text = line_block.get("Text", "").strip()
                     if not line_text:
                         continue
                     
                     # Get line geometry
-                    line_geometry = line_block.get("Geometry", {}).get("BoundingBox", {})
-                    line_top = line_geometry.get("Top", 0)
-                    line_height = line_geometry.get("Height", 0)
+                    line_top = block_graph.top(position)
+                    line_height = block_graph.height(position)
                     line_confidence = line_block.get("Confidence", 0)
                     
                     # Check if this line should be part of current paragraph
                     should_combine = False
                     
-                    if current_paragraph["text"]:
-                        # Get previous line geometry
-                        prev_line = current_paragraph["lines"][-1] if current_paragraph["lines"] else None
-                        if prev_line:
-                            prev_geometry = prev_line.get("Geometry", {}).get("BoundingBox", {})
-                            prev_top = prev_geometry.get("Top", 0)
-                            prev_height = prev_geometry.get("Height", 0)
-                            
-                            # Calculate distance between lines
-                            distance = abs(line_top - (prev_top + prev_height))
-                            
-                            # Combine if lines are close vertically and have similar formatting
-                            should_combine = (
-                                distance <= max_line_distance and
-                                abs(line_height - prev_height) <= 0.1  # Similar line heights
-                            )
+                    if current_paragraph["text"] and previous_position is not None:
+                        # Calculate distance to the previous line of the paragraph
+                        prev_height = block_graph.height(previous_position)
+                        distance = abs(line_top - (block_graph.top(previous_position) + prev_height))
+                        
+                        # Combine if lines are close vertically and have similar formatting
+                        should_combine = (
+                            distance <= max_line_distance and
+                            abs(line_height - prev_height) <= 0.1  # Similar line heights
+                        )
+                    
+                    previous_position = position
                     
                     if should_combine:
                         # Add to current paragraph
@@ -979,13 +928,16 @@ class AWSTextractService:
             logger.error(f"Error extracting paragraphs: {e}")
             return []
 
-    def extract_paragraphs_for_vector_storage(self, organized_blocks: Dict[str, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    def extract_paragraphs_for_vector_storage(self, organized_blocks: Union[BlockGraph, Dict[str, List[Dict[str, Any]]]],
+                                              paragraphs: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
         """
         Extract paragraphs optimized for vector storage and AI generation.
         This method creates meaningful text chunks that are ideal for embedding.
+        Pass ``paragraphs`` when extract_paragraphs_from_blocks already ran.
         """
         try:
-            paragraphs = self.extract_paragraphs_from_blocks(organized_blocks)
+            if paragraphs is None:
+                paragraphs = self.extract_paragraphs_from_blocks(organized_blocks)
             
             # Enhance paragraphs with additional metadata for vector storage
             enhanced_paragraphs = []
@@ -1428,25 +1380,17 @@ class AWSTextractService:
         Extract text from form analysis blocks.
         """
         try:
+            block_graph = BlockGraph(blocks)
             text_lines = []
             
-            # Extract text from KEY_VALUE_SET blocks
-            for block in blocks:
-                if block['BlockType'] == 'KEY_VALUE_SET':
-                    # Get the text from key-value relationships
-                    if 'Relationships' in block:
-                        for relationship in block['Relationships']:
-                            if relationship['Type'] == 'CHILD':
-                                for child_id in relationship['Ids']:
-                                    # Find the child block
-                                    child_block = next((b for b in blocks if b['Id'] == child_id), None)
-                                    if child_block and child_block['BlockType'] == 'WORD':
-                                        text_lines.append(child_block['Text'])
+            # Extract the WORD children of KEY_VALUE_SET blocks
+            for position in block_graph.by_type.get("KEY_VALUE_SET", ()):
+                for child in block_graph.children(position, "WORD"):
+                    text_lines.append(block_graph.blocks[child]['Text'])
             
             # Also extract from regular LINE blocks
-            for block in blocks:
-                if block['BlockType'] == 'LINE':
-                    text_lines.append(block['Text'])
+            for line_block in block_graph.of_type("LINE"):
+                text_lines.append(line_block['Text'])
             
             return ' '.join(text_lines)
             
@@ -1525,6 +1469,23 @@ class AWSTextractService:
         Returns:
             Tuple of (text_content, page_count)
         """
+        extracted = await self.extract_document_from_s3_pdf(s3_bucket, s3_key, document_type)
+        return extracted["text"], extracted["page_count"]
+
+    async def extract_document_from_s3_pdf(self, s3_bucket: str, s3_key: str, document_type: DocumentType = DocumentType.GENERAL) -> Dict[str, Any]:
+        """
+        Extract text, and the paragraphs it was joined from, from a PDF stored in S3.
+        
+        Args:
+            s3_bucket: S3 bucket name
+            s3_key: S3 key for the PDF
+            document_type: Type of document to process
+            
+        Returns:
+            {"text", "page_count", "paragraphs"}; "paragraphs" is the output of
+            extract_paragraphs_for_vector_storage (with page numbers), empty when
+            the text came from text lines or the page-image fallback
+        """
         try:
             logger.info(f"📄 AWS Textract: Extracting text from S3 PDF s3://{s3_bucket}/{s3_key} (type: {document_type.value})")
             
@@ -1568,17 +1529,19 @@ class AWSTextractService:
                     self._ensure_clients_initialized()
                     pdf_obj = self.s3_client.get_object(Bucket=s3_bucket, Key=s3_key)
                     pdf_bytes = pdf_obj["Body"].read()
-                    return await self.fallback_textract_on_pdf_images(pdf_bytes, s3_bucket, document_type)
+                    text_content, page_count = await self.fallback_textract_on_pdf_images(pdf_bytes, s3_bucket, document_type)
+                    return {"text": text_content, "page_count": page_count, "paragraphs": []}
                 except Exception as fallback_error:
                     logger.error(f"❌ AWS Textract: PDF to image fallback failed: {fallback_error}")
                     # Continue with normal processing as last resort
             
             # Extract text content from paragraphs for better quality
             text_content = ""
+            paragraphs = results.get("paragraphs_for_vector") or []
             
-            if results.get("paragraphs_for_vector"):
+            if paragraphs:
                 # Use vector-optimized paragraphs for better text quality
-                paragraph_texts = [p["text"] for p in results["paragraphs_for_vector"]]
+                paragraph_texts = [p["text"] for p in paragraphs]
                 text_content = "\n\n".join(paragraph_texts)
                 logger.info(f"📝 AWS Textract: Using paragraphs_for_vector - {len(paragraph_texts)} paragraphs")
             elif results.get("text_lines"):
@@ -1591,7 +1554,7 @@ class AWSTextractService:
             page_count = results.get("page_count", 1)
             
             logger.info(f"✅ AWS Textract: S3 PDF extraction completed - {len(text_content)} chars, {page_count} pages")
-            return text_content, page_count
+            return {"text": text_content, "page_count": page_count, "paragraphs": paragraphs}
             
         except Exception as e:
             logger.error(f"Error extracting text from S3 PDF: {e}")
@@ -1717,78 +1680,179 @@ class AWSTextractService:
             logger.error(f"❌ AWS Textract: Raw text extraction failed: {e}")
             return ""
 
-    async def fallback_textract_on_pdf_images(self, pdf_content: bytes, s3_bucket: str, document_type: DocumentType) -> Tuple[str, int]:
+    async def fallback_textract_on_pdf_images(self, pdf_content: bytes, s3_bucket: str, document_type: DocumentType,
+                                              first_page: Optional[int] = None,
+                                              last_page: Optional[int] = None) -> Tuple[str, int]:
         """
         Fallback method: Convert PDF to images and process with Textract.
         This handles scanned PDFs that don't have extractable text.
+        
+        Pages are OCR'd concurrently by ocr_pdf_pages and their text is joined
+        in page order.
+        
+        Args:
+            pdf_content: PDF file content as bytes
+            s3_bucket: Bucket for oversized page images
+            document_type: Type of document to process
+            first_page: First page to process (1-based, default first)
+            last_page: Last page to process (inclusive, default last)
+            
+        Returns:
+            Tuple of (text_content, page_count)
         """
         try:
             logger.warning("🌀 AWS Textract: Converting PDF to images and re-processing...")
             
             # Try to import pdf2image
             try:
-                from pdf2image import convert_from_bytes
+                from pdf2image import pdfinfo_from_bytes
             except ImportError:
                 logger.error("❌ AWS Textract: pdf2image not available. Install with: pip install pdf2image")
                 raise TextractError("pdf2image not available for PDF to image conversion")
             
-            # Convert PDF to images
-            images = convert_from_bytes(pdf_content, dpi=300)
-            combined_text = []
-            page_count = len(images)
+            loop = asyncio.get_running_loop()
+            pdf_info = await loop.run_in_executor(None, pdfinfo_from_bytes, pdf_content)
+            total_pages = int(pdf_info.get("Pages", 0))
+            first_page = max(1, first_page or 1)
+            last_page = min(total_pages, last_page or total_pages)
+            pages = list(range(first_page, last_page + 1))
+            page_count = len(pages)
             
-            logger.info(f"🔄 AWS Textract: Converted PDF to {page_count} images")
+            logger.info(f"🔄 AWS Textract: OCR of pages {first_page}-{last_page} of {total_pages}")
             
-            for i, image in enumerate(images):
-                logger.info(f"🔄 AWS Textract: Processing page {i+1}/{page_count}")
-                
-                # Save image to temporary file
-                with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmp_file:
-                    image.save(tmp_file.name, "PNG")
-                    
-                    # Read image bytes
-                    with open(tmp_file.name, "rb") as img_file:
-                        image_bytes = img_file.read()
-                    
-                    # Clean up temp file
-                    os.unlink(tmp_file.name)
-                
-                # Upload image to S3
-                from common.src.services.s3_upload_service import s3_upload_service
-                upload_result = s3_upload_service.upload_temp_file(
-                    file_content=image_bytes,
-                    filename=f"fallback_page_{i+1}.png",
-                    purpose="textract_fallback",
-                    user_id="system"
-                )
-                s3_key = upload_result["s3_key"]
-                
-                # Process image with Textract
-                try:
-                    text_content, _ = await self.process_preprocessed_document(
-                        s3_bucket=s3_bucket,
-                        s3_key=s3_key,
-                        document_type=document_type
-                    )
-                    combined_text.append(text_content)
-                    logger.info(f"✅ AWS Textract: Page {i+1} processed - {len(text_content)} chars")
-                except Exception as page_error:
-                    logger.warning(f"⚠️ AWS Textract: Error processing page {i+1}: {page_error}")
-                    combined_text.append("")  # Empty text for failed pages
-                finally:
-                    # Clean up temporary image
-                    try:
-                        s3_upload_service.delete_file(s3_key)
-                    except Exception as cleanup_error:
-                        logger.warning(f"⚠️ AWS Textract: Failed to cleanup temp image {s3_key}: {cleanup_error}")
+            started = time.time()
+            page_texts = await self.ocr_pdf_pages(pdf_content, s3_bucket, document_type, pages)
+            combined_text = [page_texts[page_number] for page_number in pages]
             
             final_text = "\n\n".join(combined_text)
-            logger.info(f"✅ AWS Textract: PDF to image fallback completed - {len(final_text)} chars, {page_count} pages")
+            logger.info(f"✅ AWS Textract: PDF to image fallback completed - {len(final_text)} chars, "
+                        f"{page_count} pages in {time.time() - started:.1f}s")
             return final_text, page_count
             
         except Exception as e:
             logger.error(f"❌ AWS Textract: PDF to image fallback failed: {e}")
             raise TextractError(f"PDF to image fallback failed: {e}")
 
+    async def ocr_pdf_pages(self, pdf_content: bytes, s3_bucket: str, document_type: DocumentType,
+                            page_numbers: List[int]) -> Dict[int, str]:
+        """
+        OCR selected PDF pages and return their text by page number.
+        
+        Pages are rendered one at a time and OCR'd concurrently (at most
+        ``textract_ocr_concurrency`` pages in flight, so only that many images
+        are held in memory). Page images under the synchronous size limit are
+        sent to Textract as bytes; larger ones go through a temporary S3 object.
+        A page that fails yields empty text.
+        """
+        try:
+            from pdf2image import convert_from_bytes
+        except ImportError:
+            logger.error("❌ AWS Textract: pdf2image not available. Install with: pip install pdf2image")
+            raise TextractError("pdf2image not available for PDF to image conversion")
+        
+        from common.src.core.config import config
+        
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(config.textract_ocr_concurrency)
+        
+        async def process_page(page_number: int) -> str:
+            async with semaphore:
+                try:
+                    image_bytes = await loop.run_in_executor(
+                        None, self._render_pdf_page, convert_from_bytes, pdf_content, page_number, config.textract_ocr_dpi
+                    )
+                    if not image_bytes:
+                        logger.warning(f"⚠️ AWS Textract: Page {page_number} rendered no image")
+                        return ""
+                    
+                    if len(image_bytes) <= config.textract_sync_max_bytes:
+                        text_content = await self._detect_page_image_text(image_bytes, document_type)
+                    else:
+                        text_content = await self._process_page_image_via_s3(image_bytes, page_number, s3_bucket, document_type)
+                    
+                    logger.info(f"✅ AWS Textract: Page {page_number} processed - {len(text_content)} chars")
+                    return text_content
+                except Exception as page_error:
+                    logger.warning(f"⚠️ AWS Textract: Error processing page {page_number}: {page_error}")
+                    return ""  # Empty text for failed pages
+        
+        logger.info(f"🔄 AWS Textract: OCR of {len(page_numbers)} pages ({config.textract_ocr_concurrency} at a time)")
+        texts = await asyncio.gather(*[process_page(page_number) for page_number in page_numbers])
+        return dict(zip(page_numbers, texts))
+
+    @staticmethod
+    def _render_pdf_page(convert_from_bytes, pdf_content: bytes, page_number: int, dpi: int) -> bytes:
+        """Render a single PDF page to PNG bytes (runs in a worker thread)."""
+        images = convert_from_bytes(pdf_content, dpi=dpi, first_page=page_number, last_page=page_number)
+        if not images:
+            return b""
+        buffer = BytesIO()
+        images[0].save(buffer, "PNG")
+        images[0].close()
+        return buffer.getvalue()
+
+    async def _detect_page_image_text(self, image_bytes: bytes, document_type: DocumentType,
+                                      max_retries: int = 3) -> str:
+        """Synchronous Textract analysis of one page image, retrying when throttled."""
+        self._ensure_clients_initialized()
+        if not self.textract_client:
+            raise TextractError("AWS Textract client not available")
+        
+        loop = asyncio.get_running_loop()
+        for attempt in range(max_retries + 1):
+            try:
+                response = await loop.run_in_executor(
+                    None,
+                    lambda: self.textract_client.analyze_document(
+                        Document={'Bytes': image_bytes},
+                        FeatureTypes=["TABLES", "FORMS", "SIGNATURES", "LAYOUT"]
+                    )
+                )
+                break
+            except ClientError as e:
+                error_code = e.response.get('Error', {}).get('Code', '')
+                throttled = error_code in ('ThrottlingException', 'ProvisionedThroughputExceededException', 'LimitExceededException')
+                if not throttled or attempt == max_retries:
+                    raise
+                delay = 2 ** attempt
+                logger.warning(f"⚠️ AWS Textract: Throttled ({error_code}), retrying page in {delay}s")
+                await asyncio.sleep(delay)
+        
+        results = self._extract_specific_data_types(BlockGraph(response.get('Blocks', [])))
+        if results.get("paragraphs_for_vector"):
+            return "\n\n".join(p["text"] for p in results["paragraphs_for_vector"])
+        return "\n".join(results.get("text_lines", []))
+
+    async def _process_page_image_via_s3(self, image_bytes: bytes, page_number: int, s3_bucket: str,
+                                         document_type: DocumentType) -> str:
+        """Asynchronous Textract job on a page image too large to send as bytes."""
+        from common.src.services.s3_upload_service import s3_upload_service
+        
+        loop = asyncio.get_running_loop()
+        upload_result = await loop.run_in_executor(
+            None,
+            lambda: s3_upload_service.upload_temp_file(
+                file_content=image_bytes,
+                filename=f"fallback_page_{page_number}.png",
+                purpose="textract_fallback",
+                user_id="system"
+            )
+        )
+        s3_key = upload_result["s3_key"]
+        try:
+            # Point Textract at the bucket the image went to, which need not be the PDF's
+            text_content, _ = await self.process_preprocessed_document(
+                s3_bucket=upload_result.get("bucket") or s3_bucket,
+                s3_key=s3_key,
+                document_type=document_type
+            )
+            return text_content
+        finally:
+            # Clean up temporary image
+            try:
+                s3_upload_service.delete_file(s3_key)
+            except Exception as cleanup_error:
+                logger.warning(f"⚠️ AWS Textract: Failed to cleanup temp image {s3_key}: {cleanup_error}")
+
 # Global instance
 textract_service = AWSTextractService() 
\ No newline at end of file
@@ -3,36 +3,99 @@ Chat service for managing chat sessions and AI interactions.
 """
 
 import logging
+import os
 import uuid
 import re
 import asyncio
 import hashlib
+import time
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, AsyncIterator
 from pathlib import Path
+from collections import OrderedDict
+
+from openai import AsyncOpenAI
 
 from common.src.models.chat import (
-    ChatSession, ChatMessage, MessageRole, SessionCreateResponse
+    ChatSession, ChatMessage, MessageRole, SessionContext, SessionCreateResponse
 )
 from common.src.models.documents import Document
 from common.src.core.database import mongodb
 from common.src.core.config import config
+from common.src.core.openai_client import get_openai_client
 from common.src.core.exceptions import ChatError, DatabaseError
-from common.src.services.vector_store_service import VectorStoreService
+from common.src.services.vector_store_service import vector_store_service
 from common.src.services.document_service import DocumentService
 from common.src.services.document_processing_service import document_processing_service
+from common.src.services.answer_cache_service import answer_cache_service
+from common.src.services.keyword_index_service import keyword_index_service
 from common.src.services.s3_upload_service import s3_upload_service
 from common.src.utils.prompts import PromptManager
 
 logger = logging.getLogger(__name__)
 
+# Messages kept in a session context (prompts use the last 5, follow-up detection scans further back)
+SESSION_CONTEXT_MESSAGES = 20
+# Session contexts kept in memory per process
+SESSION_CONTEXT_CACHE_SIZE = 256
+
+
+class ContextCache:
+    """
+    Bounded LRU with TTL for per-session calculation context.
+    
+    Only a front for the ``calculation_context`` field of the session document,
+    which is what survives cold starts and is shared between instances.
+    """
+    
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 3600.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # session_id -> (stored_at, context)
+    
+    def __contains__(self, session_id: str) -> bool:
+        return self.get(session_id) is not None
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(self, session_id: str, default: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(session_id)
+        if entry is None:
+            return default
+        if time.monotonic() - entry[0] > self.ttl_seconds:
+            del self._entries[session_id]
+            return default
+        self._entries.move_to_end(session_id)
+        return entry[1]
+    
+    def set(self, session_id: str, context: Dict[str, Any]):
+        self._entries[session_id] = (time.monotonic(), context)
+        self._entries.move_to_end(session_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+    
+    def pop(self, session_id: str):
+        self._entries.pop(session_id, None)
+
+
+def _mongo_utcnow() -> datetime:
+    """Current UTC time truncated to the millisecond precision MongoDB stores."""
+    now = datetime.utcnow()
+    return now.replace(microsecond=now.microsecond - now.microsecond % 1000)
+
+
 class ChatService:
     """Chat service for managing chat sessions using MongoDB."""
     
-    def __init__(self):
+    def __init__(self, openai_client: Optional[AsyncOpenAI] = None):
         self.prompt_manager = PromptManager()
-        # Cache for storing context from previous queries
-        self.context_cache = {}  # session_id -> cached_context
+        # Shared process-wide OpenAI client unless one is injected
+        self.openai_client = openai_client
+        # Cache for storing context from previous queries, written through to the session document
+        self.context_cache = ContextCache(max_size=config.context_cache_max_sessions, ttl_seconds=config.context_cache_ttl)
+        # Prefetched session contexts, validated against the session's updated_at
+        self._session_contexts: "OrderedDict[str, SessionContext]" = OrderedDict()
     
     async def _ensure_mongodb_connected(self):
         """Ensure MongoDB is connected before operations."""
@@ -128,10 +191,11 @@ class ChatService:
         try:
             await self._ensure_mongodb_connected()
             
+            now = _mongo_utcnow()
             message = ChatMessage(
                 role=role,
                 content=content,
-                timestamp=datetime.utcnow(),
+                timestamp=now,
                 session_id=session_id
             )
             
@@ -140,12 +204,13 @@ class ChatService:
                 {"session_id": session_id, "user_id": user_id},
                 {
                     "$push": {"messages": message.dict()},
-                    "$set": {"updated_at": datetime.utcnow()}
+                    "$set": {"updated_at": now}
                 }
             )
             
             if result.modified_count > 0:
                 logger.info(f"Added message to session {session_id}")
+                self._append_to_session_context(session_id, message, now)
                 return True
             else:
                 logger.warning(f"Session {session_id} not found or not updated")
@@ -155,6 +220,100 @@ class ChatService:
             logger.error(f"Error adding message to session {session_id}: {e}")
             return False
     
+    async def get_session_context(self, session_id: str, user_id: str) -> Optional[SessionContext]:
+        """
+        Get the prefetched context of a session.
+        
+        A cached context is reused when the session's updated_at is unchanged,
+        which costs one small projected read. Otherwise the context is rebuilt with
+        one session read (last messages only), one $in query for uploaded document
+        filenames and concurrent crawl task document lookups.
+        """
+        try:
+            await self._ensure_mongodb_connected()
+            sessions = mongodb.get_collection("chat_sessions")
+            
+            cached = self._session_contexts.get(session_id)
+            if cached and cached.user_id == user_id:
+                current = await sessions.find_one(
+                    {"session_id": session_id, "user_id": user_id},
+                    projection={"updated_at": 1, "_id": 0}
+                )
+                if not current:
+                    self.invalidate_session_context(session_id)
+                    return None
+                if current.get("updated_at") == cached.updated_at:
+                    # The session's vector store can be created after the context was built
+                    cached.vector_store_id = vector_store_service.session_vector_stores.get(session_id, cached.vector_store_id)
+                    self._session_contexts.move_to_end(session_id)
+                    return cached
+            
+            session_data = await sessions.find_one(
+                {"session_id": session_id, "user_id": user_id},
+                projection={
+                    "_id": 0, "updated_at": 1, "crawl_tasks": 1, "uploaded_documents": 1, "calculation_context": 1,
+                    "messages": {"$slice": -SESSION_CONTEXT_MESSAGES}
+                }
+            )
+            if not session_data:
+                self.invalidate_session_context(session_id)
+                return None
+            
+            uploaded_documents = session_data.get("uploaded_documents", [])
+            crawl_tasks = session_data.get("crawl_tasks", [])
+            
+            filenames = []
+            if uploaded_documents:
+                filenames_by_id = {}
+                cursor = mongodb.get_collection("documents").find(
+                    {"document_id": {"$in": uploaded_documents}},
+                    projection={"_id": 0, "document_id": 1, "filename": 1}
+                )
+                async for doc in cursor:
+                    filenames_by_id[doc["document_id"]] = doc.get("filename", "")
+                filenames = [filenames_by_id[doc_id] for doc_id in uploaded_documents if doc_id in filenames_by_id]
+            
+            crawl_documents = []
+            if crawl_tasks:
+                for task_documents in await asyncio.gather(*[self._get_documents_for_crawl_task(task_id) for task_id in crawl_tasks]):
+                    crawl_documents.extend(task_documents)
+            
+            context = SessionContext(
+                session_id=session_id,
+                user_id=user_id,
+                updated_at=session_data.get("updated_at"),
+                recent_messages=[ChatMessage(**msg_data) for msg_data in session_data.get("messages", [])],
+                crawl_tasks=crawl_tasks,
+                uploaded_documents=uploaded_documents,
+                filenames=filenames,
+                crawl_documents=crawl_documents,
+                vector_store_id=vector_store_service.session_vector_stores.get(session_id),
+                calculation_context=session_data.get("calculation_context") or {}
+            )
+            
+            self._session_contexts[session_id] = context
+            self._session_contexts.move_to_end(session_id)
+            while len(self._session_contexts) > SESSION_CONTEXT_CACHE_SIZE:
+                self._session_contexts.popitem(last=False)
+            
+            return context
+            
+        except Exception as e:
+            logger.error(f"Error building context for session {session_id}: {e}")
+            return None
+    
+    def invalidate_session_context(self, session_id: str):
+        """Drop the cached context of a session (linked documents or tasks changed)."""
+        self._session_contexts.pop(session_id, None)
+    
+    def _append_to_session_context(self, session_id: str, message: ChatMessage, updated_at: datetime):
+        """Keep a cached context current after this process added a message."""
+        context = self._session_contexts.get(session_id)
+        if context is None:
+            return
+        context.recent_messages = (context.recent_messages + [message])[-SESSION_CONTEXT_MESSAGES:]
+        context.updated_at = updated_at
+    
     async def get_session_messages(self, session_id: str, user_id: str) -> List[ChatMessage]:
         """Get all messages for a session."""
         try:
@@ -175,8 +334,12 @@ class ChatService:
                 "session_id": session_id,
                 "user_id": user_id
             })
+            self.invalidate_session_context(session_id)
+            self.context_cache.pop(session_id)
+            await answer_cache_service.invalidate_session(session_id)
             
             if result.deleted_count > 0:
+                await keyword_index_service.remove_session(session_id)
                 logger.info(f"Deleted session {session_id}")
                 return True
             else:
@@ -197,6 +360,9 @@ class ChatService:
             })
             
             deleted_count = result.deleted_count
+            for session_id, context in list(self._session_contexts.items()):
+                if context.user_id == user_id:
+                    self.invalidate_session_context(session_id)
             logger.info(f"Cleared {deleted_count} sessions for user {user_id}")
             return deleted_count
             
@@ -208,16 +374,18 @@ class ChatService:
                                 user_message: str) -> Optional[str]:
         """Process user message and generate AI response."""
         try:
-            session = await self.get_session(session_id, user_id)
-            if not session:
+            session_context = await self.get_session_context(session_id, user_id)
+            if not session_context:
                 logger.error(f"[CHAT] Session not found: {session_id}")
                 return None
+            # History as it was before this message
+            conversation_history = list(session_context.recent_messages)
             
             # Add user message
             await self.add_message(session_id, user_id, MessageRole.USER, user_message)
             
             # Generate AI response using the prompts utility
-            ai_response = await self._generate_ai_response(session, user_message)
+            ai_response = await self._generate_ai_response(session_context, user_message, conversation_history)
             
             if ai_response:
                 # Add AI response
@@ -277,7 +445,7 @@ class ChatService:
         
         return user_message
 
-    def _extract_and_cache_context(self, user_message: str, ai_response: str, session_id: str):
+    async def _extract_and_cache_context(self, user_message: str, ai_response: str, session_id: str):
         """Extract and cache important context from AI responses."""
         try:
             # Extract salary information from responses
@@ -296,11 +464,10 @@ class ChatService:
                 match = re.search(pattern, response_lower)
                 if match:
                     amount = match.group(1).replace(',', '')
-                    self.context_cache[session_id] = {
+                    await self._store_calculation_context(session_id, {
                         'take_home_salary': int(amount),
-                        'last_query': user_message,
-                        'last_response': ai_response
-                    }
+                        'last_query': user_message
+                    })
                     logger.info(f"[CONTEXT] Cached take-home salary: ₹{amount}")
                     return
             
@@ -315,17 +482,32 @@ class ChatService:
                 match = re.search(pattern, response_lower)
                 if match:
                     amount = match.group(1).replace(',', '')
-                    self.context_cache[session_id] = {
+                    await self._store_calculation_context(session_id, {
                         'gross_salary': int(amount),
-                        'last_query': user_message,
-                        'last_response': ai_response
-                    }
+                        'last_query': user_message
+                    })
                     logger.info(f"[CONTEXT] Cached gross salary: ₹{amount}")
                     return
                     
         except Exception as e:
             logger.error(f"[CONTEXT] Error extracting context: {e}")
 
+    async def _store_calculation_context(self, session_id: str, context: Dict[str, Any]):
+        """Cache a calculation context and write it through to the session document."""
+        self.context_cache.set(session_id, context)
+        session_context = self._session_contexts.get(session_id)
+        if session_context is not None:
+            session_context.calculation_context = context
+        try:
+            await self._ensure_mongodb_connected()
+            # updated_at is left alone: the context is not a visible change to the session
+            await mongodb.get_collection("chat_sessions").update_one(
+                {"session_id": session_id},
+                {"$set": {"calculation_context": context}}
+            )
+        except Exception as e:
+            logger.warning(f"[CONTEXT] Could not persist context for session {session_id}: {e}")
+    
     def _perform_simple_calculation(self, user_message: str, session_id: str) -> Optional[str]:
         """Perform simple calculations without calling AI."""
         try:
@@ -364,66 +546,194 @@ class ChatService:
             logger.error(f"[CALCULATION] Error in simple calculation: {e}")
             return None
 
-    async def _generate_ai_response(self, session: ChatSession, user_message: str) -> str:
+    async def _generate_ai_response(self, session_context: SessionContext, user_message: str,
+                                    conversation_history: List[ChatMessage] = None) -> str:
         """Generate AI response for user message."""
+        request = await self._prepare_ai_request(session_context, user_message, conversation_history)
+        if "reply" in request:
+            return request["reply"]
+        return await self._complete_ai_request(request)
+    
+    async def _prepare_ai_request(self, session_context: SessionContext, user_message: str,
+                                  conversation_history: List[ChatMessage] = None) -> Dict[str, Any]:
+        """
+        Prepare the model request for a user message.
+        
+        Returns {"reply": str} when the message is answered without the model (calculations,
+        missing configuration, nothing found yet), otherwise a request dict with the chat
+        "messages", the "ai_settings" to use and the "fallback" reply for a failed call.
+        """
         try:
-            # Get conversation history for context (move this to the top)
-            conversation_history = session.messages if hasattr(session, 'messages') and session.messages else []
+            if conversation_history is None:
+                conversation_history = session_context.recent_messages
+            
+            # Context persisted by another instance (or before a cold start)
+            if session_context.calculation_context and session_context.session_id not in self.context_cache:
+                self.context_cache.set(session_context.session_id, dict(session_context.calculation_context))
 
             # Try simple calculation first
-            simple_result = self._perform_simple_calculation(user_message, session.session_id)
+            simple_result = self._perform_simple_calculation(user_message, session_context.session_id)
             if simple_result:
-                return simple_result
-            
-            # Rewrite query for better search if session_id is provided
-            rewritten_query = user_message
-            document_context = None
-            
-            if session.session_id:
-                # Get document context for smart rewriting
-                session_data = await mongodb.get_collection("chat_sessions").find_one({"session_id": session.session_id})
-                if session_data:
-                    uploaded_docs = session_data.get('uploaded_documents', [])
-                    crawl_tasks = session_data.get('crawl_tasks', [])
-                    
-                    # Get filenames for context
-                    filenames = []
-                    for doc_id in uploaded_docs:
-                        doc = await mongodb.get_collection("documents").find_one({"document_id": doc_id})
-                        if doc:
-                            filenames.append(doc.get('filename', ''))
-                    
-                    document_context = {"filenames": filenames}
-                
-                # Apply smart query rewriting
-                rewritten_query = self.prompt_manager.rewrite_generic_query(user_message, document_context)
-                
-                # Also apply existing query rewriting for conversation context
-                rewritten_query = self._rewrite_query_for_better_search(rewritten_query, session.session_id, conversation_history)
-                logger.info(f"[QUERY] Original: '{user_message}' -> Smart Rewritten: '{rewritten_query}'")
+                return {"reply": simple_result}
             
             # Get appropriate prompt based on user query using centralized PromptManager
             prompt = self.prompt_manager.get_prompt_for_query(user_message)
             
             # Check if session has documents
-            if session.crawl_tasks or session.uploaded_documents:
-                # Get documents for crawl tasks
-                documents = []
-                for task_id in session.crawl_tasks:
-                    task_documents = await self._get_documents_for_crawl_task(task_id)
-                    documents.extend(task_documents)
-                
-                # Generate document-based response with conversation history
-                return await self._generate_ai_document_response(
-                    user_message, documents, session.uploaded_documents, prompt, session.session_id, conversation_history
+            if session_context.crawl_tasks or session_context.uploaded_documents:
+                # Document-based response with conversation history
+                return await self._prepare_document_request(
+                    user_message, session_context.crawl_documents, session_context.uploaded_documents, prompt,
+                    session_context.session_id, conversation_history, session_context=session_context
                 )
             else:
-                # Generate general response with conversation history
-                return await self._generate_general_response(user_message, prompt, conversation_history)
+                # General response with conversation history
+                return self._prepare_general_request(user_message, prompt, conversation_history)
                 
         except Exception as e:
             logger.error(f"[AI] Error generating AI response: {e}")
-            return "I apologize, but I encountered an error while generating the response. Please try again."
+            return {"reply": "I apologize, but I encountered an error while generating the response. Please try again."}
+    
+    def _get_ai_settings(self) -> Dict[str, Any]:
+        """OpenAI settings from environment variables."""
+        return {
+            "api_key": os.environ.get('OPENAI_API_KEY'),
+            "model": os.environ.get('OPENAI_MODEL', 'gpt-4o-mini'),
+            "max_tokens": int(os.environ.get('OPENAI_MAX_TOKENS', '4000')),
+            "temperature": float(os.environ.get('OPENAI_TEMPERATURE', '0.1'))
+        }
+    
+    def _get_openai_client(self) -> AsyncOpenAI:
+        """Get the injected OpenAI client or the shared async client."""
+        client = self.openai_client or get_openai_client()
+        if client is None:
+            raise ChatError("OpenAI client not available - check OPENAI_API_KEY environment variable")
+        return client
+    
+    async def _complete_ai_request(self, request: Dict[str, Any]) -> str:
+        """Run a prepared request and return the whole answer."""
+        ai_settings = request["ai_settings"]
+        try:
+            logger.info(f"[AI] Making OpenAI request: model={ai_settings['model']}, max_tokens={ai_settings['max_tokens']}")
+            client = self._get_openai_client()
+            
+            response = await client.chat.completions.create(
+                model=ai_settings["model"],
+                messages=request["messages"],
+                max_tokens=ai_settings["max_tokens"],
+                temperature=ai_settings["temperature"]
+            )
+            
+            ai_response = response.choices[0].message.content.strip()
+            logger.info(f"[AI] OpenAI response received: {ai_response[:100]}...")
+            
+            # Extract and cache context from the response
+            if request.get("session_id"):
+                await self._extract_and_cache_context(request["user_message"], ai_response, request["session_id"])
+            await self._store_cached_answer(request, ai_response)
+            
+            return ai_response
+            
+        except Exception as e:
+            logger.error(f"[AI] Error making OpenAI request: {e}")
+            return request["fallback"]
+    
+    async def _stream_ai_request(self, request: Dict[str, Any]) -> AsyncIterator[str]:
+        """
+        Run a prepared request with stream=True and yield the answer as it is generated.
+        
+        A request that fails before any output yields the fallback reply; one that fails
+        mid-answer raises ChatError, and the partial answer is neither cached nor stored.
+        """
+        ai_settings = request["ai_settings"]
+        parts = []
+        try:
+            logger.info(f"[AI] Making streaming OpenAI request: model={ai_settings['model']}, max_tokens={ai_settings['max_tokens']}")
+            client = self._get_openai_client()
+            
+            stream = await client.chat.completions.create(
+                model=ai_settings["model"],
+                messages=request["messages"],
+                max_tokens=ai_settings["max_tokens"],
+                temperature=ai_settings["temperature"],
+                stream=True
+            )
+            
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+                    yield delta
+            
+        except Exception as e:
+            logger.error(f"[AI] Error streaming OpenAI response: {e}")
+            if parts:
+                # Part of the answer is already out: a truncated answer must not pass as complete
+                raise ChatError(f"OpenAI stream failed after {len(parts)} chunks: {e}") from e
+            yield request["fallback"]
+            return
+        
+        ai_response = "".join(parts).strip()
+        logger.info(f"[AI] OpenAI stream finished: {len(ai_response)} chars")
+        if request.get("session_id") and ai_response:
+            await self._extract_and_cache_context(request["user_message"], ai_response, request["session_id"])
+        await self._store_cached_answer(request, ai_response)
+    
+    async def _store_cached_answer(self, request: Dict[str, Any], ai_response: str):
+        """Put a generated answer into the answer cache when the request is cacheable."""
+        answer_cache = request.get("answer_cache")
+        if not answer_cache or not ai_response:
+            return
+        # While documents are being indexed the answer comes from a partial document set
+        try:
+            session_data = await mongodb.get_collection("chat_sessions").find_one(
+                {"session_id": answer_cache["session_id"]}, projection={"processing_status": 1}
+            )
+        except Exception as e:
+            logger.warning(f"[ANSWER_CACHE] Could not check processing status, not caching: {e}")
+            return
+        if session_data and session_data.get("processing_status") == "processing":
+            logger.info(f"[ANSWER_CACHE] Not caching answer for session {answer_cache['session_id']}: documents still processing")
+            return
+        await answer_cache_service.put(
+            answer_cache["key"], ai_response, answer_cache["query"], answer_cache["query_type"],
+            answer_cache["document_ids"], answer_cache["session_id"], answer_cache["user_id"]
+        )
+    
+    async def stream_ai_response(self, session_id: str, user_id: str,
+                                 user_message: str) -> AsyncIterator[str]:
+        """
+        Process a user message and yield the AI response as it is generated.
+        
+        The user message is stored before generation starts; the assistant message
+        is stored once the stream completes. Raises ChatError if the session is not found
+        or the stream breaks off mid-answer (nothing is stored for that turn).
+        """
+        session_context = await self.get_session_context(session_id, user_id)
+        if not session_context:
+            raise ChatError(f"Session not found: {session_id}")
+        # History as it was before this message
+        conversation_history = list(session_context.recent_messages)
+        
+        await self.add_message(session_id, user_id, MessageRole.USER, user_message)
+        
+        request = await self._prepare_ai_request(session_context, user_message, conversation_history)
+        if "reply" in request:
+            parts = [request["reply"]]
+            yield request["reply"]
+        else:
+            parts = []
+            async for delta in self._stream_ai_request(request):
+                parts.append(delta)
+                yield delta
+        
+        ai_response = "".join(parts).strip()
+        if ai_response:
+            await self.add_message(session_id, user_id, MessageRole.ASSISTANT, ai_response)
+        else:
+            logger.error(f"[CHAT] No AI response generated for session: {session_id}")
     
     async def _get_documents_for_crawl_task(self, task_id: str) -> List:
         """Get documents for a specific crawl task."""
@@ -436,8 +746,17 @@ class ChatService:
             logger.error(f"[AI] Error getting documents for task {task_id}: {e}")
             return []
     
-    async def _generate_ai_document_response(self, user_message: str, documents: List, uploaded_document_ids: List[str], prompt: str, session_id: str = None, conversation_history: List = None) -> str:
+    async def _generate_ai_document_response(self, user_message: str, documents: List, uploaded_document_ids: List[str], prompt: str, session_id: str = None, conversation_history: List = None, session_context: Optional[SessionContext] = None) -> str:
         """Generate AI response based on document content using OpenAI and vector search with caching."""
+        request = await self._prepare_document_request(
+            user_message, documents, uploaded_document_ids, prompt, session_id, conversation_history, session_context=session_context
+        )
+        if "reply" in request:
+            return request["reply"]
+        return await self._complete_ai_request(request)
+    
+    async def _prepare_document_request(self, user_message: str, documents: List, uploaded_document_ids: List[str], prompt: str, session_id: str = None, conversation_history: List = None, session_context: Optional[SessionContext] = None) -> Dict[str, Any]:
+        """Search the session's documents and build the model request for a document-based answer."""
         try:
             logger.info(f"[AI] Generating document response for {len(documents)} crawl documents and {len(uploaded_document_ids)} uploaded documents")
             
@@ -453,18 +772,16 @@ class ChatService:
             
             if session_id:
                 # Get document context for smart rewriting
-                session_data = await mongodb.get_collection("chat_sessions").find_one({"session_id": session_id})
-                if session_data:
-                    uploaded_docs = session_data.get('uploaded_documents', [])
-                    crawl_tasks = session_data.get('crawl_tasks', [])
-                    
-                    # Get filenames for context
+                if session_context:
+                    document_context = {"filenames": session_context.filenames}
+                elif uploaded_document_ids:
                     filenames = []
-                    for doc_id in uploaded_docs:
-                        doc = await mongodb.get_collection("documents").find_one({"document_id": doc_id})
-                        if doc:
-                            filenames.append(doc.get('filename', ''))
-                    
+                    cursor = mongodb.get_collection("documents").find(
+                        {"document_id": {"$in": uploaded_document_ids}},
+                        projection={"_id": 0, "filename": 1}
+                    )
+                    async for doc in cursor:
+                        filenames.append(doc.get('filename', ''))
                     document_context = {"filenames": filenames}
                 
                 # Apply smart query rewriting
@@ -474,33 +791,58 @@ class ChatService:
                 rewritten_query = self._rewrite_query_for_better_search(rewritten_query, session_id, conversation_history)
                 logger.info(f"[QUERY] Original: '{user_message}' -> Smart Rewritten: '{rewritten_query}'")
             
+            # Prepare conversation history for context
+            conversation_context = ""
+            if conversation_history and len(conversation_history) > 0:
+                # Get last 5 messages for context (to avoid token limits)
+                recent_messages = conversation_history[-5:]
+                conversation_parts = []
+                for msg in recent_messages:
+                    role = "User" if msg.role == MessageRole.USER else "Assistant"
+                    conversation_parts.append(f"{role}: {msg.content}")
+                conversation_context = "\n\n".join(conversation_parts)
+                logger.info(f"[AI] Including conversation history: {len(recent_messages)} recent messages")
+            
+            # The same question over the same documents and conversation reuses the earlier answer
+            answer_cache = None
+            query_type = self.prompt_manager.detect_query_type(user_message)
+            if session_context and answer_cache_service.is_cacheable(query_type):
+                answer_cache = {
+                    "key": answer_cache_service.make_key(rewritten_query, all_document_ids, query_type, conversation_context),
+                    "query": rewritten_query,
+                    "query_type": query_type,
+                    "document_ids": all_document_ids,
+                    "session_id": session_context.session_id,
+                    "user_id": session_context.user_id
+                }
+                cached_answer = await answer_cache_service.get(answer_cache["key"])
+                if cached_answer:
+                    logger.info(f"[ANSWER_CACHE] Hit for '{rewritten_query}' ({query_type})")
+                    await self._extract_and_cache_context(user_message, cached_answer, session_id)
+                    return {"reply": cached_answer}
+            
             # Search for similar chunks using vector store with better filtering
             # Use lower threshold to ensure we get relevant content for detailed questions
             base_threshold = 0.5 if any(keyword in user_message.lower() for keyword in ['salary', 'calculate', 'take home', 'gross', 'net']) else 0.2
             
-            # Try with different score thresholds if no results found
+            # One search at the lowest threshold; the stricter thresholds are applied locally
             score_thresholds = [base_threshold, 0.15, 0.1, 0.05]
-            similar_chunks = []
-            
-            for threshold in score_thresholds:
-                logger.info(f"[AI] Trying search with score threshold: {threshold}")
-                search_results = await document_processing_service.search_documents(
-                    query=rewritten_query,
-                    max_results=15,
-                    score_threshold=threshold,
-                    session_id=session_id
-                )
-                similar_chunks = search_results.get("results", [])
-                
-                if similar_chunks:
-                    logger.info(f"[AI] Found {len(similar_chunks)} chunks with threshold {threshold}")
-                    break
-                else:
-                    logger.info(f"[AI] No results with threshold {threshold}")
+            search_results = await document_processing_service.search_documents_with_thresholds(
+                query=rewritten_query,
+                score_thresholds=score_thresholds,
+                max_results=15,
+                session_id=session_id
+            )
+            similar_chunks = search_results.get("results", [])
+            
+            if similar_chunks:
+                logger.info(f"[AI] Found {len(similar_chunks)} chunks with threshold {search_results.get('score_threshold')}")
+            else:
+                logger.info(f"[AI] No results with thresholds {score_thresholds}")
             
             if not similar_chunks:
                 logger.warning(f"[AI] No similar chunks found in session {session_id} - trying fallback search")
-                logger.info(f"[AI] Session vector store: {vector_store_id if 'vector_store_id' in locals() else 'Not set'}")
+                logger.info(f"[AI] Session vector store: {(session_context.vector_store_id if session_context else None) or 'Not set'}")
                 logger.info(f"[AI] Search query: '{rewritten_query}'")
                 logger.info(f"[AI] Tried thresholds: {score_thresholds}")
                 
@@ -525,17 +867,23 @@ class ChatService:
                 
                 logger.info(f"[AI] Trying fallback queries: {fallback_queries}")
                 
-                # Try fallback queries with very low threshold
-                for fallback_query in fallback_queries:
-                    logger.info(f"[AI] Trying fallback query: '{fallback_query}'")
-                    search_results = await document_processing_service.search_documents(
+                # Run all fallback queries concurrently with a very low threshold,
+                # then take the first query (in priority order) that found anything
+                fallback_results = await asyncio.gather(*[
+                    document_processing_service.search_documents(
                         query=fallback_query,
                         max_results=10,
                         score_threshold=0.01,  # Very low threshold for fallback
                         session_id=session_id
                     )
+                    for fallback_query in fallback_queries
+                ], return_exceptions=True)
+                
+                for fallback_query, search_results in zip(fallback_queries, fallback_results):
+                    if isinstance(search_results, Exception):
+                        logger.warning(f"[AI] Fallback query '{fallback_query}' failed: {search_results}")
+                        continue
                     similar_chunks = search_results.get("results", [])
-                    
                     if similar_chunks:
                         logger.info(f"[AI] Found {len(similar_chunks)} chunks with fallback query: '{fallback_query}'")
                         break
@@ -544,19 +892,20 @@ class ChatService:
                 if not similar_chunks:
                     try:
                         files_ready = False
-                        if 'vector_store_id' in locals() and vector_store_id:
-                            files = await VectorStoreService.list_vector_store_files(vector_store_id)
+                        vector_store_id = session_context.vector_store_id if session_context else None
+                        if vector_store_id:
+                            files = await vector_store_service.list_vector_store_files(vector_store_id)
                             logger.info(f"[AI] Files in vector store: {len(files)}")
                             files_ready = all(file.get('status') == 'completed' for file in files) and len(files) > 0
                             for file in files:
                                 logger.info(f"[AI] File: {file.get('filename', 'Unknown')} - ID: {file.get('id', 'Unknown')} - Status: {file.get('status', 'Unknown')}")
                         if not files_ready:
-                            return "I'm still processing the document embeddings. The file has been uploaded but the embeddings are being created in the background. Please wait a moment and try your question again. This usually takes 30-60 seconds."
+                            return {"reply": "I'm still processing the document embeddings. The file has been uploaded but the embeddings are being created in the background. Please wait a moment and try your question again. This usually takes 30-60 seconds."}
                         else:
-                            return "No relevant content found in your documents for this query. Try asking about a specific topic or keyword from your documents."
+                            return {"reply": "No relevant content found in your documents for this query. Try asking about a specific topic or keyword from your documents."}
                     except Exception as e:
                         logger.error(f"[AI] Error listing vector store files: {e}")
-                        return "I'm still processing the document embeddings. The file has been uploaded but the embeddings are being created in the background. Please wait a moment and try your question again. This usually takes 30-60 seconds."
+                        return {"reply": "I'm still processing the document embeddings. The file has been uploaded but the embeddings are being created in the background. Please wait a moment and try your question again. This usually takes 30-60 seconds."}
             
             # Log all retrieved chunks for debugging
             logger.info(f"[AI] Retrieved {len(similar_chunks)} chunks for query: '{user_message}'")
@@ -589,18 +938,6 @@ class ChatService:
             context = "\n\n".join(context_parts)
             logger.info(f"[AI] Found {len(similar_chunks)} relevant chunks")
             
-            # Prepare conversation history for context
-            conversation_context = ""
-            if conversation_history and len(conversation_history) > 0:
-                # Get last 5 messages for context (to avoid token limits)
-                recent_messages = conversation_history[-5:]
-                conversation_parts = []
-                for msg in recent_messages:
-                    role = "User" if msg.role == MessageRole.USER else "Assistant"
-                    conversation_parts.append(f"{role}: {msg.content}")
-                conversation_context = "\n\n".join(conversation_parts)
-                logger.info(f"[AI] Including conversation history: {len(recent_messages)} recent messages")
-            
             # Create final prompt using the provided prompt from PromptManager
             final_prompt = f"""{prompt}
 
@@ -622,74 +959,44 @@ Please provide your response based on the document content above. If this is a f
             
             logger.info(f"[AI] Final prompt length: {len(final_prompt)}")
             
-            # Load AI config
-            import os
-            
-            # Get configuration from environment variables
-            openai_api_key = os.environ.get('OPENAI_API_KEY')
-            model = os.environ.get('OPENAI_MODEL', 'gpt-4o-mini')
-            max_tokens = int(os.environ.get('OPENAI_MAX_TOKENS', '4000'))
-            temperature = float(os.environ.get('OPENAI_TEMPERATURE', '0.1'))
-            
-            if not openai_api_key:
+            ai_settings = self._get_ai_settings()
+            if not ai_settings["api_key"]:
                 logger.error("[AI] OPENAI_API_KEY environment variable not found")
-                return "I apologize, but the AI configuration is not properly set up. Please contact support."
+                return {"reply": "I apologize, but the AI configuration is not properly set up. Please contact support."}
             
-            logger.info(f"[AI] Using AI config: model={model}, max_tokens={max_tokens}, temperature={temperature}")
+            logger.info(f"[AI] Using AI config: model={ai_settings['model']}, max_tokens={ai_settings['max_tokens']}, temperature={ai_settings['temperature']}")
             
-            # Make AI request
-            try:
-                import openai
-                
-                logger.info(f"[AI] Making OpenAI request: model={model}, max_tokens={max_tokens}")
-                
-                if not openai_api_key:
-                    logger.error("[AI] OpenAI API key not configured")
-                    return "I apologize, but the OpenAI API key is not configured. Please contact support."
-                
-                client = openai.OpenAI(api_key=openai_api_key)
-                
-                response = client.chat.completions.create(
-                    model=model,
-                    messages=[
-                        {"role": "system", "content": "You are a helpful AI assistant that analyzes documents and responds to user questions. Follow the specific instructions provided in the user prompt carefully. Provide detailed, comprehensive answers based on the document content. Include specific facts, dates, numbers, and explanations from the documents. When responding to follow-up questions, maintain conversation continuity and reference previous context appropriately."},
-                        {"role": "user", "content": final_prompt}
-                    ],
-                    max_tokens=max_tokens,
-                    temperature=temperature
-                )
-                
-                ai_response = response.choices[0].message.content.strip()
-                logger.info(f"[AI] OpenAI response received: {ai_response[:100]}...")
-                
-                # Extract and cache context from the response
-                if session_id:
-                    self._extract_and_cache_context(user_message, ai_response, session_id)
-                
-                return ai_response
-                
-            except Exception as e:
-                logger.error(f"[AI] Error making OpenAI request: {e}")
-                return "I apologize, but I encountered an error while generating the AI response. Please try again."
+            return {
+                "messages": [
+                    {"role": "system", "content": "You are a helpful AI assistant that analyzes documents and responds to user questions. Follow the specific instructions provided in the user prompt carefully. Provide detailed, comprehensive answers based on the document content. Include specific facts, dates, numbers, and explanations from the documents. When responding to follow-up questions, maintain conversation continuity and reference previous context appropriately."},
+                    {"role": "user", "content": final_prompt}
+                ],
+                "ai_settings": ai_settings,
+                "fallback": "I apologize, but I encountered an error while generating the AI response. Please try again.",
+                "session_id": session_id,
+                "user_message": user_message,
+                "answer_cache": answer_cache
+            }
                 
         except Exception as e:
             logger.error(f"[AI] Error generating AI document response: {e}")
-            return "I apologize, but I encountered an error while analyzing the documents. Please try again."
+            return {"reply": "I apologize, but I encountered an error while analyzing the documents. Please try again."}
     
     async def _generate_general_response(self, user_message: str, prompt: str, conversation_history: List = None) -> str:
         """Generate general response when no documents are available."""
+        request = self._prepare_general_request(user_message, prompt, conversation_history)
+        if "reply" in request:
+            return request["reply"]
+        return await self._complete_ai_request(request)
+    
+    def _prepare_general_request(self, user_message: str, prompt: str, conversation_history: List = None) -> Dict[str, Any]:
+        """Build the model request for a general response when no documents are available."""
+        no_documents_reply = "I don't see any documents linked to this session. To help you with document analysis, please upload or link documents first."
         try:
-            # Load AI config from environment variables
-            import os
-            
-            openai_api_key = os.environ.get('OPENAI_API_KEY')
-            model = os.environ.get('OPENAI_MODEL', 'gpt-4o-mini')
-            max_tokens = int(os.environ.get('OPENAI_MAX_TOKENS', '4000'))
-            temperature = float(os.environ.get('OPENAI_TEMPERATURE', '0.1'))
-            
-            if not openai_api_key:
+            ai_settings = self._get_ai_settings()
+            if not ai_settings["api_key"]:
                 logger.error("OPENAI_API_KEY environment variable not found")
-                return "I don't see any documents linked to this session. To help you with document analysis, please upload or link documents first."
+                return {"reply": no_documents_reply}
             
             # Prepare conversation history for context
             conversation_context = ""
@@ -721,31 +1028,18 @@ Current user question: {user_message}
 
 Please provide a helpful response:"""
             
-            # Make AI request
-            try:
-                import openai
-                client = openai.OpenAI(api_key=openai_api_key)
-                
-                response = client.chat.completions.create(
-                    model=model,
-                    messages=[
-                        {"role": "system", "content": "You are a helpful AI assistant. When no documents are available, guide users on how to upload or link documents for analysis. When responding to follow-up questions, maintain conversation continuity and reference previous context appropriately."},
-                        {"role": "user", "content": general_prompt}
-                    ],
-                    max_tokens=max_tokens,
-                    temperature=temperature
-                )
-                
-                ai_response = response.choices[0].message.content.strip()
-                return ai_response
-                
-            except Exception as e:
-                logger.error(f"Error making OpenAI request for general response: {e}")
-                return "I don't see any documents linked to this session. To help you with document analysis, please upload or link documents first."
+            return {
+                "messages": [
+                    {"role": "system", "content": "You are a helpful AI assistant. When no documents are available, guide users on how to upload or link documents for analysis. When responding to follow-up questions, maintain conversation continuity and reference previous context appropriately."},
+                    {"role": "user", "content": general_prompt}
+                ],
+                "ai_settings": ai_settings,
+                "fallback": no_documents_reply
+            }
                 
         except Exception as e:
             logger.error(f"Error generating general response: {e}")
-            return "I don't see any documents linked to this session. To help you with document analysis, please upload or link documents first."
+            return {"reply": no_documents_reply}
     
     async def get_session_document_count(self, session_id: str, user_id: str) -> int:
         """Get the number of documents linked to a session."""
@@ -778,6 +1072,8 @@ Please provide a helpful response:"""
                 }
             )
             
+            self.invalidate_session_context(session_id)
+            await answer_cache_service.invalidate_session(session_id)
             logger.info(f"Linked {len(documents)} documents to session {session_id}")
             
             # Add immediate feedback message with better tracking
@@ -798,7 +1094,11 @@ Please provide a helpful response:"""
             
             # Create embeddings for the documents - run synchronously to ensure completion
             # This ensures the completion message is added before Lambda terminates
-            await self._create_embeddings_for_documents(documents, session_id)
+            try:
+                await self._create_embeddings_for_documents(documents, session_id)
+            finally:
+                # Answers cached while the documents were being indexed only saw part of them
+                await answer_cache_service.invalidate_session(session_id)
             
             return documents
             
@@ -961,6 +1261,8 @@ Please provide a helpful response:"""
                 }
             )
             
+            self.invalidate_session_context(session_id)
+            await answer_cache_service.invalidate_session(session_id)
             logger.info(f"Linked uploaded document {document.document_id} to session {session_id}")
             
             # Add immediate feedback message
@@ -969,7 +1271,11 @@ Please provide a helpful response:"""
             
             # Create embeddings for the document - run synchronously to ensure completion
             # This ensures the completion message is added before Lambda terminates
-            await self._create_embeddings_for_uploaded_document(document, session_id)
+            try:
+                await self._create_embeddings_for_uploaded_document(document, session_id)
+            finally:
+                # Answers cached while the document was being indexed did not include it
+                await answer_cache_service.invalidate_session(session_id)
             
             return True
             
@@ -6,27 +6,114 @@ Provides advanced document processing, chunking, and vector store management.
 import logging
 import json
 import os
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, Optional, Tuple, Union
 from datetime import datetime
 import uuid
 import asyncio
 from pathlib import Path
 import re
 import hashlib
+import time
+from collections import OrderedDict
 
-from common.src.services.vector_store_service import vector_store_service
+from openai import AsyncOpenAI
+
+from common.src.services.vector_store_service import VectorStoreService, vector_store_service
 from common.src.services.s3_upload_service import s3_upload_service
+from common.src.services.answer_cache_service import answer_cache_service
+from common.src.services.keyword_index_service import keyword_index_service
+from common.src.services.pdf_extraction_router import pdf_extraction_router, textract_available
+from common.src.services.extraction_executor import extraction_executor
 from common.src.models.documents import DocumentType
 from common.src.core.database import mongodb
+from common.src.core.config import config
+from common.src.utils.bm25 import reciprocal_rank_fusion
+from common.src.utils.document_text import pdfminer_text
 
 logger = logging.getLogger(__name__)
 
+# The vector store search API returns at most 50 results
+MAX_SEARCH_RESULTS = 50
+# Threshold-ladder searches fetch this many times more candidates than they return
+LADDER_RESULT_MULTIPLIER = 3
+# Characters of normalized chunk text used to match hits across retrievers
+MATCH_PROBE_CHARS = 80
+
+
+def _result_text(result: Dict[str, Any]) -> str:
+    """Chunk text of a search hit, lowercased with whitespace collapsed."""
+    content = result.get('content') or []
+    text = " ".join(part.get('text', '') for part in content if isinstance(part, dict))
+    return " ".join(text.lower().split())
+
+
+def _result_key(result: Dict[str, Any]) -> Tuple[Optional[str], Any]:
+    """Identity of a search hit within one retriever: its file and chunk index, or its text prefix."""
+    if result.get('chunk_index') is not None:
+        return result.get('file_id'), result['chunk_index']
+    return result.get('file_id'), _result_text(result)[:MATCH_PROBE_CHARS]
+
+
+def _shares_text(text: str, other: str) -> bool:
+    """
+    Whether two chunks of one file overlap.
+    
+    Retrievers cut chunks at different places, so the chunks are compared by
+    the start, middle and end of each one appearing in the other.
+    """
+    for probed, target in ((text, other), (other, text)):
+        if len(probed) <= MATCH_PROBE_CHARS:
+            probes = [probed] if probed else []
+        else:
+            middle = (len(probed) - MATCH_PROBE_CHARS) // 2
+            probes = [probed[:MATCH_PROBE_CHARS], probed[middle:middle + MATCH_PROBE_CHARS], probed[-MATCH_PROBE_CHARS:]]
+        if any(probe in target for probe in probes):
+            return True
+    return False
+
+
+class FileMetadataCache:
+    """Small LRU of processed_documents records keyed by vector store file id."""
+    
+    def __init__(self, max_size: int = 512, ttl_seconds: float = 300.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+    
+    def get_many(self, file_ids) -> Dict[str, Dict[str, Any]]:
+        """Return the cached records for the given file ids (misses are omitted)."""
+        now = time.monotonic()
+        found = {}
+        for file_id in file_ids:
+            entry = self._entries.get(file_id)
+            if entry is None:
+                continue
+            if now - entry[0] > self.ttl_seconds:
+                del self._entries[file_id]
+                continue
+            self._entries.move_to_end(file_id)
+            found[file_id] = entry[1]
+        return found
+    
+    def put(self, file_id: str, record: Dict[str, Any]):
+        self._entries[file_id] = (time.monotonic(), record)
+        self._entries.move_to_end(file_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+    
+    def invalidate(self, file_id: str):
+        self._entries.pop(file_id, None)
+
+
 class DocumentProcessingService:
     """Enhanced service for processing documents with vector store integration."""
     
-    def __init__(self):
+    def __init__(self, openai_client: Optional[AsyncOpenAI] = None):
         self.storage_service = s3_upload_service
+        # Vector store calls go through the shared service unless a client is injected
+        self.vector_store = VectorStoreService(client=openai_client) if openai_client else vector_store_service
         self.vector_store_id = None
+        self.metadata_cache = FileMetadataCache()
         
     async def process_document_with_vector_store(
         self, 
@@ -34,9 +121,15 @@ class DocumentProcessingService:
         content: str, 
         filename: str,
         metadata: Optional[Dict[str, Any]] = None,
-        session_id: Optional[str] = None
+        session_id: Optional[str] = None,
+        paragraphs: Optional[List[Dict[str, Any]]] = None
     ) -> Dict[str, Any]:
-        """Process a document and store it in the vector store with enhanced metadata and deduplication."""
+        """
+        Process a document and store it in the vector store with enhanced metadata and deduplication.
+        
+        ``paragraphs`` (Textract paragraphs with page numbers that ``content`` was joined
+        from) are chunked instead of the flat text by the local vector store backend.
+        """
         try:
             logger.info(f"[DOC_PROCESSING] Processing document: {filename}")
             
@@ -107,25 +200,38 @@ class DocumentProcessingService:
             # Get session-specific vector store if session_id is provided
             vector_store_id = None
             if session_id:
-                vector_store_id = await vector_store_service.get_or_create_session_vector_store(session_id)
+                vector_store_id = await self.vector_store.get_or_create_session_vector_store(session_id)
                 logger.info(f"[DOC_PROCESSING] Using session-specific vector store: {vector_store_id}")
             
             # Log a preview of the extracted content
             logger.info(f"[DOC_PROCESSING] Content preview for {filename}: {content[:500].replace(chr(10), ' ').replace(chr(13), ' ')}")
             
             # Upload to vector store
-            file_id = await vector_store_service.upload_text_to_vector_store(
+            file_id = await self.vector_store.upload_text_to_vector_store(
                 text=content,
                 filename=filename,
-                vector_store_id=vector_store_id
+                vector_store_id=vector_store_id,
+                attributes=attributes,
+                paragraphs=paragraphs
             )
             
+            # Keyword index for exact figures, dates and names the embeddings miss
+            if session_id and config.hybrid_search_enabled:
+                await keyword_index_service.index_document(
+                    session_id=session_id,
+                    document_id=document_id,
+                    file_id=file_id,
+                    filename=filename,
+                    content=content,
+                    attributes=attributes
+                )
+            
             # Store document metadata in MongoDB
             document_metadata = {
                 "id": document_id,
                 "filename": filename,
                 "vector_store_file_id": file_id,
-                "vector_store_id": vector_store_service.vector_store_id,
+                "vector_store_id": self.vector_store.vector_store_id,
                 "content_hash": content_hash,
                 "is_duplicate": False,
                 "attributes": attributes,
@@ -146,7 +252,7 @@ class DocumentProcessingService:
             return {
                 "document_id": document_id,
                 "vector_store_file_id": file_id,
-                "vector_store_id": vector_store_service.vector_store_id,
+                "vector_store_id": self.vector_store.vector_store_id,
                 "status": "success",
                 "content_hash": content_hash
             }
@@ -271,19 +377,23 @@ class DocumentProcessingService:
             # Get session-specific vector store if session_id is provided
             vector_store_id = None
             if session_id:
-                vector_store_id = await vector_store_service.get_or_create_session_vector_store(session_id)
+                vector_store_id = await self.vector_store.get_or_create_session_vector_store(session_id)
                 logger.info(f"[DOC_PROCESSING] Searching in session-specific vector store: {vector_store_id}")
             
-            # Perform search
-            search_results = await vector_store_service.search_vector_store(
-                query=query,
-                max_results=max_results,
-                score_threshold=score_threshold,
-                vector_store_id=vector_store_id
+            # Perform vector and keyword search concurrently
+            search_results, keyword_results = await asyncio.gather(
+                self.vector_store.search_vector_store(
+                    query=query,
+                    max_results=max_results,
+                    score_threshold=score_threshold,
+                    vector_store_id=vector_store_id
+                ),
+                self._keyword_search(query, max_results, session_id)
             )
+            results = self._fuse_results(search_results["results"], keyword_results, max_results)
             
             # Enhance results with additional metadata
-            enhanced_results = await self._enhance_search_results(search_results["results"])
+            enhanced_results = await self._enhance_search_results(results)
             
             return {
                 "results": enhanced_results,
@@ -296,23 +406,141 @@ class DocumentProcessingService:
             logger.error(f"[DOC_PROCESSING] Error searching documents: {e}")
             raise
     
-
+    async def search_documents_with_thresholds(
+        self, 
+        query: str,
+        score_thresholds: List[float],
+        max_results: int = 10,
+        session_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Search once and apply a score threshold ladder locally.
+        
+        Runs a single vector search at the lowest threshold with a larger result
+        window, then walks the thresholds in the given order and keeps the hits of
+        the first threshold that matches anything. The kept hits are fused with
+        the session's keyword hits, and only the fused results are enriched from
+        MongoDB.
+        """
+        try:
+            logger.info(f"[DOC_PROCESSING] Searching documents for: {query[:50]}... (thresholds {score_thresholds})")
+            
+            vector_store_id = None
+            if session_id:
+                vector_store_id = await self.vector_store.get_or_create_session_vector_store(session_id)
+            
+            search_results, keyword_results = await asyncio.gather(
+                self.vector_store.search_vector_store(
+                    query=query,
+                    max_results=min(MAX_SEARCH_RESULTS, max_results * LADDER_RESULT_MULTIPLIER),
+                    score_threshold=min(score_thresholds),
+                    vector_store_id=vector_store_id
+                ),
+                self._keyword_search(query, max_results, session_id)
+            )
+            candidates = search_results["results"]
+            
+            matched_threshold = None
+            selected = []
+            for threshold in score_thresholds:
+                selected = [result for result in candidates if (result.get('score') or 0) >= threshold]
+                if selected:
+                    matched_threshold = threshold
+                    break
+            selected = selected[:max_results]
+            
+            if matched_threshold is not None:
+                logger.info(f"[DOC_PROCESSING] {len(selected)} of {len(candidates)} results pass threshold {matched_threshold}")
+            
+            selected = self._fuse_results(selected, keyword_results, max_results)
+            enhanced_results = await self._enhance_search_results(selected)
+            
+            return {
+                "results": enhanced_results,
+                "search_query": search_results["search_query"],
+                "has_more": search_results["has_more"],
+                "total_results": len(enhanced_results),
+                "score_threshold": matched_threshold
+            }
+            
+        except Exception as e:
+            logger.error(f"[DOC_PROCESSING] Error searching documents: {e}")
+            raise
+    
+    async def _keyword_search(self, query: str, max_results: int, session_id: Optional[str]) -> List[Dict[str, Any]]:
+        """BM25 hits from the session's keyword index (empty without a session)."""
+        if not session_id or not config.hybrid_search_enabled:
+            return []
+        return await keyword_index_service.search(session_id, query, max_results)
+    
+    def _fuse_results(
+        self,
+        vector_results: List[Dict[str, Any]],
+        keyword_results: List[Dict[str, Any]],
+        max_results: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Merge vector and keyword hits with reciprocal-rank fusion.
+        
+        Hits found by both retrievers rise to the top. Keyword-only hits get a
+        ``score`` of their BM25 score relative to the best keyword hit so that
+        downstream score handling keeps working.
+        """
+        if not keyword_results:
+            return vector_results[:max_results]
+        
+        # A keyword hit is the same hit as the vector hit of its file whose chunk overlaps it
+        vector_hits = [(_result_key(result), result.get('file_id'), _result_text(result)) for result in vector_results]
+        keys = {}
+        for result in keyword_results:
+            text = _result_text(result)
+            for key, file_id, vector_text in vector_hits:
+                if file_id == result.get('file_id') and _shares_text(text, vector_text):
+                    keys[id(result)] = key
+                    break
+        
+        top_bm25 = keyword_results[0]['bm25_score'] or 1.0
+        fused_results = []
+        for result, fusion_score, sources in reciprocal_rank_fusion(
+            [vector_results, keyword_results], key=lambda result: keys.get(id(result)) or _result_key(result), k=config.rrf_k
+        )[:max_results]:
+            result = dict(result)
+            if sources == [1]:
+                result['score'] = round(result['bm25_score'] / top_bm25, 4)
+                result['retrieval'] = "keyword"
+            else:
+                result['retrieval'] = "hybrid" if len(sources) > 1 else "vector"
+            result['fusion_score'] = round(fusion_score, 6)
+            fused_results.append(result)
+        
+        hybrid_count = sum(1 for result in fused_results if result['retrieval'] == "hybrid")
+        logger.info(f"[DOC_PROCESSING] Fused {len(vector_results)} vector and {len(keyword_results)} keyword hits "
+                    f"into {len(fused_results)} results ({hybrid_count} found by both)")
+        return fused_results
     
     async def _enhance_search_results(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Enhance search results with additional metadata from MongoDB."""
         try:
-            enhanced_results = []
+            file_ids = {result.get('file_id') for result in results if result.get('file_id')}
+            metadata_by_file = self.metadata_cache.get_many(file_ids)
+            
+            # One $in query for every file id not in the cache
+            missing = list(file_ids - metadata_by_file.keys())
+            if missing:
+                collection = mongodb.get_collection('processed_documents')
+                cursor = collection.find({"vector_store_file_id": {"$in": missing}}).sort("_id", 1)
+                async for doc_metadata in cursor:
+                    file_id = doc_metadata.get('vector_store_file_id')
+                    # Keep the first (original) record when duplicates share a file id
+                    if file_id not in metadata_by_file:
+                        metadata_by_file[file_id] = doc_metadata
+                        self.metadata_cache.put(file_id, doc_metadata)
             
+            enhanced_results = []
             for result in results:
-                # Get additional metadata from MongoDB if available
-                file_id = result.get('file_id')
-                if file_id:
-                    collection = mongodb.get_collection('processed_documents')
-                    doc_metadata = await collection.find_one({"vector_store_file_id": file_id})
-                    
-                    if doc_metadata:
-                        result['document_metadata'] = doc_metadata
-                
+                doc_metadata = metadata_by_file.get(result.get('file_id'))
+                if doc_metadata:
+                    result['document_metadata'] = dict(doc_metadata)
                 enhanced_results.append(result)
             
             return enhanced_results
@@ -338,7 +566,7 @@ class DocumentProcessingService:
                 return "No relevant documents found to generate a summary."
             
             # Synthesize response
-            summary = await vector_store_service.synthesize_response(
+            summary = await self.vector_store.synthesize_response(
                 query=query,
                 search_results=search_results["results"]
             )
@@ -383,10 +611,13 @@ class DocumentProcessingService:
             # Delete from vector store
             vector_store_file_id = doc_metadata.get('vector_store_file_id')
             if vector_store_file_id:
-                await vector_store_service.delete_vector_store_file(vector_store_file_id)
+                await self.vector_store.delete_vector_store_file(vector_store_file_id)
+                self.metadata_cache.invalidate(vector_store_file_id)
             
             # Delete from MongoDB
             await collection.delete_one({"id": document_id})
+            await answer_cache_service.invalidate_document(document_id)
+            await keyword_index_service.remove_document(document_id)
             
             logger.info(f"[DOC_PROCESSING] Successfully deleted document: {document_id}")
             return True
@@ -399,10 +630,10 @@ class DocumentProcessingService:
         """Get statistics about the vector store."""
         try:
             # Get vector store info
-            store_info = await vector_store_service.get_vector_store_info()
+            store_info = await self.vector_store.get_vector_store_info()
             
             # Get file count
-            files = await vector_store_service.list_vector_store_files()
+            files = await self.vector_store.list_vector_store_files()
             
             # Get document count from MongoDB
             collection = mongodb.get_collection('processed_documents')
@@ -446,11 +677,25 @@ class DocumentProcessingService:
             logger.info(f"[DOC_PROCESSING] Processing document with preprocessing: {filename}")
             
             # Step 1: Extract text content using appropriate method
-            text_content = await self._extract_text_with_aws_textract(file_content, filename)
+            processing_type = "aws_textract_with_fallback"
+            page_routing = None
+            paragraphs = None
+            if self._get_document_type(filename) == 'pdf':
+                # Text layer first; only pages without a usable text layer go to OCR
+                extraction = await pdf_extraction_router.extract(file_content, filename)
+                text_content = extraction["text"]
+                if text_content:
+                    processing_type = f"pdf_{extraction['method'].replace('+', '_')}"
+                    page_routing = extraction["pages"]
+                elif not extraction["page_count"]:
+                    # Unreadable for PyPDF2 (damaged or encrypted); Textract may still manage
+                    text_content, paragraphs = await self._extract_with_aws_textract(file_content, filename)
+            else:
+                text_content, paragraphs = await self._extract_with_aws_textract(file_content, filename)
             
             if not text_content:
                 # Fallback to local text extraction
-                text_content = self._extract_text_from_file(file_content, filename)
+                text_content = await self._extract_text_from_file(file_content, filename)
             
             if not text_content:
                 return {
@@ -464,7 +709,7 @@ class DocumentProcessingService:
                 
                 # Prepare metadata
                 processing_metadata = {
-                    "processing_type": "aws_textract_with_fallback",
+                    "processing_type": processing_type,
                     "document_type": self._get_document_type(filename),
                     "user_id": user_id
                 }
@@ -478,7 +723,8 @@ class DocumentProcessingService:
                     content=text_content,
                     filename=filename,
                     metadata=processing_metadata,
-                    session_id=session_id
+                    session_id=session_id,
+                    paragraphs=paragraphs
                 )
                 
                 # Combine results
@@ -487,7 +733,8 @@ class DocumentProcessingService:
                     "preprocessing": {
                         "status": "success",
                         "text_content": text_content,
-                        "processing_type": "aws_textract_with_fallback"
+                        "processing_type": processing_type,
+                        "pages": page_routing
                     },
                     "vector_store": vector_result,
                     "document_id": document_id,
@@ -499,7 +746,7 @@ class DocumentProcessingService:
                     "status": "success",
                     "preprocessing": {
                         "status": "no_text_extracted",
-                        "processing_type": "aws_textract_with_fallback"
+                        "processing_type": processing_type
                     },
                     "vector_store": None,
                     "message": "Document preprocessed but no text content for vector store",
@@ -551,7 +798,7 @@ class DocumentProcessingService:
                 "extraction_method": "none"
             }
 
-    def _extract_text_from_file(self, file_content: bytes, filename: str) -> str:
+    async def _extract_text_from_file(self, file_content: bytes, filename: str) -> str:
         """Extract text from file content using appropriate method based on file type."""
         try:
             import os
@@ -560,7 +807,7 @@ class DocumentProcessingService:
             # For PDF files, use proper PDF text extraction
             if ext == '.pdf':
                 logger.info(f"[DOC_PROCESSING] Extracting text from PDF: {filename}")
-                return self._extract_text_from_pdf(file_content, filename)
+                return await self._extract_text_from_pdf(file_content, filename)
             
             # For text files, try to decode as text
             elif ext in ['.txt', '.md', '.html', '.htm']:
@@ -582,25 +829,17 @@ class DocumentProcessingService:
             logger.error(f"[DOC_PROCESSING] Error extracting text from {filename}: {e}")
             return ""
     
-    def _extract_text_from_pdf(self, file_content: bytes, filename: str) -> str:
-        """Extract text from PDF using PyPDF2 or other PDF libraries."""
+    async def _extract_text_from_pdf(self, file_content: bytes, filename: str) -> str:
+        """Extract text from PDF using PyPDF2 or pdfminer in the extraction worker processes."""
         try:
-            # Try PyPDF2 first
+            # Try PyPDF2 first, page ranges in parallel
             try:
-                import PyPDF2
-                from io import BytesIO
-                
-                pdf_file = BytesIO(file_content)
-                pdf_reader = PyPDF2.PdfReader(pdf_file)
+                pages = await extraction_executor.extract_pdf_pages(file_content, filename)
                 
                 text_content = ""
-                for page_num, page in enumerate(pdf_reader.pages):
-                    try:
-                        page_text = page.extract_text()
-                        if page_text:
-                            text_content += f"\n--- Page {page_num + 1} ---\n{page_text}\n"
-                    except Exception as e:
-                        logger.warning(f"[DOC_PROCESSING] Error extracting text from PDF page {page_num + 1}: {e}")
+                for page_num in sorted(pages):
+                    if pages[page_num]:
+                        text_content += f"\n--- Page {page_num + 1} ---\n{pages[page_num]}\n"
                 
                 if text_content.strip():
                     logger.info(f"[DOC_PROCESSING] Successfully extracted {len(text_content)} characters from PDF using PyPDF2: {filename}")
@@ -615,14 +854,7 @@ class DocumentProcessingService:
             
             # Try pdfminer.six as fallback
             try:
-                from pdfminer.high_level import extract_text_to_fp
-                from pdfminer.layout import LAParams
-                from io import StringIO
-                
-                output = StringIO()
-                extract_text_to_fp(BytesIO(file_content), output, laparams=LAParams())
-                text_content = output.getvalue()
-                output.close()
+                text_content = await extraction_executor.run(pdfminer_text, file_content)
                 
                 if text_content.strip():
                     logger.info(f"[DOC_PROCESSING] Successfully extracted {len(text_content)} characters from PDF using pdfminer: {filename}")
@@ -662,8 +894,13 @@ class DocumentProcessingService:
         except Exception:
             return 'unknown'
 
-    async def _extract_text_with_aws_textract(self, file_content: bytes, filename: str) -> str:
-        """Extract text using AWS Textract if available and appropriate."""
+    async def _extract_with_aws_textract(self, file_content: bytes, filename: str) -> Tuple[str, List[Dict[str, Any]]]:
+        """
+        Extract text using AWS Textract if available and appropriate.
+        
+        Returns (text, paragraphs): the paragraphs with page numbers the text was
+        joined from, empty when Textract had none; ("", []) when Textract is not used.
+        """
         try:
             import os
             _, ext = os.path.splitext(filename.lower())
@@ -671,27 +908,16 @@ class DocumentProcessingService:
             # Only use AWS Textract for PDFs and images
             if ext not in ['.pdf', '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff']:
                 logger.info(f"[DOC_PROCESSING] File type {ext} not suitable for AWS Textract, using local extraction")
-                return ""
+                return "", []
             
             # Check if we're in a Lambda environment or have AWS credentials
-            is_lambda = (
-                os.getenv('AWS_LAMBDA_FUNCTION_NAME') or 
-                os.getenv('AWS_EXECUTION_ENV') or 
-                os.getenv('LAMBDA_TASK_ROOT')
-            )
-            
-            has_aws_creds = (
-                os.getenv('AWS_ACCESS_KEY_ID') and 
-                os.getenv('AWS_SECRET_ACCESS_KEY')
-            )
-            
-            if not is_lambda and not has_aws_creds:
+            if not textract_available():
                 logger.info(f"[DOC_PROCESSING] Not in Lambda and no AWS credentials, using local extraction for: {filename}")
-                return ""
+                return "", []
             
             # Try to use AWS Textract
             try:
-                from common.src.services.aws_textract_service import textract_service
+                from common.src.services.aws_textract_service import textract_service, DocumentType as TextractDocumentType
                 
                 logger.info(f"[DOC_PROCESSING] Attempting AWS Textract extraction for: {filename}")
                 
@@ -715,11 +941,12 @@ class DocumentProcessingService:
                 logger.info(f"[DOC_PROCESSING] Uploaded file to S3 for Textract processing: {temp_key}")
                 
                 # Process with Textract
-                text_content, page_count = await textract_service.extract_text_from_s3_pdf(
+                extracted = await textract_service.extract_document_from_s3_pdf(
                     s3_bucket=config.s3_bucket,
                     s3_key=temp_key,
-                    document_type="general"
+                    document_type=TextractDocumentType.GENERAL
                 )
+                text_content = extracted["text"]
                 
                 # Clean up temporary file
                 try:
@@ -730,21 +957,21 @@ class DocumentProcessingService:
                 
                 if text_content and text_content.strip():
                     logger.info(f"[DOC_PROCESSING] Successfully extracted {len(text_content)} characters using AWS Textract: {filename}")
-                    return text_content.strip()
+                    return text_content.strip(), extracted["paragraphs"]
                 else:
                     logger.warning(f"[DOC_PROCESSING] AWS Textract returned no text for: {filename}")
-                    return ""
+                    return "", []
                     
             except ImportError:
                 logger.warning("[DOC_PROCESSING] AWS Textract service not available")
-                return ""
+                return "", []
             except Exception as e:
                 logger.warning(f"[DOC_PROCESSING] AWS Textract extraction failed: {e}")
-                return ""
+                return "", []
                 
         except Exception as e:
             logger.error(f"[DOC_PROCESSING] Error in AWS Textract extraction for {filename}: {e}")
-            return ""
+            return "", []
 
 # Global instance
 document_processing_service = DocumentProcessingService() 
\ No newline at end of file
@@ -8,9 +8,9 @@ import asyncio
 from datetime import datetime
 from typing import Optional, List, Dict, Any
 from pathlib import Path
-import io
 from functools import lru_cache
 import hashlib
+import json
 
 from common.src.models.documents import (
     Document, DocumentType, DocumentStatus, DocumentUpload, 
@@ -18,11 +18,31 @@ from common.src.models.documents import (
 )
 from common.src.core.exceptions import DocumentProcessingError
 from common.src.services.s3_upload_service import s3_upload_service
+from common.src.services.answer_cache_service import answer_cache_service
+from common.src.services.extraction_executor import extraction_executor
+from common.src.utils.document_text import pdfminer_text, spreadsheet_text, presentation_text, word_text
 from common.src.core.database import mongodb
 from common.src.core.aws_config import aws_config
 
 logger = logging.getLogger(__name__)
 
+
+def crawl_manifest_key(user_id: str, task_id: str) -> str:
+    """
+    S3 key of the document manifest the crawler writes for a task.
+
+    Mirrors manifest_key() in crawler-service/src/crawler/s3_document_storage.py
+    (the crawler image does not ship this package, so it cannot be imported
+    here); change both together.
+    """
+    def sanitize(key: str) -> str:
+        for char in '/\\ :*?"<>|':
+            key = key.replace(char, '_')
+        return key
+    
+    return f"crawled_documents/{sanitize(user_id)}/{sanitize(task_id)}/_manifest.jsonl"
+
+
 class DocumentService:
     """Document service for managing document processing and storage using MongoDB."""
     
@@ -341,21 +361,7 @@ class DocumentService:
             # Excel files (XLSX, XLS)
             if document.document_type in {DocumentType.XLSX, DocumentType.XLS}:
                 try:
-                    from openpyxl import load_workbook
-                    # Load workbook from bytes
-                    wb = load_workbook(io.BytesIO(content), data_only=True)
-                    text_content = []
-                    
-                    for sheet_name in wb.sheetnames:
-                        ws = wb[sheet_name]
-                        text_content.append(f"Sheet: {sheet_name}")
-                        
-                        for row in ws.iter_rows(values_only=True):
-                            if any(cell is not None for cell in row):
-                                row_text = " | ".join(str(cell) if cell is not None else "" for cell in row)
-                                text_content.append(row_text)
-                    
-                    result = '\n'.join(text_content)
+                    result = await extraction_executor.run(spreadsheet_text, content)
                     logger.info(f"Successfully extracted Excel content from {document.filename}")
                     return result
                 except Exception as e:
@@ -365,14 +371,7 @@ class DocumentService:
             # PowerPoint files (PPT, PPTX)
             if document.document_type in {DocumentType.PPT, DocumentType.PPTX}:
                 try:
-                    from pptx import Presentation
-                    prs = Presentation(io.BytesIO(content))
-                    text_content = []
-                    for slide in prs.slides:
-                        for shape in slide.shapes:
-                            if hasattr(shape, "text"):
-                                text_content.append(shape.text)
-                    result = '\n'.join(text_content)
+                    result = await extraction_executor.run(presentation_text, content)
                     if result.strip():
                         logger.info(f"Successfully extracted PowerPoint content from {document.filename}")
                         return result
@@ -385,12 +384,7 @@ class DocumentService:
             # Word documents (DOC, DOCX)
             if document.document_type in {DocumentType.DOC, DocumentType.DOCX}:
                 try:
-                    import docx
-                    doc = docx.Document(io.BytesIO(content))
-                    text_content = []
-                    for paragraph in doc.paragraphs:
-                        text_content.append(paragraph.text)
-                    result = '\n'.join(text_content)
+                    result = await extraction_executor.run(word_text, content)
                     if result.strip():
                         logger.info(f"Successfully extracted Word document content from {document.filename}")
                         return result
@@ -413,22 +407,18 @@ class DocumentService:
         
         logger.info(f"Starting PDF extraction for: {filename}")
         
-        # Try PyPDF2 first (fastest)
+        # Try PyPDF2 first (fastest), page ranges in parallel in the extraction workers
         try:
-            import PyPDF2
-            pdf = PyPDF2.PdfReader(io.BytesIO(content))
+            pages = await extraction_executor.extract_pdf_pages(content, filename)
             text_content = []
-            total_pages = len(pdf.pages)
+            total_pages = len(pages)
             
-            for i, page in enumerate(pdf.pages):
-                try:
-                    page_text = page.extract_text()
-                    if page_text and page_text.strip():
-                        text_content.append(f"Page {i+1}: {page_text}")
-                    else:
-                        logger.warning(f"Page {i+1} appears to be empty or image-based")
-                except Exception as e:
-                    logger.warning(f"Failed to extract text from page {i+1}: {e}")
+            for i in sorted(pages):
+                page_text = pages[i]
+                if page_text and page_text.strip():
+                    text_content.append(f"Page {i+1}: {page_text}")
+                else:
+                    logger.warning(f"Page {i+1} appears to be empty or image-based")
             
             if text_content:
                 result = '\n\n'.join(text_content)
@@ -441,8 +431,7 @@ class DocumentService:
         
         # Try pdfminer.six (more robust)
         try:
-            from pdfminer.high_level import extract_text
-            text_content = extract_text(io.BytesIO(content))
+            text_content = await extraction_executor.run(pdfminer_text, content)
             if text_content and text_content.strip():
                 logger.info(f"Successfully extracted PDF text using pdfminer.six: {filename}")
                 return text_content
@@ -648,6 +637,7 @@ class DocumentService:
                 logger.error(f"Database deletion failed: {db_result}")
                 return False
             
+            await answer_cache_service.invalidate_document(document_id)
             return db_result.deleted_count > 0
         except Exception as e:
             logger.error(f"Error deleting document {document_id}: {e}")
@@ -694,6 +684,7 @@ class DocumentService:
                 logger.error(f"Database deletion failed: {db_result}")
                 return False
             
+            await answer_cache_service.invalidate_document(doc_data["document_id"])
             return db_result.deleted_count > 0
         except Exception as e:
             logger.error(f"Error deleting document by filename {filename}: {e}")
@@ -748,11 +739,18 @@ class DocumentService:
             if documents:
                 return documents
             
-            # If no documents found, try crawl_tasks collection
+            # If no documents found, read the crawl task's S3 manifest (one GET),
+            # then fall back to the documents embedded in the crawl task
             crawl_task = await mongodb.get_collection("crawl_tasks").find_one(
                 {"task_id": task_id},
                 projection={"user_id": 1, "documents": 1}
             )
+            if not crawl_task:
+                return []
+            
+            documents = await self._get_crawl_manifest_documents(crawl_task.get("user_id", ""), task_id)
+            if documents:
+                return documents
             
             if crawl_task and crawl_task.get("documents"):
                 # Convert crawl task documents to Document objects
@@ -780,6 +778,51 @@ class DocumentService:
             logger.error(f"Error getting task documents for {task_id}: {e}")
             return []
     
+    async def _get_crawl_manifest_documents(self, user_id: str, task_id: str) -> List[Document]:
+        """Build documents from the manifest the crawler writes next to a task's files."""
+        manifest_key = crawl_manifest_key(user_id, task_id)
+        loop = asyncio.get_running_loop()
+        content = await loop.run_in_executor(None, s3_upload_service.get_file_content, manifest_key)
+        if not content:
+            return []
+        
+        entries = {}
+        for line in content.decode('utf-8', errors='ignore').splitlines():
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            entries[entry.get("document_id")] = entry
+        
+        documents = []
+        for entry in entries.values():
+            s3_key = entry.get("s3_key", "")
+            filename = entry.get("filename") or Path(s3_key).name
+            stored_at = entry.get("stored_at")
+            documents.append(Document(
+                document_id=entry.get("document_id") or str(uuid.uuid4()),
+                user_id=user_id,
+                filename=filename,
+                file_path=s3_key,
+                file_size=entry.get("size") or 0,
+                document_type=self._get_document_type(Path(s3_key).suffix),
+                status=DocumentStatus.PROCESSED,
+                uploaded_at=datetime.fromisoformat(stored_at) if stored_at else datetime.utcnow(),
+                metadata={
+                    "s3_key": s3_key,
+                    "url": entry.get("url", ""),
+                    "title": entry.get("title", ""),
+                    "domain": entry.get("domain", "")
+                },
+                task_id=task_id,
+                crawl_task_id=task_id
+            ))
+        
+        logger.info(f"Loaded {len(documents)} documents for task {task_id} from S3 manifest")
+        return documents
+    
     async def create_document(self, document: Document) -> Document:
         """Create a new document record in the database."""
         try:
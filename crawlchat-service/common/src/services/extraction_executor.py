@@ -0,0 +1,194 @@
+"""
+Process pool for CPU-bound text extraction.
+PyPDF2, pdfminer, openpyxl, python-docx and python-pptx run in worker
+processes with a per-task time limit and an address-space limit, so a large
+or hostile file never blocks the event loop or exhausts the service. PDFs are
+split into page ranges that are extracted in parallel and streamed back as
+each range finishes.
+"""
+
+import logging
+import asyncio
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Dict, Tuple, Optional, Callable, Any, AsyncIterator
+
+from common.src.utils.document_text import (
+    limit_worker_memory, run_with_time_limit, pdf_page_count, pdf_pages_text
+)
+
+logger = logging.getLogger(__name__)
+
+# Default worker count when extraction_workers is 0
+MAX_DEFAULT_WORKERS = 4
+
+
+class ExtractionExecutor:
+    """
+    Runs extraction functions from common.src.utils.document_text off the event loop.
+
+    Workers are spawned (not forked, the service process has threads and an
+    event loop) once and reused. A task that exceeds its time limit raises
+    ExtractionTimeout inside its worker; a worker that dies (native crash or
+    hard timeout) breaks the pool, which is then replaced and the affected
+    tasks retried once, each in a worker of its own. Where processes cannot
+    be created (AWS Lambda has no /dev/shm for multiprocessing) a thread pool
+    is used instead: extraction still leaves the event loop, but without time
+    or memory limits.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, task_timeout: Optional[float] = None,
+                 memory_limit_mb: Optional[int] = None, pages_per_task: Optional[int] = None):
+        self._max_workers = max_workers
+        self._task_timeout = task_timeout
+        self._memory_limit_mb = memory_limit_mb
+        self._pages_per_task = pages_per_task
+        self._pool = None
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def _setting(self, value, name: str):
+        if value is not None:
+            return value
+        from common.src.core.config import config
+        return getattr(config, name)
+
+    @property
+    def max_workers(self) -> int:
+        return self._setting(self._max_workers, "extraction_workers") or min(MAX_DEFAULT_WORKERS, os.cpu_count() or 1)
+
+    @property
+    def task_timeout(self) -> float:
+        return self._setting(self._task_timeout, "extraction_task_timeout")
+
+    @property
+    def memory_limit_mb(self) -> int:
+        return self._setting(self._memory_limit_mb, "extraction_memory_limit_mb")
+
+    @property
+    def pages_per_task(self) -> int:
+        return max(1, self._setting(self._pages_per_task, "extraction_pages_per_task"))
+
+    @property
+    def uses_processes(self) -> bool:
+        return isinstance(self._pool, ProcessPoolExecutor)
+
+    def _get_pool(self) -> Tuple[Any, int]:
+        with self._lock:
+            if self._pool is None:
+                try:
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=limit_worker_memory,
+                        initargs=(self.memory_limit_mb,)
+                    )
+                    logger.info(f"[EXTRACTION] Started {self.max_workers} extraction worker processes")
+                except (OSError, NotImplementedError, ImportError) as e:
+                    logger.warning(f"[EXTRACTION] Worker processes unavailable, extracting in threads: {e}")
+                    self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="extraction")
+            return self._pool, self._generation
+
+    def _replace_pool(self, generation: int, reason: str):
+        """Drop a broken pool (only once, however many tasks saw it break)."""
+        with self._lock:
+            if generation != self._generation or self._pool is None:
+                return
+            pool, self._pool = self._pool, None
+            self._generation += 1
+        logger.warning(f"[EXTRACTION] Replacing extraction pool: {reason}")
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+            self._generation += 1
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, fn: Callable[..., Any], *args, timeout: Optional[float] = None) -> Any:
+        """
+        Run fn(*args) in a worker and return its result.
+
+        fn must be a top-level (picklable) function. Raises ExtractionTimeout
+        when it runs longer than ``timeout`` (default extraction_task_timeout)
+        and re-raises whatever fn raised, including MemoryError at the limit.
+        """
+        loop = asyncio.get_running_loop()
+        timeout = self.task_timeout if timeout is None else timeout
+        pool, generation = self._get_pool()
+        try:
+            return await loop.run_in_executor(pool, run_with_time_limit, fn, timeout, *args)
+        except BrokenProcessPool:
+            self._replace_pool(generation, f"worker died during {fn.__name__}")
+
+        # Every task of the broken pool failed, not only the one that killed its worker:
+        # retry each in a process of its own so the culprit cannot take the others down again
+        logger.warning(f"[EXTRACTION] Retrying {fn.__name__} in an isolated worker")
+        isolated = ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=limit_worker_memory,
+            initargs=(self.memory_limit_mb,)
+        )
+        try:
+            return await loop.run_in_executor(isolated, run_with_time_limit, fn, timeout, *args)
+        finally:
+            isolated.shutdown(wait=False)
+
+    async def iter_pdf_pages(self, content: bytes, filename: str,
+                             page_indexes: Optional[List[int]] = None) -> AsyncIterator[Tuple[int, str]]:
+        """
+        Yield (page index, text) as the page ranges of a PDF finish.
+
+        The pages (all of them when ``page_indexes`` is None) are split into
+        ranges of ``pages_per_task`` that run in parallel, so pages arrive out
+        of order. A range that fails or times out is logged and its pages are
+        not yielded; the error of opening the PDF at all is raised.
+        """
+        if page_indexes is None:
+            page_indexes = list(range(await self.run(pdf_page_count, content)))
+        size = self.pages_per_task
+        ranges = [page_indexes[start:start + size] for start in range(0, len(page_indexes), size)]
+
+        async def extract_range(pages: List[int]):
+            try:
+                return pages, await self.run(pdf_pages_text, content, pages), None
+            except Exception as e:
+                return pages, None, e
+
+        tasks = [asyncio.ensure_future(extract_range(pages)) for pages in ranges]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                pages, results, error = await finished
+                if error is not None:
+                    logger.warning(f"[EXTRACTION] Pages {pages[0] + 1}-{pages[-1] + 1} of {filename} failed: "
+                                   f"{type(error).__name__}: {error}")
+                    continue
+                for index, text, page_error in results:
+                    if page_error:
+                        logger.warning(f"[EXTRACTION] Page {index + 1} of {filename} unreadable: {page_error}")
+                    yield index, text
+        finally:
+            # The consumer stopped early: drop ranges that have not started
+            for task in tasks:
+                task.cancel()
+
+    async def extract_pdf_pages(self, content: bytes, filename: str,
+                                page_indexes: Optional[List[int]] = None) -> Dict[int, str]:
+        """Text of the given pages (all pages when None) keyed by page index; failed ranges are missing."""
+        return {index: text async for index, text in self.iter_pdf_pages(content, filename, page_indexes)}
+
+    async def pdf_page_count(self, content: bytes) -> int:
+        return await self.run(pdf_page_count, content)
+
+    def extract_pdf_pages_blocking(self, content: bytes, filename: str) -> Dict[int, str]:
+        """extract_pdf_pages for synchronous callers on a thread without an event loop (e.g. crawler workers)."""
+        return asyncio.run(self.extract_pdf_pages(content, filename))
+
+
+# Global instance
+extraction_executor = ExtractionExecutor()
@@ -0,0 +1,163 @@
+"""
+Per-session keyword (BM25) index.
+Documents are chunked and tokenized once at ingest time and stored in MongoDB;
+searches rank the chunks of a session with BM25 from an in-memory index that is
+rebuilt only when the session's chunks change.
+"""
+
+import logging
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+from collections import OrderedDict
+
+from common.src.core.database import mongodb
+from common.src.core.config import config
+from common.src.utils.bm25 import BM25Index, term_frequencies
+from common.src.utils.text_chunking import chunk_text, chunk_paragraphs
+
+logger = logging.getLogger(__name__)
+
+KEYWORD_CHUNKS_COLLECTION = "keyword_chunks"
+
+
+class KeywordIndexService:
+    """
+    BM25 search over the chunks of each session's documents.
+
+    Chunks live in the ``keyword_chunks`` collection with their term
+    frequencies (stored as [term, count] pairs, since terms may contain dots).
+    Built indexes are kept in a small LRU and re-checked against MongoDB at
+    most every ``keyword_index_refresh_seconds`` so that documents ingested by
+    other instances are picked up.
+    """
+
+    def __init__(self, max_sessions: int = 128):
+        self.max_sessions = max_sessions
+        # session_id -> (checked_at, signature, index)
+        self._indexes: "OrderedDict[str, Tuple[float, Tuple[int, Any], BM25Index]]" = OrderedDict()
+
+    async def _collection(self):
+        if not mongodb.is_connected():
+            await mongodb.connect()
+        return mongodb.get_collection(KEYWORD_CHUNKS_COLLECTION)
+
+    async def index_document(self, session_id: str, document_id: str, file_id: Optional[str], filename: str,
+                             content: str, attributes: Optional[Dict[str, Any]] = None,
+                             paragraphs: Optional[List[Dict[str, Any]]] = None) -> int:
+        """Chunk and index a document for a session, replacing earlier chunks of it. Returns the chunk count."""
+        try:
+            if paragraphs:
+                chunks = chunk_paragraphs(paragraphs, config.local_index_chunk_chars, config.local_index_chunk_overlap)
+            else:
+                chunks = chunk_text(content, config.local_index_chunk_chars, config.local_index_chunk_overlap)
+
+            now = datetime.utcnow()
+            records = []
+            for chunk in chunks:
+                frequencies = term_frequencies(chunk["text"])
+                if not frequencies:
+                    continue
+                records.append({
+                    "session_id": session_id,
+                    "document_id": document_id,
+                    "file_id": file_id,
+                    "filename": filename,
+                    "chunk_index": chunk["chunk_index"],
+                    "text": chunk["text"],
+                    "terms": [[term, count] for term, count in frequencies.items()],
+                    "attributes": attributes or {},
+                    "created_at": now
+                })
+
+            collection = await self._collection()
+            # Only this session's chunks: one crawl document can be linked to several sessions
+            await collection.delete_many({"session_id": session_id, "document_id": document_id})
+            if records:
+                await collection.insert_many(records, ordered=False)
+            self._indexes.pop(session_id, None)
+            logger.info(f"[KEYWORD_INDEX] Indexed {len(records)} chunks of {filename} for session {session_id}")
+            return len(records)
+        except Exception as e:
+            logger.error(f"[KEYWORD_INDEX] Error indexing {filename}: {e}")
+            return 0
+
+    async def _signature(self, collection, session_id: str) -> Tuple[int, Any]:
+        """(chunk count, newest chunk id) of a session; changes whenever chunks are added or removed."""
+        count = await collection.count_documents({"session_id": session_id})
+        newest = await collection.find_one({"session_id": session_id}, projection={"_id": 1}, sort=[("_id", -1)])
+        return count, newest["_id"] if newest else None
+
+    async def _get_index(self, session_id: str) -> BM25Index:
+        cached = self._indexes.get(session_id)
+        if cached and time.monotonic() - cached[0] < config.keyword_index_refresh_seconds:
+            self._indexes.move_to_end(session_id)
+            return cached[2]
+
+        collection = await self._collection()
+        signature = await self._signature(collection, session_id)
+        if cached and cached[1] == signature:
+            index = cached[2]
+        else:
+            index = BM25Index()
+            cursor = collection.find(
+                {"session_id": session_id},
+                projection={"_id": 0, "session_id": 0, "created_at": 0}
+            ).sort([("document_id", 1), ("chunk_index", 1)])
+            async for record in cursor:
+                frequencies = dict(record.pop("terms"))
+                index.add(record, frequencies)
+            logger.info(f"[KEYWORD_INDEX] Built index for session {session_id} with {len(index)} chunks")
+
+        self._indexes[session_id] = (time.monotonic(), signature, index)
+        self._indexes.move_to_end(session_id)
+        while len(self._indexes) > self.max_sessions:
+            self._indexes.popitem(last=False)
+        return index
+
+    async def search(self, session_id: str, query: str, max_results: int = 10) -> List[Dict[str, Any]]:
+        """BM25 hits of a session, shaped like vector store search results plus a bm25_score."""
+        try:
+            index = await self._get_index(session_id)
+            results = []
+            for doc_index, score in index.search(query, k=max_results):
+                chunk = index.documents[doc_index]
+                results.append({
+                    "file_id": chunk.get("file_id"),
+                    "filename": chunk.get("filename", "Unknown"),
+                    "attributes": chunk.get("attributes", {}),
+                    "content": [{"type": "text", "text": chunk["text"]}],
+                    "chunk_index": chunk.get("chunk_index"),
+                    "bm25_score": score
+                })
+            return results
+        except Exception as e:
+            logger.error(f"[KEYWORD_INDEX] Error searching session {session_id}: {e}")
+            return []
+
+    async def remove_document(self, document_id: str) -> int:
+        """Drop the chunks of a document from every session."""
+        try:
+            collection = await self._collection()
+            for session_id in await collection.distinct("session_id", {"document_id": document_id}):
+                self._indexes.pop(session_id, None)
+            result = await collection.delete_many({"document_id": document_id})
+            return result.deleted_count
+        except Exception as e:
+            logger.error(f"[KEYWORD_INDEX] Error removing document {document_id}: {e}")
+            return 0
+
+    async def remove_session(self, session_id: str) -> int:
+        """Drop every chunk indexed for a session."""
+        self._indexes.pop(session_id, None)
+        try:
+            collection = await self._collection()
+            result = await collection.delete_many({"session_id": session_id})
+            return result.deleted_count
+        except Exception as e:
+            logger.error(f"[KEYWORD_INDEX] Error removing session {session_id}: {e}")
+            return 0
+
+
+# Global instance
+keyword_index_service = KeywordIndexService()
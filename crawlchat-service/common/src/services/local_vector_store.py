@@ -0,0 +1,381 @@
+"""
+Local retrieval backend for VectorStoreService.
+Chunks and embeds text in-process and keeps one NumPy vector index per vector
+store, persisted to S3 and memory-mapped from a local cache directory. Files
+are searchable as soon as they are added; there is no server-side processing
+to wait for.
+"""
+
+import logging
+import asyncio
+import hashlib
+import json
+import random
+import time
+import uuid
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Callable, Tuple
+
+import numpy as np
+from botocore.exceptions import ClientError
+
+from common.src.core.config import config
+from common.src.core.openai_client import get_openai_client
+from common.src.core.exceptions import VectorStoreError
+from common.src.services.s3_upload_service import s3_upload_service
+from common.src.utils.text_chunking import chunk_text, chunk_paragraphs
+from common.src.utils.vector_index import (
+    VectorIndex, HashingEmbedder, normalize_rows, write_atomic, VECTORS_FILENAME, INDEX_FILENAME
+)
+
+logger = logging.getLogger(__name__)
+
+LOCAL_STORE_PREFIX = "local_"
+LOCAL_FILE_PREFIX = "file-local-"
+# S3 answers a failed conditional write with 412, or 409 when another conditional write is in flight
+CONFLICT_ERROR_CODES = {"PreconditionFailed", "ConditionalRequestConflict"}
+COMMIT_ATTEMPTS = 5
+
+
+class _CommitConflict(Exception):
+    """index.json changed between reading and writing it."""
+
+
+class OpenAIEmbedder:
+    """Batch embedder using the shared AsyncOpenAI client."""
+
+    def __init__(self, model: str = "text-embedding-3-small", batch_size: int = 64, client=None):
+        self.model = model
+        self.batch_size = batch_size
+        self.client = client
+        self.name = model
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        client = self.client or get_openai_client()
+        if client is None:
+            raise VectorStoreError("OpenAI client not available - check OPENAI_API_KEY environment variable")
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        responses = await asyncio.gather(*[
+            client.embeddings.create(model=self.model, input=batch) for batch in batches
+        ])
+        vectors = [item.embedding for response in responses for item in sorted(response.data, key=lambda item: item.index)]
+        return normalize_rows(np.array(vectors, dtype=np.float32))
+
+
+def get_embedder():
+    """Embedder selected by the local_embedder setting."""
+    if config.local_embedder == "hashing":
+        return HashingEmbedder(dim=config.local_hashing_dim)
+    return OpenAIEmbedder(model=config.local_embedding_model, batch_size=config.local_embedding_batch_size)
+
+
+def is_local_store_id(vector_store_id: Optional[str]) -> bool:
+    return bool(vector_store_id) and vector_store_id.startswith(LOCAL_STORE_PREFIX)
+
+
+class LocalVectorStore:
+    """
+    Per-store NumPy indexes with the same result shapes as the OpenAI vector store API.
+
+    Indexes are loaded from S3 on first use, kept in memory, and re-checked
+    against the S3 ETag at most every ``local_index_refresh_seconds`` so that
+    files added by other instances become visible.
+    """
+
+    def __init__(self, embedder=None, storage=None, s3_prefix: Optional[str] = None,
+                 cache_dir: Optional[str] = None):
+        self.embedder = embedder or get_embedder()
+        self.storage = storage or s3_upload_service
+        self.s3_prefix = s3_prefix if s3_prefix is not None else config.local_index_s3_prefix
+        self.cache_dir = Path(cache_dir or config.local_index_cache_dir)
+        self._indexes: Dict[str, Optional[VectorIndex]] = {}
+        self._etags: Dict[str, Optional[str]] = {}
+        self._checked_at: Dict[str, float] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    @staticmethod
+    def store_id_for_name(name: str) -> str:
+        """Stable store id for a store name, so every instance resolves the same index."""
+        return LOCAL_STORE_PREFIX + hashlib.sha1(name.encode("utf-8")).hexdigest()[:24]
+
+    def _lock(self, vector_store_id: str) -> asyncio.Lock:
+        lock = self._locks.get(vector_store_id)
+        if lock is None:
+            lock = self._locks[vector_store_id] = asyncio.Lock()
+        return lock
+
+    def _s3_key(self, vector_store_id: str, filename: str) -> str:
+        return f"{self.s3_prefix}{vector_store_id}/{filename}"
+
+    def _new_index(self, dim: int) -> VectorIndex:
+        return VectorIndex(dim, ivf_min_vectors=config.local_index_ivf_min_vectors, nprobe=config.local_index_nprobe)
+
+    # === Persistence ===
+    #
+    # index.json is the commit point: it names the vectors file of its version
+    # (vectors-<uuid>.npy, never overwritten) and is only written with a
+    # conditional PUT on the ETag the writer read, so concurrent writers on
+    # other instances cannot silently overwrite each other's files.
+
+    def _remote_etag(self, vector_store_id: str) -> Optional[str]:
+        try:
+            response = self.storage.s3_client.head_object(
+                Bucket=self.storage.bucket_name, Key=self._s3_key(vector_store_id, INDEX_FILENAME)
+            )
+            return response.get("ETag")
+        except Exception:
+            return None
+
+    def _download(self, vector_store_id: str) -> Tuple[VectorIndex, Optional[str]]:
+        """Current index of a store and the ETag of the index.json it was built from."""
+        directory = self.cache_dir / vector_store_id
+        directory.mkdir(parents=True, exist_ok=True)
+        for attempt in range(2):
+            response = self.storage.s3_client.get_object(
+                Bucket=self.storage.bucket_name, Key=self._s3_key(vector_store_id, INDEX_FILENAME)
+            )
+            metadata = json.loads(response["Body"].read())
+            vectors_file = metadata.get("vectors_file", VECTORS_FILENAME)
+            path = directory / vectors_file
+            # Versioned vectors files are immutable, so a cached copy is always current
+            if vectors_file == VECTORS_FILENAME or not path.exists():
+                try:
+                    vectors = self.storage.s3_client.get_object(
+                        Bucket=self.storage.bucket_name, Key=self._s3_key(vector_store_id, vectors_file)
+                    )
+                except self.storage.s3_client.exceptions.NoSuchKey:
+                    if attempt:
+                        raise
+                    # Superseded and deleted between the two reads: start over from the new index.json
+                    continue
+                write_atomic(path, lambda handle: handle.write(vectors["Body"].read()))
+            index = VectorIndex.from_metadata(
+                metadata, directory, ivf_min_vectors=config.local_index_ivf_min_vectors, nprobe=config.local_index_nprobe
+            )
+            return index, response.get("ETag")
+
+    def _upload(self, vector_store_id: str, index: VectorIndex, expected_etag: Optional[str]) -> Optional[str]:
+        """Publish a new version of the index; raises _CommitConflict when index.json changed since it was read."""
+        directory = self.cache_dir / vector_store_id
+        previous_file = index.vectors_file
+        index.save(directory, f"vectors-{uuid.uuid4().hex}.npy")
+        vectors_key = self._s3_key(vector_store_id, index.vectors_file)
+        self.storage.s3_client.put_object(
+            Bucket=self.storage.bucket_name, Key=vectors_key, Body=(directory / index.vectors_file).read_bytes()
+        )
+
+        condition = {"IfMatch": expected_etag} if expected_etag else {"IfNoneMatch": "*"}
+        try:
+            response = self.storage.s3_client.put_object(
+                Bucket=self.storage.bucket_name,
+                Key=self._s3_key(vector_store_id, INDEX_FILENAME),
+                Body=(directory / INDEX_FILENAME).read_bytes(),
+                **condition
+            )
+        except ClientError as e:
+            self._delete_objects([vectors_key])
+            (directory / index.vectors_file).unlink(missing_ok=True)
+            if e.response.get("Error", {}).get("Code") in CONFLICT_ERROR_CODES:
+                raise _CommitConflict(vector_store_id) from e
+            raise
+
+        if previous_file != index.vectors_file:
+            self._delete_objects([self._s3_key(vector_store_id, previous_file)])
+            (directory / previous_file).unlink(missing_ok=True)
+        return response.get("ETag")
+
+    def _delete_objects(self, keys: List[str]):
+        try:
+            self.storage.s3_client.delete_objects(
+                Bucket=self.storage.bucket_name, Delete={"Objects": [{"Key": key} for key in keys], "Quiet": True}
+            )
+        except Exception as e:
+            logger.warning(f"[LOCAL_VECTOR_STORE] Could not delete {keys}: {e}")
+
+    async def _get_index(self, vector_store_id: str, refresh: bool = False) -> Optional[VectorIndex]:
+        """In-memory index of a store, (re)loaded from S3 when missing or stale (always checked with refresh)."""
+        loaded = vector_store_id in self._indexes
+        checked_at = self._checked_at.get(vector_store_id, 0.0)
+        if not refresh and loaded and time.monotonic() - checked_at < config.local_index_refresh_seconds:
+            return self._indexes[vector_store_id]
+
+        loop = asyncio.get_running_loop()
+        etag = await loop.run_in_executor(None, self._remote_etag, vector_store_id)
+        self._checked_at[vector_store_id] = time.monotonic()
+        if loaded and etag == self._etags.get(vector_store_id):
+            return self._indexes[vector_store_id]
+
+        index = None
+        if etag is not None:
+            try:
+                index, etag = await loop.run_in_executor(None, self._download, vector_store_id)
+                logger.info(f"[LOCAL_VECTOR_STORE] Loaded {vector_store_id} with {len(index)} chunks")
+            except Exception as e:
+                logger.error(f"[LOCAL_VECTOR_STORE] Error loading {vector_store_id}: {e}")
+                if loaded and not refresh:
+                    return self._indexes[vector_store_id]
+                raise VectorStoreError(f"Could not load vector index {vector_store_id}: {e}")
+        self._indexes[vector_store_id] = index
+        self._etags[vector_store_id] = etag
+        return index
+
+    async def _update_index(self, vector_store_id: str, update: Callable[[VectorIndex], bool],
+                            dim: Optional[int] = None) -> bool:
+        """
+        Apply ``update`` to the latest index and publish it.
+
+        ``update`` mutates the index and returns False when there is nothing
+        to save. A new index of dimension ``dim`` is started when the store
+        has none (with dim None the update is skipped). When another instance
+        published first, the index is reloaded and the update applied again.
+        """
+        loop = asyncio.get_running_loop()
+        async with self._lock(vector_store_id):
+            for attempt in range(COMMIT_ATTEMPTS):
+                # Read the current index and its ETag fresh: the conditional write is only as good as this read
+                index = await self._get_index(vector_store_id, refresh=True)
+                if index is None:
+                    if dim is None:
+                        return False
+                    index = self._new_index(dim)
+                else:
+                    index = index.copy()
+                if not update(index):
+                    return False
+                try:
+                    etag = await loop.run_in_executor(
+                        None, self._upload, vector_store_id, index, self._etags.get(vector_store_id)
+                    )
+                except _CommitConflict:
+                    logger.warning(f"[LOCAL_VECTOR_STORE] {vector_store_id} changed on another instance, retrying update")
+                    await asyncio.sleep(random.uniform(0.05, 0.2) * (attempt + 1))
+                    continue
+                self._indexes[vector_store_id] = index
+                self._etags[vector_store_id] = etag
+                self._checked_at[vector_store_id] = time.monotonic()
+                return True
+        raise VectorStoreError(f"Could not update vector index {vector_store_id}: too many concurrent writers")
+
+    # === Vector store operations ===
+
+    async def create_store(self, name: str) -> str:
+        vector_store_id = self.store_id_for_name(name)
+        logger.info(f"[LOCAL_VECTOR_STORE] Using local store {vector_store_id} for '{name}'")
+        return vector_store_id
+
+    async def add_text(self, vector_store_id: str, text: str, filename: str,
+                       attributes: Optional[Dict[str, Any]] = None,
+                       paragraphs: Optional[List[Dict[str, Any]]] = None) -> str:
+        """Chunk, embed and index a text; returns the new file id."""
+        if paragraphs:
+            chunks = chunk_paragraphs(paragraphs, config.local_index_chunk_chars, config.local_index_chunk_overlap)
+        else:
+            chunks = chunk_text(text, config.local_index_chunk_chars, config.local_index_chunk_overlap)
+        if not chunks:
+            raise VectorStoreError(f"No text to index for {filename}")
+
+        started = time.monotonic()
+        vectors = await self.embedder.embed([chunk["text"] for chunk in chunks])
+        file_id = LOCAL_FILE_PREFIX + uuid.uuid4().hex
+        file_record = {
+            "id": file_id,
+            "filename": filename,
+            "attributes": attributes or {},
+            "created_at": int(time.time()),
+            "usage_bytes": len(text.encode("utf-8")),
+            "status": "completed"
+        }
+
+        def add(index: VectorIndex) -> bool:
+            index.add(file_id, file_record, chunks, vectors)
+            return True
+
+        await self._update_index(vector_store_id, add, dim=vectors.shape[1])
+
+        logger.info(f"[LOCAL_VECTOR_STORE] Indexed {filename} as {file_id}: {len(chunks)} chunks in {time.monotonic() - started:.2f}s")
+        return file_id
+
+    async def search(self, vector_store_id: str, query: str, max_results: int = 10,
+                     score_threshold: Optional[float] = None) -> Dict[str, Any]:
+        """Search a store; results have the same shape as vector_stores.search results."""
+        index = await self._get_index(vector_store_id)
+        if index is None or not len(index):
+            return {"results": [], "search_query": query, "has_more": False, "next_page": None}
+
+        started = time.perf_counter()
+        query_vector = (await self.embedder.embed([query]))[0]
+        hits = index.search(query_vector, k=max_results, score_threshold=score_threshold)
+        results = []
+        for row, score in hits:
+            chunk = index.chunks[row]
+            file_record = index.files.get(chunk["file_id"], {})
+            results.append({
+                "file_id": chunk["file_id"],
+                "filename": file_record.get("filename", "Unknown"),
+                "score": max(0.0, min(1.0, score)),
+                "attributes": file_record.get("attributes", {}),
+                "content": [{"type": "text", "text": chunk["text"]}]
+            })
+        logger.info(f"[LOCAL_VECTOR_STORE] {len(results)} results from {len(index)} chunks in {(time.perf_counter() - started) * 1000:.1f}ms")
+        return {"results": results, "search_query": query, "has_more": False, "next_page": None}
+
+    async def list_files(self, vector_store_id: str) -> List[Dict[str, Any]]:
+        index = await self._get_index(vector_store_id)
+        if index is None:
+            return []
+        return [dict(record, vector_store_id=vector_store_id) for record in index.files.values()]
+
+    async def get_file(self, vector_store_id: str, file_id: str) -> Optional[Dict[str, Any]]:
+        index = await self._get_index(vector_store_id)
+        if index is None:
+            return None
+        return index.files.get(file_id)
+
+    async def update_attributes(self, vector_store_id: str, file_id: str, attributes: Dict[str, Any]) -> bool:
+        def set_attributes(index: VectorIndex) -> bool:
+            if file_id not in index.files:
+                return False
+            index.files[file_id]["attributes"] = attributes
+            return True
+
+        return await self._update_index(vector_store_id, set_attributes)
+
+    async def delete_file(self, vector_store_id: str, file_id: str) -> bool:
+        return await self._update_index(vector_store_id, lambda index: index.remove_file(file_id))
+
+    async def delete_store(self, vector_store_id: str) -> bool:
+        def delete_objects():
+            # Every version's vectors file, not only the current one
+            prefix = self._s3_key(vector_store_id, "")
+            paginator = self.storage.s3_client.get_paginator("list_objects_v2")
+            for page in paginator.paginate(Bucket=self.storage.bucket_name, Prefix=prefix):
+                keys = [item["Key"] for item in page.get("Contents", [])]
+                if keys:
+                    self.storage.s3_client.delete_objects(
+                        Bucket=self.storage.bucket_name, Delete={"Objects": [{"Key": key} for key in keys], "Quiet": True}
+                    )
+            directory = self.cache_dir / vector_store_id
+            if directory.exists():
+                for path in directory.iterdir():
+                    path.unlink(missing_ok=True)
+
+        async with self._lock(vector_store_id):
+            await asyncio.get_running_loop().run_in_executor(None, delete_objects)
+            self._indexes.pop(vector_store_id, None)
+            self._etags.pop(vector_store_id, None)
+            self._checked_at.pop(vector_store_id, None)
+        return True
+
+    async def store_info(self, vector_store_id: str) -> Dict[str, Any]:
+        index = await self._get_index(vector_store_id)
+        files = index.files if index is not None else {}
+        return {
+            "id": vector_store_id,
+            "object": "vector_store",
+            "status": "completed",
+            "backend": "local",
+            "embedder": self.embedder.name,
+            "file_counts": {"completed": len(files), "in_progress": 0, "failed": 0, "cancelled": 0, "total": len(files)},
+            "chunk_count": len(index) if index is not None else 0,
+            "usage_bytes": sum(record.get("usage_bytes", 0) for record in files.values())
+        }
@@ -0,0 +1,174 @@
+"""
+Text-layer-first PDF extraction.
+Reads the embedded text layer of each page locally, scores its quality and
+sends only the pages whose text layer is missing or garbled to Textract OCR,
+then merges the page texts in order.
+"""
+
+import logging
+import os
+import re
+import time
+import unicodedata
+from typing import List, Dict, Any, Optional
+
+from common.src.core.config import config
+from common.src.services.extraction_executor import extraction_executor
+
+logger = logging.getLogger(__name__)
+
+# pdfminer/PyPDF2 placeholder for glyphs without a Unicode mapping
+_CID_GLYPH = re.compile(r"\(cid:\d+\)")
+# Unicode categories that never appear in a healthy text layer
+_GARBAGE_CATEGORIES = {"Co", "Cc", "Cs", "Cn"}
+# Below this share of letters and digits the text is symbol soup (broken font encoding)
+MIN_ALNUM_RATIO = 0.5
+
+
+def score_page_text(text: str) -> Dict[str, Any]:
+    """
+    Quality of one page's text layer.
+
+    Returns the number of non-whitespace characters, the share of garbage
+    glyphs (unmapped CIDs, replacement and private-use characters, control
+    codes) and the share of letters and digits.
+    """
+    text = _CID_GLYPH.sub("\ufffd", text or "")
+    chars = [char for char in text if not char.isspace()]
+    if not chars:
+        return {"chars": 0, "garbage_ratio": 1.0, "alnum_ratio": 0.0}
+    garbage = sum(1 for char in chars if char == "\ufffd" or unicodedata.category(char) in _GARBAGE_CATEGORIES)
+    alnum = sum(1 for char in chars if char.isalnum())
+    return {
+        "chars": len(chars),
+        "garbage_ratio": round(garbage / len(chars), 4),
+        "alnum_ratio": round(alnum / len(chars), 4)
+    }
+
+
+def is_usable_text(score: Dict[str, Any]) -> bool:
+    return (
+        score["chars"] >= config.pdf_text_min_chars_per_page
+        and score["garbage_ratio"] <= config.pdf_text_max_garbage_ratio
+        and score["alnum_ratio"] >= MIN_ALNUM_RATIO
+    )
+
+
+def sample_page_indexes(page_count: int, samples: int) -> List[int]:
+    """Evenly spread page indexes (always including the first and last page)."""
+    if page_count <= samples:
+        return list(range(page_count))
+    if samples <= 1:
+        return [0]
+    step = (page_count - 1) / (samples - 1)
+    return sorted({round(i * step) for i in range(samples)})
+
+
+def textract_available() -> bool:
+    """Textract is used in Lambda or when AWS credentials are configured."""
+    is_lambda = (
+        os.getenv('AWS_LAMBDA_FUNCTION_NAME') or
+        os.getenv('AWS_EXECUTION_ENV') or
+        os.getenv('LAMBDA_TASK_ROOT')
+    )
+    has_aws_creds = os.getenv('AWS_ACCESS_KEY_ID') and os.getenv('AWS_SECRET_ACCESS_KEY')
+    return bool(is_lambda or has_aws_creds)
+
+
+class PdfExtractionRouter:
+    """Route each PDF page to its text layer or to OCR, whichever is needed."""
+
+    def __init__(self, ocr_service=None):
+        self._ocr_service = ocr_service
+
+    @property
+    def ocr_service(self):
+        if self._ocr_service is None:
+            from common.src.services.aws_textract_service import textract_service
+            self._ocr_service = textract_service
+        return self._ocr_service
+
+    @staticmethod
+    async def _extract_pages(file_content: bytes, filename: str, page_indexes: List[int]) -> Dict[int, str]:
+        """Text layer of the given pages, extracted in parallel in the extraction workers."""
+        texts = await extraction_executor.extract_pdf_pages(file_content, filename, page_indexes)
+        # Pages of a range that failed or timed out count as having no text layer
+        return {index: texts.get(index, "") for index in page_indexes}
+
+    async def extract(self, file_content: bytes, filename: str, use_ocr: Optional[bool] = None) -> Dict[str, Any]:
+        """
+        Extract the text of a PDF, page by page.
+
+        A few sample pages are read first; when none of them has a usable text
+        layer the document is treated as scanned and every page is OCR'd.
+        Otherwise every page is read locally and only the pages that fail the
+        quality check are OCR'd (when Textract is available).
+
+        Returns:
+            {"text", "page_count", "method", "pages": [{"page", "method", "chars"}]}
+        """
+        started = time.time()
+        use_ocr = textract_available() if use_ocr is None else use_ocr
+
+        try:
+            page_count = await extraction_executor.pdf_page_count(file_content)
+        except Exception as e:
+            logger.warning(f"[PDF_ROUTER] Could not read text layer of {filename}: {e}")
+            return {"text": "", "page_count": 0, "method": "none", "pages": []}
+
+        samples = sample_page_indexes(page_count, config.pdf_router_sample_pages)
+        texts = await self._extract_pages(file_content, filename, samples)
+        if not use_ocr or any(is_usable_text(score_page_text(texts[index])) for index in samples):
+            remaining = [index for index in range(page_count) if index not in texts]
+            texts.update(await self._extract_pages(file_content, filename, remaining))
+        else:
+            logger.info(f"[PDF_ROUTER] No usable text layer in {len(samples)} sample pages of {filename}, treating as scanned")
+            texts.update({index: "" for index in range(page_count) if index not in texts})
+
+        methods = {}
+        for index in range(page_count):
+            methods[index] = "text_layer" if is_usable_text(score_page_text(texts[index])) else "ocr"
+        ocr_pages = [index for index in range(page_count) if methods[index] == "ocr"]
+
+        if ocr_pages and use_ocr:
+            try:
+                from common.src.services.aws_textract_service import DocumentType
+                from common.src.services.s3_upload_service import s3_upload_service
+
+                # config.s3_bucket is optional; large page images are staged through s3_upload_service
+                ocr_texts = await self.ocr_service.ocr_pdf_pages(
+                    file_content, s3_upload_service.bucket_name, DocumentType.GENERAL, [index + 1 for index in ocr_pages]
+                )
+                for index in ocr_pages:
+                    ocr_text = ocr_texts.get(index + 1, "")
+                    if ocr_text.strip():
+                        texts[index] = ocr_text
+                    else:
+                        # OCR found nothing; keep whatever the text layer had
+                        methods[index] = "text_layer"
+            except Exception as e:
+                logger.warning(f"[PDF_ROUTER] OCR of {len(ocr_pages)} pages of {filename} failed, keeping text layer: {e}")
+                methods.update({index: "text_layer" for index in ocr_pages})
+        elif ocr_pages:
+            methods.update({index: "text_layer" for index in ocr_pages})
+
+        pages = [
+            {"page": index + 1, "method": methods[index], "chars": len(texts[index].strip())}
+            for index in range(page_count)
+        ]
+        text = "\n\n".join(texts[index].strip() for index in range(page_count) if texts[index].strip())
+        ocr_count = sum(1 for page in pages if page["method"] == "ocr")
+        if ocr_count == 0:
+            method = "text_layer"
+        elif ocr_count == page_count:
+            method = "ocr"
+        else:
+            method = "text_layer+ocr"
+
+        logger.info(f"[PDF_ROUTER] {filename}: {page_count - ocr_count} text-layer and {ocr_count} OCR pages, "
+                    f"{len(text)} chars in {time.time() - started:.1f}s")
+        return {"text": text, "page_count": page_count, "method": method, "pages": pages}
+
+
+# Global instance
+pdf_extraction_router = PdfExtractionRouter()
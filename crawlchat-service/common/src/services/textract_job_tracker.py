@@ -0,0 +1,286 @@
+"""
+Completion tracking for asynchronous Textract jobs.
+One coroutine polls every pending job with adaptive backoff (status calls run
+in the default executor so the event loop is never blocked) and can be woken
+early by a notification channel: Textract's SNS topic delivered to an SQS
+queue, or an in-process stand-in for tests.
+"""
+
+import logging
+import asyncio
+import json
+import itertools
+import time
+from typing import List, Dict, Any, Optional, Callable, Tuple
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = {"SUCCEEDED", "FAILED", "PARTIAL_SUCCESS"}
+THROTTLING_ERROR_CODES = {"ThrottlingException", "ProvisionedThroughputExceededException", "LimitExceededException"}
+
+
+class _TrackedJob:
+    def __init__(self, job_id: str, future: asyncio.Future, interval: float, deadline: float):
+        self.job_id = job_id
+        self.future = future
+        self.interval = interval
+        self.next_poll = 0.0
+        self.deadline = deadline
+
+
+class TextractJobTracker:
+    """
+    Waits for many Textract jobs from a single polling coroutine.
+
+    Each job is first checked after ``initial_interval`` seconds; the interval
+    then grows by ``backoff`` up to ``max_interval``, so short documents
+    complete in about their own processing time while long jobs cost few
+    calls. With a notification channel the poll interval is only a safety net:
+    a completion notification triggers an immediate status check.
+    """
+
+    def __init__(self, get_status: Callable[[str], Dict[str, Any]], notifications=None,
+                 initial_interval: float = 0.5, max_interval: float = 5.0, backoff: float = 1.5,
+                 default_timeout: float = 900.0):
+        self.get_status = get_status
+        self.notifications = notifications
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.default_timeout = default_timeout
+        self._jobs: Dict[str, _TrackedJob] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._poller: Optional[asyncio.Task] = None
+        self._listener: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # A new event loop (e.g. one asyncio.run per Lambda invocation): state of the old one is unusable
+            self._loop = loop
+            self._jobs = {}
+            self._poller = None
+            self._listener = None
+            self._wakeup = asyncio.Event()
+        return loop
+
+    async def wait(self, job_id: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Wait for a job to reach a terminal status and return its last status response.
+
+        Raises asyncio.TimeoutError when the job is still running after
+        ``timeout`` seconds (default ``default_timeout``).
+        """
+        loop = self._bind_loop()
+        job = self._jobs.get(job_id)
+        if job is None:
+            deadline = loop.time() + (timeout if timeout is not None else self.default_timeout)
+            job = _TrackedJob(job_id, loop.create_future(), self.initial_interval, deadline)
+            job.next_poll = loop.time() + self.initial_interval
+            self._jobs[job_id] = job
+            self._wakeup.set()
+        self._ensure_tasks()
+        return await asyncio.shield(job.future)
+
+    async def wait_many(self, job_ids: List[str], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Wait for several jobs; maps each job id to its status response or its exception."""
+        results = await asyncio.gather(*[self.wait(job_id, timeout) for job_id in job_ids], return_exceptions=True)
+        return dict(zip(job_ids, results))
+
+    def pending_jobs(self) -> List[str]:
+        return list(self._jobs)
+
+    def _ensure_tasks(self):
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.create_task(self._poll_loop())
+        if self.notifications is not None and (self._listener is None or self._listener.done()):
+            self._listener = asyncio.create_task(self._listen_loop())
+
+    def _finish(self, job: _TrackedJob, result: Optional[Dict[str, Any]] = None, error: Optional[BaseException] = None):
+        self._jobs.pop(job.job_id, None)
+        if job.future.done():
+            return
+        if error is not None:
+            job.future.set_exception(error)
+        else:
+            job.future.set_result(result)
+
+    async def _poll(self, job: _TrackedJob):
+        loop = asyncio.get_running_loop()
+        try:
+            response = await loop.run_in_executor(None, self.get_status, job.job_id)
+        except Exception as e:
+            error_code = ((getattr(e, "response", None) or {}).get("Error") or {}).get("Code", "")
+            if error_code in THROTTLING_ERROR_CODES:
+                job.interval = min(self.max_interval, job.interval * 2)
+                job.next_poll = loop.time() + job.interval
+                logger.warning(f"[TEXTRACT_JOBS] Throttled checking {job.job_id}, next check in {job.interval:.1f}s")
+                return
+            self._finish(job, error=e)
+            return
+
+        status = response.get("JobStatus")
+        if status in TERMINAL_STATUSES:
+            self._finish(job, result=response)
+            return
+        job.interval = min(self.max_interval, job.interval * self.backoff)
+        job.next_poll = loop.time() + job.interval
+
+    async def _poll_loop(self):
+        try:
+            await self._run_polls()
+        except Exception as e:
+            # The poller also enforces deadlines: never leave waiters hanging without it
+            logger.error(f"[TEXTRACT_JOBS] Poller failed, failing {len(self._jobs)} pending jobs: {e}")
+            for job in list(self._jobs.values()):
+                self._finish(job, error=e)
+        finally:
+            if self._listener is not None:
+                self._listener.cancel()
+
+    async def _run_polls(self):
+        loop = asyncio.get_running_loop()
+        while self._jobs:
+            now = loop.time()
+            for job in [job for job in self._jobs.values() if job.deadline <= now]:
+                self._finish(job, error=asyncio.TimeoutError(f"Textract job {job.job_id} did not finish in time"))
+
+            due = [job for job in self._jobs.values() if job.next_poll <= now]
+            if due:
+                await asyncio.gather(*[self._poll(job) for job in due])
+                continue
+            if not self._jobs:
+                break
+
+            wake_at = min(min(job.next_poll, job.deadline) for job in self._jobs.values())
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.0, wake_at - loop.time()))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _listen_loop(self):
+        loop = asyncio.get_running_loop()
+        while self._jobs:
+            try:
+                events = await self.notifications.receive()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"[TEXTRACT_JOBS] Notification channel error, relying on polling: {e}")
+                await asyncio.sleep(self.max_interval)
+                continue
+            for job_id, status in events:
+                job = self._jobs.get(job_id)
+                if job is not None:
+                    logger.info(f"[TEXTRACT_JOBS] Notified: job {job_id} is {status}")
+                    job.next_poll = loop.time()
+                    self._wakeup.set()
+
+
+class SqsNotificationChannel:
+    """
+    Textract completion notifications from an SQS queue subscribed to the job's SNS topic.
+
+    Give every instance its own queue: received messages are deleted, and
+    notifications of jobs this instance does not track are ignored (polling
+    still covers a missed notification).
+    """
+
+    def __init__(self, sqs_client, queue_url: str, wait_seconds: int = 10):
+        self.sqs_client = sqs_client
+        self.queue_url = queue_url
+        self.wait_seconds = wait_seconds
+
+    @staticmethod
+    def parse_message(body: str) -> Optional[Tuple[str, str]]:
+        """(job id, status) from an SQS body, either an SNS envelope or raw message delivery."""
+        payload = json.loads(body)
+        if "Message" in payload and isinstance(payload["Message"], str):
+            payload = json.loads(payload["Message"])
+        if "JobId" not in payload:
+            return None
+        return payload["JobId"], payload.get("Status", "")
+
+    def _receive_sync(self) -> List[Tuple[str, str]]:
+        response = self.sqs_client.receive_message(
+            QueueUrl=self.queue_url, MaxNumberOfMessages=10, WaitTimeSeconds=self.wait_seconds
+        )
+        events = []
+        entries = []
+        for index, message in enumerate(response.get("Messages", [])):
+            try:
+                event = self.parse_message(message["Body"])
+                if event:
+                    events.append(event)
+            except Exception as e:
+                logger.warning(f"[TEXTRACT_JOBS] Ignoring unreadable notification: {e}")
+            entries.append({"Id": str(index), "ReceiptHandle": message["ReceiptHandle"]})
+        if entries:
+            self.sqs_client.delete_message_batch(QueueUrl=self.queue_url, Entries=entries)
+        return events
+
+    async def receive(self) -> List[Tuple[str, str]]:
+        """Long-poll the queue once (in the default executor) and return (job id, status) events."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._receive_sync)
+
+
+class LocalNotificationChannel:
+    """In-process notification channel for tests and local runs."""
+
+    def __init__(self, wait_seconds: float = 1.0):
+        self.wait_seconds = wait_seconds
+        self._events: List[Tuple[str, str]] = []
+        self._available: Optional[asyncio.Event] = None
+
+    def publish(self, job_id: str, status: str = "SUCCEEDED"):
+        self._events.append((job_id, status))
+        if self._available is not None:
+            self._available.set()
+
+    async def receive(self) -> List[Tuple[str, str]]:
+        if self._available is None:
+            self._available = asyncio.Event()
+        if not self._events:
+            self._available.clear()
+            try:
+                await asyncio.wait_for(self._available.wait(), timeout=self.wait_seconds)
+            except asyncio.TimeoutError:
+                return []
+        events, self._events = self._events, []
+        return events
+
+
+class LocalTextractJobs:
+    """
+    Stand-in for Textract's asynchronous analysis API.
+
+    Jobs finish after a given duration with a given status and, when a
+    LocalNotificationChannel is attached, publish their completion to it.
+    Must be used from a running event loop.
+    """
+
+    def __init__(self, notifications: Optional[LocalNotificationChannel] = None):
+        self.notifications = notifications
+        self.status_calls = 0
+        self._jobs: Dict[str, Tuple[float, str]] = {}
+        self._ids = itertools.count(1)
+
+    def start_document_analysis(self, duration: float = 1.0, status: str = "SUCCEEDED", **kwargs) -> Dict[str, Any]:
+        job_id = f"local-job-{next(self._ids)}"
+        self._jobs[job_id] = (time.monotonic() + duration, status)
+        if self.notifications is not None:
+            asyncio.get_running_loop().call_later(duration, self.notifications.publish, job_id, status)
+        return {"JobId": job_id}
+
+    def get_document_analysis(self, JobId: str, **kwargs) -> Dict[str, Any]:
+        self.status_calls += 1
+        finishes_at, status = self._jobs[JobId]
+        if time.monotonic() < finishes_at:
+            return {"JobStatus": "IN_PROGRESS", "Blocks": []}
+        response = {"JobStatus": status, "Blocks": []}
+        if status == "FAILED":
+            response["StatusMessage"] = "Simulated failure"
+        return response
@@ -9,45 +9,135 @@ import os
 from typing import List, Dict, Any, Optional, Union
 from datetime import datetime
 import uuid
+import time
 import asyncio
 from pathlib import Path
 
-from openai import OpenAI
+from openai import AsyncOpenAI
 from common.src.models.documents import Document
 from common.src.core.database import mongodb
 from common.src.core.config import config
+from common.src.core.openai_client import get_openai_client
 from common.src.core.exceptions import VectorStoreError, DatabaseError
 from common.src.services.s3_upload_service import s3_upload_service
 
 logger = logging.getLogger(__name__)
 
+# File statuses after which a vector store file will not change any more
+TERMINAL_FILE_STATUSES = {"completed", "processed", "failed", "cancelled"}
+READY_FILE_STATUSES = {"completed", "processed"}
+
+
+class _StoreReadiness:
+    """Cached file statuses of one vector store."""
+    
+    def __init__(self):
+        self.files: Dict[str, str] = {}  # file_id -> status
+        self.checked_at: float = 0.0
+        self.poller: Optional[asyncio.Task] = None
+        self.ready_event: Optional[asyncio.Event] = None
+        self.event_loop: Optional[asyncio.AbstractEventLoop] = None  # loop ready_event belongs to
+    
+    @property
+    def ready_count(self) -> int:
+        return sum(1 for status in self.files.values() if status in READY_FILE_STATUSES)
+    
+    @property
+    def pending_count(self) -> int:
+        return sum(1 for status in self.files.values() if status not in TERMINAL_FILE_STATUSES)
+    
+    @property
+    def all_settled(self) -> bool:
+        return self.checked_at > 0 and self.pending_count == 0
+
+
+class VectorStoreReadiness:
+    """
+    Tracks which files of each vector store are processed.
+    
+    Statuses are cached for a short TTL and refreshed by a background poller
+    while files are still processing. Once every file of a store has settled,
+    the cached state stays valid until a new file is uploaded, so searches skip
+    the file listing entirely.
+    """
+    
+    def __init__(self, ttl_seconds: float = 10.0):
+        self.ttl_seconds = ttl_seconds
+        self._stores: Dict[str, _StoreReadiness] = {}
+    
+    def get(self, vector_store_id: str) -> _StoreReadiness:
+        state = self._stores.get(vector_store_id)
+        if state is None:
+            state = self._stores[vector_store_id] = _StoreReadiness()
+        return state
+    
+    def is_fresh(self, vector_store_id: str) -> bool:
+        """Whether the cached state can be used without listing files again."""
+        state = self._stores.get(vector_store_id)
+        if state is None or not state.checked_at:
+            return False
+        return state.all_settled or time.monotonic() - state.checked_at < self.ttl_seconds
+    
+    def record_files(self, vector_store_id: str, files: List[Dict[str, Any]]):
+        """Replace the cached statuses with a fresh file listing."""
+        state = self.get(vector_store_id)
+        state.files = {file.get("id"): file.get("status", "unknown") for file in files}
+        state.checked_at = time.monotonic()
+        self._notify(state)
+    
+    def update_file(self, vector_store_id: str, file_id: str, status: str):
+        """Record the status of a single file (e.g. right after upload)."""
+        state = self.get(vector_store_id)
+        state.files[file_id] = status
+        if not state.checked_at:
+            # Only this file is known; list the store on the next search
+            return
+        self._notify(state)
+    
+    def forget_file(self, vector_store_id: str, file_id: str):
+        state = self._stores.get(vector_store_id)
+        if state:
+            state.files.pop(file_id, None)
+            self._notify(state)
+    
+    def forget_store(self, vector_store_id: str):
+        state = self._stores.pop(vector_store_id, None)
+        if state and state.poller and not state.poller.done():
+            state.poller.cancel()
+    
+    def _notify(self, state: _StoreReadiness):
+        if state.ready_event is None:
+            return
+        if state.ready_count or state.all_settled:
+            state.ready_event.set()
+        else:
+            state.ready_event.clear()
+
+
 class VectorStoreService:
     """Service for managing vector stores using OpenAI's Vector Store API."""
     
-    def __init__(self):
-        self.client = None  # Lazy initialization
+    def __init__(self, client: Optional[AsyncOpenAI] = None, local_store=None):
+        self.client = client  # Shared process-wide client unless one is injected
         self.vector_store_id = None
         self.session_vector_stores = {}  # Cache for session-specific vector stores
+        self.readiness = VectorStoreReadiness(ttl_seconds=config.vector_store_readiness_ttl)
+        # Local retrieval backend (chunking, embeddings and index in-process) instead of OpenAI vector stores
+        self.local_store = local_store
+        if self.local_store is None and config.vector_store_backend == "local":
+            from common.src.services.local_vector_store import LocalVectorStore
+            self.local_store = LocalVectorStore()
+            logger.info("[VECTOR_STORE] Using local retrieval backend")
     
-    def _get_client(self) -> OpenAI:
-        """Get OpenAI client with lazy initialization."""
-        if self.client is None:
-            self.client = self._initialize_openai_client()
-        return self.client
-    
-    def _initialize_openai_client(self) -> OpenAI:
-        """Initialize OpenAI client with API key from environment variables."""
+    def _get_client(self) -> Optional[AsyncOpenAI]:
+        """Get the injected OpenAI client or the shared async client."""
+        if self.client is not None:
+            return self.client
         try:
-            import os
-            
-            # Get API key from environment variable
-            api_key = os.environ.get('OPENAI_API_KEY')
-            if not api_key:
+            client = get_openai_client()
+            if client is None:
                 logger.warning("[VECTOR_STORE] OPENAI_API_KEY environment variable not found - vector store features will be disabled")
-                return None
-            
-            return OpenAI(api_key=api_key)
-            
+            return client
         except Exception as e:
             logger.error(f"[VECTOR_STORE] Error initializing OpenAI client: {e}")
             return None
@@ -55,13 +145,17 @@ class VectorStoreService:
     async def create_vector_store(self, name: str = "Stock Market Data") -> str:
         """Create a new vector store."""
         try:
+            if self.local_store:
+                self.vector_store_id = await self.local_store.create_store(name)
+                return self.vector_store_id
+            
             client = self._get_client()
             if client is None:
                 raise ValueError("OpenAI client not available - check OPENAI_API_KEY environment variable")
             
             logger.info(f"[VECTOR_STORE] Creating vector store: {name}")
             
-            vector_store = client.vector_stores.create(name=name)
+            vector_store = await client.vector_stores.create(name=name)
             self.vector_store_id = vector_store.id
             
             logger.info(f"[VECTOR_STORE] Created vector store with ID: {self.vector_store_id}")
@@ -74,12 +168,15 @@ class VectorStoreService:
     async def get_or_create_vector_store(self, name: str = "Stock Market Data") -> str:
         """Get existing vector store or create a new one."""
         try:
+            if self.local_store:
+                return await self.create_vector_store(name)
+            
             client = self._get_client()
             if client is None:
                 raise ValueError("OpenAI client not available - check OPENAI_API_KEY environment variable")
             
             # First, try to list existing vector stores
-            vector_stores = client.vector_stores.list()
+            vector_stores = await client.vector_stores.list()
             
             # Look for a vector store with the given name
             for store in vector_stores.data:
@@ -98,10 +195,6 @@ class VectorStoreService:
     async def get_or_create_session_vector_store(self, session_id: str) -> str:
         """Get or create a session-specific vector store."""
         try:
-            client = self._get_client()
-            if client is None:
-                raise ValueError("OpenAI client not available - check OPENAI_API_KEY environment variable")
-            
             # Check if we already have this session's vector store cached
             if session_id in self.session_vector_stores:
                 logger.info(f"[VECTOR_STORE] Using cached session vector store: {self.session_vector_stores[session_id]}")
@@ -110,8 +203,17 @@ class VectorStoreService:
             # Create a unique name for this session's vector store
             session_store_name = f"Session_{session_id[:8]}_Data"
             
+            if self.local_store:
+                vector_store_id = await self.create_vector_store(session_store_name)
+                self.session_vector_stores[session_id] = vector_store_id
+                return vector_store_id
+            
+            client = self._get_client()
+            if client is None:
+                raise ValueError("OpenAI client not available - check OPENAI_API_KEY environment variable")
+            
             # First, try to list existing vector stores
-            vector_stores = client.vector_stores.list()
+            vector_stores = await client.vector_stores.list()
             
             # Look for a vector store with the session-specific name
             for store in vector_stores.data:
@@ -145,6 +247,10 @@ class VectorStoreService:
             
             logger.info(f"[VECTOR_STORE] Uploading file: {file_path}")
             
+            if self.local_store:
+                text = Path(file_path).read_text(encoding="utf-8", errors="ignore")
+                return await self.local_store.add_text(vector_store_id, text, Path(file_path).name)
+            
             # Upload file without polling to prevent timeouts
             client = self._get_client()
             if client is None:
@@ -152,12 +258,15 @@ class VectorStoreService:
             
             with open(file_path, "rb") as file:
                 # Use upload instead of upload_and_poll to avoid blocking
-                vector_store_file = client.vector_stores.files.upload(
+                vector_store_file = await client.vector_stores.files.upload(
                     vector_store_id=vector_store_id,
                     file=file
                 )
             
             logger.info(f"[VECTOR_STORE] Successfully uploaded file: {vector_store_file.id} (status: {vector_store_file.status})")
+            self.readiness.update_file(vector_store_id, vector_store_file.id, vector_store_file.status)
+            if vector_store_file.status not in TERMINAL_FILE_STATUSES:
+                self._ensure_readiness_poller(vector_store_id)
             return vector_store_file.id
             
         except Exception as e:
@@ -174,16 +283,27 @@ class VectorStoreService:
             if not vector_store_id:
                 vector_store_id = self.vector_store_id or await self.get_or_create_vector_store()
             
+            if self.local_store:
+                file_record = await self.local_store.get_file(vector_store_id, file_id)
+                return {
+                    "file_id": file_id,
+                    "status": file_record["status"] if file_record else "error",
+                    "error": None if file_record else "File not found",
+                    "usage": None
+                }
+            
             client = self._get_client()
             if client is None:
                 raise ValueError("OpenAI client not available - check OPENAI_API_KEY environment variable")
             
             # Get file status
-            file_status = client.vector_stores.files.retrieve(
+            file_status = await client.vector_stores.files.retrieve(
                 file_id=file_id,
                 vector_store_id=vector_store_id
             )
             
+            self.readiness.update_file(vector_store_id, file_id, file_status.status)
+            
             return {
                 "file_id": file_id,
                 "status": file_status.status,
@@ -203,13 +323,27 @@ class VectorStoreService:
         self, 
         text: str, 
         filename: str,
-        vector_store_id: Optional[str] = None
+        vector_store_id: Optional[str] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+        paragraphs: Optional[List[Dict[str, Any]]] = None
     ) -> str:
-        """Upload text content to the vector store by creating a temporary file."""
+        """
+        Upload text content to the vector store by creating a temporary file.
+        
+        ``attributes`` and ``paragraphs`` (e.g. from
+        AWSTextractService.extract_paragraphs_for_vector_storage) are used by the
+        local backend, which chunks and labels the text itself; the OpenAI backend
+        chunks server-side.
+        """
         try:
             if not vector_store_id:
                 vector_store_id = self.vector_store_id or await self.get_or_create_vector_store()
             
+            if self.local_store:
+                return await self.local_store.add_text(
+                    vector_store_id, text, filename, attributes=attributes, paragraphs=paragraphs
+                )
+            
             # Create a temporary file with the text content
             # Use /tmp directory in Lambda environment
             temp_dir = Path("/tmp")
@@ -253,6 +387,10 @@ class VectorStoreService:
             
             logger.info(f"[VECTOR_STORE] Searching for: {query[:50]}...")
             
+            if self.local_store:
+                # Local indexes are searchable as soon as a file is added; no readiness wait
+                return await self.local_store.search(vector_store_id, query, max_results, score_threshold)
+            
             # Prepare search parameters
             search_params = {
                 "vector_store_id": vector_store_id,
@@ -266,44 +404,8 @@ class VectorStoreService:
                     "score_threshold": score_threshold
                 }
             
-            # Check if vector store has files before searching
-            try:
-                files = await self.list_vector_store_files(vector_store_id)
-                logger.info(f"[VECTOR_STORE] Vector store has {len(files)} files before search")
-                if files:
-                    processed_files = 0
-                    for file in files:
-                        status = file.get('status', 'Unknown')
-                        logger.info(f"[VECTOR_STORE] File: {file.get('filename', 'Unknown')} - Status: {status}")
-                        # Check for both 'processed' and 'completed' status
-                        if status in ['processed', 'completed']:
-                            processed_files += 1
-                    logger.info(f"[VECTOR_STORE] {processed_files}/{len(files)} files are processed and ready for search")
-                    
-                    # If no files are processed, try to wait a bit and retry
-                    if processed_files == 0:
-                        logger.warning(f"[VECTOR_STORE] No files are processed yet, waiting 3 seconds and retrying...")
-                        import asyncio
-                        await asyncio.sleep(3)
-                        
-                        # Retry once
-                        files = await self.list_vector_store_files(vector_store_id)
-                        processed_files = 0
-                        for file in files:
-                            status = file.get('status', 'Unknown')
-                            if status in ['processed', 'completed']:
-                                processed_files += 1
-                        
-                        if processed_files == 0:
-                            logger.warning(f"[VECTOR_STORE] Still no files processed after retry, but will attempt search anyway")
-                            # Don't return empty results immediately, try the search anyway
-                    else:
-                        # If files are processed, add a small delay to ensure they're fully ready
-                        logger.info(f"[VECTOR_STORE] Files are processed, adding 1 second delay to ensure readiness")
-                        import asyncio
-                        await asyncio.sleep(1)
-            except Exception as e:
-                logger.error(f"[VECTOR_STORE] Error listing files before search: {e}")
+            # Make sure files are processed, using cached readiness instead of listing every time
+            await self._await_search_readiness(vector_store_id)
             
             # Perform search with retry mechanism
             logger.info(f"[VECTOR_STORE] Search params: {search_params}")
@@ -316,18 +418,17 @@ class VectorStoreService:
                     if client is None:
                         raise ValueError("OpenAI client not available - check OPENAI_API_KEY environment variable")
                     
-                    results = client.vector_stores.search(**search_params)
+                    results = await client.vector_stores.search(**search_params)
                     logger.info(f"[VECTOR_STORE] Search API call successful (attempt {attempt + 1})")
                     break
                 except Exception as search_error:
                     logger.error(f"[VECTOR_STORE] Search API error (attempt {attempt + 1}): {search_error}")
                     if attempt < max_retries - 1:
                         logger.info(f"[VECTOR_STORE] Retrying in {retry_delay} seconds...")
-                        import asyncio
                         await asyncio.sleep(retry_delay)
                         retry_delay *= 2  # Exponential backoff
                     else:
-                        logger.error(f"[VECTOR_STORE] All search attempts failed")
+                        logger.error("[VECTOR_STORE] All search attempts failed")
                         # If search fails, return empty results
                         return {
                             "results": [],
@@ -351,6 +452,86 @@ class VectorStoreService:
             logger.error(f"[VECTOR_STORE] Error searching vector store: {e}")
             raise
     
+    async def _await_search_readiness(self, vector_store_id: str):
+        """
+        Check that a vector store has processed files before searching.
+        
+        Uses the cached readiness state; the store is only listed when the cache
+        is stale. When no file is processed yet the search waits for the
+        background poller, returning as soon as a file is ready or after
+        ``vector_store_ready_wait`` seconds.
+        """
+        try:
+            if not self.readiness.is_fresh(vector_store_id):
+                await self.refresh_readiness(vector_store_id)
+            state = self.readiness.get(vector_store_id)
+            
+            if state.all_settled:
+                logger.info(f"[VECTOR_STORE] {state.ready_count}/{len(state.files)} files ready for search")
+                return
+            
+            self._ensure_readiness_poller(vector_store_id)
+            if state.ready_count == 0:
+                logger.info(f"[VECTOR_STORE] No files processed yet, waiting up to {config.vector_store_ready_wait}s")
+                try:
+                    await asyncio.wait_for(state.ready_event.wait(), timeout=config.vector_store_ready_wait)
+                except asyncio.TimeoutError:
+                    logger.warning("[VECTOR_STORE] Still no files processed, searching anyway")
+            
+            logger.info(f"[VECTOR_STORE] {state.ready_count}/{len(state.files)} files ready for search ({state.pending_count} processing)")
+            
+        except Exception as e:
+            logger.error(f"[VECTOR_STORE] Error checking vector store readiness: {e}")
+    
+    async def refresh_readiness(self, vector_store_id: str):
+        """List all files of a vector store and cache their statuses."""
+        client = self._get_client()
+        if client is None:
+            raise ValueError("OpenAI client not available - check OPENAI_API_KEY environment variable")
+        
+        # Iterating the page follows the cursor, so stores with many files are fully listed
+        files = [file.model_dump() async for file in client.vector_stores.files.list(vector_store_id=vector_store_id, limit=100)]
+        self.readiness.record_files(vector_store_id, files)
+    
+    def _ensure_readiness_poller(self, vector_store_id: str):
+        """Start the background poller for a store with processing files."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        
+        state = self.readiness.get(vector_store_id)
+        if state.poller and not state.poller.done() and state.poller.get_loop() is loop:
+            return
+        if state.ready_event is None or state.event_loop is not loop:
+            state.ready_event = asyncio.Event()
+            state.event_loop = loop
+            self.readiness._notify(state)
+        state.poller = loop.create_task(self._poll_readiness(vector_store_id))
+    
+    async def _poll_readiness(self, vector_store_id: str):
+        """Refresh file statuses with backoff until every file has settled."""
+        interval = config.vector_store_poll_interval
+        deadline = time.monotonic() + config.vector_store_poll_timeout
+        try:
+            while time.monotonic() < deadline:
+                try:
+                    await self.refresh_readiness(vector_store_id)
+                except Exception as e:
+                    logger.warning(f"[VECTOR_STORE] Readiness poll failed for {vector_store_id}: {e}")
+                
+                state = self.readiness.get(vector_store_id)
+                if state.all_settled:
+                    logger.info(f"[VECTOR_STORE] All {len(state.files)} files settled in {vector_store_id}")
+                    return
+                
+                await asyncio.sleep(interval)
+                interval = min(interval * 2, config.vector_store_max_poll_interval)
+            
+            logger.warning(f"[VECTOR_STORE] Stopped polling {vector_store_id} after {config.vector_store_poll_timeout}s")
+        except asyncio.CancelledError:
+            pass
+    
     async def synthesize_response(
         self, 
         query: str, 
@@ -370,7 +551,7 @@ class VectorStoreService:
             if client is None:
                 return "OpenAI client not available - check OPENAI_API_KEY environment variable"
             
-            completion = client.chat.completions.create(
+            completion = await client.chat.completions.create(
                 model=model,
                 messages=[
                     {
@@ -422,11 +603,14 @@ class VectorStoreService:
             if not vector_store_id:
                 vector_store_id = self.vector_store_id or await self.get_or_create_vector_store()
             
+            if self.local_store:
+                return await self.local_store.list_files(vector_store_id)
+            
             client = self._get_client()
             if client is None:
                 raise ValueError("OpenAI client not available - check OPENAI_API_KEY environment variable")
             
-            files = client.vector_stores.files.list(vector_store_id=vector_store_id)
+            files = await client.vector_stores.files.list(vector_store_id=vector_store_id)
             return [file.model_dump() for file in files.data]
             
         except Exception as e:
@@ -443,16 +627,20 @@ class VectorStoreService:
             if not vector_store_id:
                 vector_store_id = self.vector_store_id or await self.get_or_create_vector_store()
             
+            if self.local_store:
+                return await self.local_store.delete_file(vector_store_id, file_id)
+            
             client = self._get_client()
             if client is None:
                 raise ValueError("OpenAI client not available - check OPENAI_API_KEY environment variable")
             
-            client.vector_stores.files.delete(
+            await client.vector_stores.files.delete(
                 vector_store_id=vector_store_id,
                 file_id=file_id
             )
             
             logger.info(f"[VECTOR_STORE] Deleted file: {file_id}")
+            self.readiness.forget_file(vector_store_id, file_id)
             return True
             
         except Exception as e:
@@ -469,13 +657,19 @@ class VectorStoreService:
                 logger.warning("[VECTOR_STORE] No vector store ID provided for deletion")
                 return False
             
+            if self.local_store:
+                deleted = await self.local_store.delete_store(vector_store_id)
+                self.vector_store_id = None
+                return deleted
+            
             client = self._get_client()
             if client is None:
                 raise ValueError("OpenAI client not available - check OPENAI_API_KEY environment variable")
             
-            client.vector_stores.delete(vector_store_id=vector_store_id)
+            await client.vector_stores.delete(vector_store_id=vector_store_id)
             
             logger.info(f"[VECTOR_STORE] Deleted vector store: {vector_store_id}")
+            self.readiness.forget_store(vector_store_id)
             self.vector_store_id = None
             return True
             
@@ -489,11 +683,14 @@ class VectorStoreService:
             if not vector_store_id:
                 vector_store_id = self.vector_store_id or await self.get_or_create_vector_store()
             
+            if self.local_store:
+                return await self.local_store.store_info(vector_store_id)
+            
             client = self._get_client()
             if client is None:
                 raise ValueError("OpenAI client not available - check OPENAI_API_KEY environment variable")
             
-            store_info = client.vector_stores.retrieve(vector_store_id=vector_store_id)
+            store_info = await client.vector_stores.retrieve(vector_store_id=vector_store_id)
             return store_info.model_dump()
             
         except Exception as e:
@@ -511,11 +708,14 @@ class VectorStoreService:
             if not vector_store_id:
                 vector_store_id = self.vector_store_id or await self.get_or_create_vector_store()
             
+            if self.local_store:
+                return await self.local_store.update_attributes(vector_store_id, file_id, attributes)
+            
             client = self._get_client()
             if client is None:
                 raise ValueError("OpenAI client not available - check OPENAI_API_KEY environment variable")
             
-            client.vector_stores.files.update(
+            await client.vector_stores.files.update(
                 vector_store_id=vector_store_id,
                 file_id=file_id,
                 attributes=attributes
@@ -540,6 +740,10 @@ class VectorStoreService:
             if not vector_store_id:
                 vector_store_id = self.vector_store_id or await self.get_or_create_vector_store()
             
+            if self.local_store:
+                # Local files are indexed synchronously
+                return await self.check_file_upload_status(file_id, vector_store_id)
+            
             client = self._get_client()
             if client is None:
                 raise ValueError("OpenAI client not available - check OPENAI_API_KEY environment variable")
@@ -556,12 +760,13 @@ class VectorStoreService:
                     }
                 
                 # Get current status
-                file_status = client.vector_stores.files.retrieve(
+                file_status = await client.vector_stores.files.retrieve(
                     file_id=file_id,
                     vector_store_id=vector_store_id
                 )
                 
                 logger.info(f"[VECTOR_STORE] File {file_id} status: {file_status.status}")
+                self.readiness.update_file(vector_store_id, file_id, file_status.status)
                 
                 # Check if processing is complete
                 if file_status.status in ["completed", "failed", "cancelled"]:
@@ -0,0 +1,106 @@
+"""
+BM25 keyword ranking and reciprocal-rank fusion.
+Pure Python so that keyword retrieval works with either vector store backend.
+"""
+
+import re
+import math
+from collections import Counter
+from typing import List, Dict, Any, Callable, Hashable, Iterable, Tuple
+
+# Figures keep their decimal point; thousands separators (1,200,000 or 12,00,000) are dropped
+_TOKEN = re.compile(r"\d+(?:,\d{2,3}(?!\d))*(?:\.\d+)?|[a-z][a-z0-9]*(?:[.&'][a-z0-9]+)*")
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "in", "is", "it",
+    "its", "of", "on", "or", "that", "the", "this", "to", "was", "were", "what", "which", "with",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased terms with figures, dates and tickers kept intact."""
+    tokens = []
+    for token in _TOKEN.findall((text or "").lower()):
+        if token[0].isdigit():
+            tokens.append(token.replace(",", ""))
+        elif token not in STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a list of documents (chunks).
+
+    Each document is stored as a term-frequency map; the inverted index maps
+    terms to the documents containing them so a query only scores documents
+    sharing at least one term with it.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.documents: List[Dict[str, Any]] = []
+        self.term_frequencies: List[Dict[str, int]] = []
+        self.lengths: List[int] = []
+        self.postings: Dict[str, List[int]] = {}
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def add(self, document: Dict[str, Any], term_frequencies: Dict[str, int]):
+        """Add a document with precomputed term frequencies (see term_frequencies())."""
+        doc_index = len(self.documents)
+        self.documents.append(document)
+        self.term_frequencies.append(term_frequencies)
+        length = sum(term_frequencies.values())
+        self.lengths.append(length)
+        self.total_length += length
+        for term in term_frequencies:
+            self.postings.setdefault(term, []).append(doc_index)
+
+    def idf(self, term: str) -> float:
+        document_frequency = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self.documents) - document_frequency + 0.5) / (document_frequency + 0.5))
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[int, float]]:
+        """Return up to k (document index, score) pairs, best first."""
+        if not self.documents:
+            return []
+        average_length = self.total_length / len(self.documents) or 1.0
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf(term)
+            for doc_index in postings:
+                tf = self.term_frequencies[doc_index][term]
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[doc_index] / average_length)
+                scores[doc_index] = scores.get(doc_index, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+
+
+def term_frequencies(text: str) -> Dict[str, int]:
+    return dict(Counter(tokenize(text)))
+
+
+def reciprocal_rank_fusion(ranked_lists: Iterable[List[Any]], key: Callable[[Any], Hashable],
+                           k: int = 60) -> List[Tuple[Any, float, List[int]]]:
+    """
+    Fuse ranked lists with RRF: score(d) = sum over lists of 1 / (k + rank).
+
+    Returns (item, fused score, indexes of the lists that contained it), best
+    first; the item kept is its first occurrence across the lists.
+    """
+    fused: Dict[Hashable, List[Any]] = {}
+    for list_index, ranked in enumerate(ranked_lists):
+        for rank, item in enumerate(ranked, start=1):
+            item_key = key(item)
+            entry = fused.setdefault(item_key, [item, 0.0, []])
+            if list_index in entry[2]:
+                continue
+            entry[1] += 1.0 / (k + rank)
+            entry[2].append(list_index)
+    return sorted((tuple(entry) for entry in fused.values()), key=lambda entry: -entry[1])
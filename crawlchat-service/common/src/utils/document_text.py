@@ -0,0 +1,131 @@
+"""
+Text extraction from PDF and Office files.
+Plain top-level functions with no service imports, so that they can run in
+worker processes (see services/extraction_executor.py) as well as in-process.
+"""
+
+import io
+import signal
+import hashlib
+import threading
+from typing import List, Tuple, Optional, Callable, Any
+
+# Reader of the last PDF seen by this worker, so consecutive page ranges of one file parse it once
+_reader_cache = threading.local()
+
+
+class ExtractionTimeout(Exception):
+    """An extraction task ran longer than its time limit."""
+
+
+def limit_worker_memory(limit_mb: int):
+    """Worker initializer: cap the address space so a hostile file raises MemoryError instead of exhausting the host."""
+    if not limit_mb:
+        return
+    try:
+        import resource
+        limit = limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError):
+        # No resource module (Windows) or the limit is not permitted here
+        pass
+
+
+def _raise_timeout(signum, frame):
+    raise ExtractionTimeout("extraction task timed out")
+
+
+def run_with_time_limit(fn: Callable[..., Any], timeout: Optional[float], *args) -> Any:
+    """
+    Call fn(*args) with a time limit enforced inside the worker.
+
+    SIGALRM raises ExtractionTimeout at the next Python instruction; a task
+    stuck in native code is stopped by a CPU-time timer whose default action
+    ends the process (the executor then replaces the pool). Limits only apply
+    on the main thread of a process, i.e. in worker processes.
+    """
+    if not timeout or not hasattr(signal, "setitimer") or threading.current_thread() is not threading.main_thread():
+        return fn(*args)
+    previous = signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    signal.setitimer(signal.ITIMER_VIRTUAL, timeout * 2)
+    try:
+        return fn(*args)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.setitimer(signal.ITIMER_VIRTUAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+# === PDF ===
+
+def _pdf_reader(content: bytes):
+    digest = hashlib.blake2b(content, digest_size=16).digest()
+    if getattr(_reader_cache, "digest", None) != digest:
+        import PyPDF2
+        _reader_cache.reader = PyPDF2.PdfReader(io.BytesIO(content))
+        _reader_cache.digest = digest
+    return _reader_cache.reader
+
+
+def pdf_page_count(content: bytes) -> int:
+    return len(_pdf_reader(content).pages)
+
+
+def pdf_pages_text(content: bytes, page_indexes: Optional[List[int]] = None) -> List[Tuple[int, str, Optional[str]]]:
+    """
+    Text layer of the given pages (all pages when None) with PyPDF2.
+
+    Returns (page index, text, error) per page; a page that fails has empty
+    text and the error message, so one bad page does not lose its range.
+    """
+    reader = _pdf_reader(content)
+    if page_indexes is None:
+        page_indexes = range(len(reader.pages))
+    pages = []
+    for index in page_indexes:
+        try:
+            pages.append((index, reader.pages[index].extract_text() or "", None))
+        except ExtractionTimeout:
+            raise
+        except Exception as e:
+            pages.append((index, "", f"{type(e).__name__}: {e}"))
+    return pages
+
+
+def pdfminer_text(content: bytes) -> str:
+    """Whole-document text with pdfminer.six (slower, but reads some PDFs PyPDF2 cannot)."""
+    from pdfminer.high_level import extract_text
+    return extract_text(io.BytesIO(content)) or ""
+
+
+# === Office ===
+
+def spreadsheet_text(content: bytes) -> str:
+    """Every non-empty row of every sheet as "a | b | c", under a "Sheet: name" header."""
+    from openpyxl import load_workbook
+    workbook = load_workbook(io.BytesIO(content), data_only=True)
+    text_content = []
+    for sheet_name in workbook.sheetnames:
+        text_content.append(f"Sheet: {sheet_name}")
+        for row in workbook[sheet_name].iter_rows(values_only=True):
+            if any(cell is not None for cell in row):
+                text_content.append(" | ".join(str(cell) if cell is not None else "" for cell in row))
+    return '\n'.join(text_content)
+
+
+def presentation_text(content: bytes) -> str:
+    from pptx import Presentation
+    presentation = Presentation(io.BytesIO(content))
+    text_content = []
+    for slide in presentation.slides:
+        for shape in slide.shapes:
+            if hasattr(shape, "text"):
+                text_content.append(shape.text)
+    return '\n'.join(text_content)
+
+
+def word_text(content: bytes) -> str:
+    import docx
+    document = docx.Document(io.BytesIO(content))
+    return '\n'.join(paragraph.text for paragraph in document.paragraphs)
@@ -0,0 +1,80 @@
+"""
+Paragraph-aligned text chunking shared by the retrieval indexes.
+"""
+
+import re
+from typing import List, Dict, Any
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def _split_long(text: str, max_chars: int, overlap: int) -> List[str]:
+    """Split one oversized paragraph on sentence boundaries, hard-splitting runaway sentences."""
+    pieces = []
+    current = ""
+    for sentence in _SENTENCE_END.split(text):
+        while len(sentence) > max_chars:
+            pieces.append(sentence[:max_chars])
+            sentence = sentence[max_chars - overlap:]
+        if current and len(current) + len(sentence) + 1 > max_chars:
+            pieces.append(current)
+            # Carry the tail of the previous piece so context spans the boundary
+            carry_over = overlap and len(sentence) + overlap < max_chars
+            current = current[-overlap:] + " " + sentence if carry_over else sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def chunk_text(text: str, max_chars: int = 1500, overlap: int = 200) -> List[Dict[str, Any]]:
+    """
+    Split text into chunks of whole paragraphs of at most ``max_chars`` characters.
+
+    Returns:
+        List of {"text", "chunk_index"} dicts
+    """
+    paragraphs = [p.strip() for p in re.split(r"\n\s*\n", text or "") if p.strip()]
+    return chunk_paragraphs([{"text": p} for p in paragraphs], max_chars=max_chars, overlap=overlap)
+
+
+def chunk_paragraphs(paragraphs: List[Dict[str, Any]], max_chars: int = 1500, overlap: int = 200) -> List[Dict[str, Any]]:
+    """
+    Pack paragraphs into chunks of at most ``max_chars`` characters.
+
+    Accepts the output of AWSTextractService.extract_paragraphs_for_vector_storage
+    (or any dicts with "text" and optionally "page"); chunks keep the page range
+    they cover.
+
+    Returns:
+        List of {"text", "chunk_index"[, "page_start", "page_end"]} dicts
+    """
+    chunks = []
+    parts: List[str] = []
+    pages: List[int] = []
+    size = 0
+
+    def flush():
+        nonlocal parts, pages, size
+        if parts:
+            chunk = {"text": "\n\n".join(parts), "chunk_index": len(chunks)}
+            if pages:
+                chunk["page_start"], chunk["page_end"] = min(pages), max(pages)
+            chunks.append(chunk)
+        parts, pages, size = [], [], 0
+
+    for paragraph in paragraphs:
+        text = (paragraph.get("text") or "").strip()
+        if not text:
+            continue
+        page = paragraph.get("page")
+        for piece in (_split_long(text, max_chars, overlap) if len(text) > max_chars else [text]):
+            if size and size + len(piece) + 2 > max_chars:
+                flush()
+            parts.append(piece)
+            size += len(piece) + 2
+            if page is not None:
+                pages.append(page)
+    flush()
+    return chunks
@@ -0,0 +1,158 @@
+"""
+Indexed view of a Textract result.
+Builds id, type, page and relationship indexes over the blocks once so that
+text, form, table and paragraph extraction follow relationships by index
+instead of scanning the block list.
+"""
+
+from array import array
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+
+
+class BlockGraph:
+    """
+    Id, type, page and relationship indexes over the blocks of one Textract job.
+
+    Blocks are kept as returned by Textract (never copied) and addressed by
+    their position. Pages and bounding boxes live in flat arrays, and CHILD
+    and VALUE relationships are resolved once into lists of positions, so each
+    lookup is O(1) and each extraction is linear in the blocks it touches.
+    """
+
+    def __init__(self, blocks: List[Dict[str, Any]]):
+        self.blocks = blocks
+        count = len(blocks)
+        self.index: Dict[str, int] = {}
+        self.block_types: List[str] = [""] * count
+        self.by_type: Dict[str, List[int]] = {}
+        self.by_page: Dict[int, List[int]] = {}
+        self.pages = array("i", bytes(4 * count))
+        # left, top, width, height of block i at [4 * i : 4 * i + 4]
+        self.geometry = array("f", bytes(16 * count))
+        # last block listing each block as a CHILD (-1 for none)
+        self.parents = array("i", [-1]) * count
+
+        for position, block in enumerate(blocks):
+            block_type = block.get("BlockType", "UNKNOWN")
+            self.block_types[position] = block_type
+            self.by_type.setdefault(block_type, []).append(position)
+            page = block.get("Page") or 1
+            self.pages[position] = page
+            self.by_page.setdefault(page, []).append(position)
+            block_id = block.get("Id")
+            if block_id is not None:
+                self.index[block_id] = position
+            box = (block.get("Geometry") or {}).get("BoundingBox")
+            if box:
+                offset = 4 * position
+                self.geometry[offset] = box.get("Left", 0.0)
+                self.geometry[offset + 1] = box.get("Top", 0.0)
+                self.geometry[offset + 2] = box.get("Width", 0.0)
+                self.geometry[offset + 3] = box.get("Height", 0.0)
+
+        # Relationships are resolved after every id is known (children may precede parents)
+        self._children: List[Tuple[int, ...]] = [()] * count
+        self._values: List[Tuple[int, ...]] = [()] * count
+        for position, block in enumerate(blocks):
+            for relationship in block.get("Relationships") or ():
+                targets = tuple(self.index[i] for i in relationship.get("Ids", ()) if i in self.index)
+                if relationship.get("Type") == "CHILD":
+                    self._children[position] += targets
+                    for child in targets:
+                        self.parents[child] = position
+                elif relationship.get("Type") == "VALUE":
+                    self._values[position] += targets
+
+    @classmethod
+    def from_organized(cls, organized_blocks: Dict[str, List[Dict[str, Any]]]) -> "BlockGraph":
+        """Graph over blocks already grouped by type (the organize_blocks_by_type shape)."""
+        return cls([block for blocks in organized_blocks.values() for block in blocks])
+
+    def __len__(self) -> int:
+        return len(self.blocks)
+
+    # === Lookups ===
+
+    def get(self, block_id: str) -> Optional[Dict[str, Any]]:
+        position = self.index.get(block_id)
+        return self.blocks[position] if position is not None else None
+
+    def of_type(self, block_type: str) -> List[Dict[str, Any]]:
+        return [self.blocks[position] for position in self.by_type.get(block_type, ())]
+
+    def organized(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Blocks grouped by type, in document order."""
+        return {block_type: self.of_type(block_type) for block_type in self.by_type}
+
+    def type_counts(self) -> Dict[str, int]:
+        return {block_type: len(positions) for block_type, positions in self.by_type.items()}
+
+    @property
+    def page_count(self) -> int:
+        return len(self.by_type.get("PAGE", ())) or len(self.by_page)
+
+    def position(self, block: Dict[str, Any]) -> Optional[int]:
+        return self.index.get(block.get("Id")) if block else None
+
+    def children(self, position: int, block_type: Optional[str] = None) -> List[int]:
+        if block_type is None:
+            return list(self._children[position])
+        return [child for child in self._children[position] if self.block_types[child] == block_type]
+
+    def parent(self, position: int) -> Optional[int]:
+        parent = self.parents[position]
+        return parent if parent >= 0 else None
+
+    def top(self, position: int) -> float:
+        return self.geometry[4 * position + 1]
+
+    def height(self, position: int) -> float:
+        return self.geometry[4 * position + 3]
+
+    # === Extraction ===
+
+    def text(self, position: Optional[int]) -> str:
+        """Text of a block from its WORD children; selected checkboxes read as "X"."""
+        if position is None:
+            return ""
+        parts = []
+        for child in self._children[position]:
+            block_type = self.block_types[child]
+            if block_type == "WORD":
+                parts.append(self.blocks[child].get("Text", "") + " ")
+            elif block_type == "SELECTION_ELEMENT" and self.blocks[child].get("SelectionStatus") == "SELECTED":
+                parts.append("X")
+        return "".join(parts).strip()
+
+    def value_of(self, key_position: int) -> Optional[int]:
+        """VALUE block of a KEY_VALUE_SET key."""
+        for value in self._values[key_position]:
+            if self.block_types[value] == "KEY_VALUE_SET":
+                return value
+        return None
+
+    def key_value_positions(self) -> Iterable[Tuple[int, Optional[int]]]:
+        """(key, value) positions of every form field, in document order."""
+        for position in self.by_type.get("KEY_VALUE_SET", ()):
+            if "KEY" in (self.blocks[position].get("EntityTypes") or ()):
+                yield position, self.value_of(position)
+
+    def key_values(self) -> Dict[str, List[str]]:
+        """Form fields as key text -> value texts (fields with an empty key or value are skipped)."""
+        fields: Dict[str, List[str]] = {}
+        for key_position, value_position in self.key_value_positions():
+            key = self.text(key_position)
+            value = self.text(value_position)
+            if key and value:
+                fields.setdefault(key, []).append(value)
+        return fields
+
+    def table_cells(self, table_position: int) -> List[Dict[str, Any]]:
+        return [self.blocks[child] for child in self.children(table_position, "CELL")]
+
+    def lines_by_page(self) -> Dict[int, List[int]]:
+        """LINE positions grouped by page, in document order."""
+        lines: Dict[int, List[int]] = {}
+        for position in self.by_type.get("LINE", ()):
+            lines.setdefault(self.pages[position], []).append(position)
+        return lines
@@ -0,0 +1,219 @@
+"""
+Deterministic embeddings and a NumPy vector index.
+Used by the local retrieval backend; only depends on NumPy so it can be
+exercised offline.
+"""
+
+import os
+import re
+import json
+import uuid
+import hashlib
+import logging
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+VECTORS_FILENAME = "vectors.npy"
+INDEX_FILENAME = "index.json"
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+class HashingEmbedder:
+    """
+    Deterministic stand-in embedder (feature hashing of words and word pairs).
+
+    Needs no network or model, returns identical vectors in every process and
+    ranks lexical overlap sensibly, which makes retrieval testable offline.
+    """
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _bucket(self, feature: str) -> Tuple[int, float]:
+        digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+        return digest % self.dim, 1.0 if (digest >> 63) & 1 else -1.0
+
+    def embed_sync(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = _TOKEN.findall((text or "").lower())
+            features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+            for feature in features:
+                index, sign = self._bucket(feature)
+                vectors[row, index] += sign
+            # Sublinear term frequency, then unit length for cosine scoring
+            np.copyto(vectors[row], np.sign(vectors[row]) * np.log1p(np.abs(vectors[row])))
+        return normalize_rows(vectors)
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        return self.embed_sync(texts)
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """Scale rows to unit length (zero rows stay zero)."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class VectorIndex:
+    """
+    Cosine-similarity index over unit vectors with per-file chunk metadata.
+
+    Small indexes are searched exhaustively (a single matrix-vector product).
+    From ``ivf_min_vectors`` on, an IVF layer (spherical k-means centroids with
+    inverted lists) is built lazily and only ``nprobe`` lists are scanned.
+    """
+
+    def __init__(self, dim: int, ivf_min_vectors: int = 2048, nprobe: int = 8):
+        self.dim = dim
+        self.ivf_min_vectors = ivf_min_vectors
+        self.nprobe = nprobe
+        self.vectors = np.zeros((0, dim), dtype=np.float32)
+        self.chunks: List[Dict[str, Any]] = []  # aligned with vectors rows
+        self.files: Dict[str, Dict[str, Any]] = {}  # file_id -> file record
+        self.vectors_file = VECTORS_FILENAME  # file the vectors were loaded from / saved to
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: Optional[List[np.ndarray]] = None
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def add(self, file_id: str, file_record: Dict[str, Any], chunks: List[Dict[str, Any]], vectors: np.ndarray):
+        """Add the chunks of one file (replacing the file if it is already indexed)."""
+        vectors = normalize_rows(vectors)
+        if vectors.shape != (len(chunks), self.dim):
+            raise ValueError(f"Expected {len(chunks)} vectors of dimension {self.dim}, got {vectors.shape}")
+        if file_id in self.files:
+            self.remove_file(file_id)
+        self.vectors = np.vstack([self.vectors, vectors]) if len(self.chunks) else vectors
+        self.chunks.extend({**chunk, "file_id": file_id} for chunk in chunks)
+        self.files[file_id] = {**file_record, "chunk_count": len(chunks)}
+        self._invalidate_ivf()
+
+    def copy(self) -> "VectorIndex":
+        """Copy to modify without affecting searches on this index (the vectors array is shared until replaced)."""
+        index = VectorIndex(self.dim, ivf_min_vectors=self.ivf_min_vectors, nprobe=self.nprobe)
+        index.vectors = self.vectors
+        index.chunks = list(self.chunks)
+        index.files = {file_id: dict(record) for file_id, record in self.files.items()}
+        index.vectors_file = self.vectors_file
+        index._centroids = self._centroids
+        index._lists = self._lists
+        return index
+
+    def remove_file(self, file_id: str) -> bool:
+        if file_id not in self.files:
+            return False
+        keep = np.array([chunk["file_id"] != file_id for chunk in self.chunks], dtype=bool)
+        self.vectors = np.ascontiguousarray(self.vectors[keep]) if len(keep) else self.vectors
+        self.chunks = [chunk for chunk, kept in zip(self.chunks, keep) if kept]
+        del self.files[file_id]
+        self._invalidate_ivf()
+        return True
+
+    def _invalidate_ivf(self):
+        self._centroids = None
+        self._lists = None
+
+    def _build_ivf(self):
+        """Train spherical k-means centroids and assign every vector to its nearest list."""
+        count = len(self.chunks)
+        n_lists = max(1, min(1024, int(np.sqrt(count))))
+        rng = np.random.default_rng(0)
+        sample = self.vectors[rng.choice(count, size=min(count, n_lists * 64), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+        for _ in range(10):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            for list_id in range(n_lists):
+                members = sample[assignment == list_id]
+                if len(members):
+                    centroids[list_id] = members.sum(axis=0)
+            centroids = normalize_rows(centroids)
+        assignment = np.argmax(self.vectors @ centroids.T, axis=1)
+        self._centroids = centroids
+        self._lists = [np.flatnonzero(assignment == list_id) for list_id in range(n_lists)]
+        logger.info(f"[VECTOR_INDEX] Built IVF with {n_lists} lists over {count} vectors")
+
+    def search(self, query_vector: np.ndarray, k: int = 10,
+               score_threshold: Optional[float] = None) -> List[Tuple[int, float]]:
+        """Return up to k (row, score) pairs, best first."""
+        if not self.chunks:
+            return []
+        query = normalize_rows(np.asarray(query_vector, dtype=np.float32).reshape(1, -1))[0]
+
+        if len(self.chunks) >= self.ivf_min_vectors:
+            if self._centroids is None:
+                self._build_ivf()
+            probe = np.argsort(-(self._centroids @ query))[:self.nprobe]
+            candidates = np.concatenate([self._lists[list_id] for list_id in probe])
+        else:
+            candidates = np.arange(len(self.chunks))
+
+        if not len(candidates):
+            return []
+        scores = self.vectors[candidates] @ query
+        top = min(k, len(candidates))
+        best = np.argpartition(-scores, top - 1)[:top]
+        best = best[np.argsort(-scores[best])]
+        results = [(int(candidates[i]), float(scores[i])) for i in best]
+        if score_threshold is not None:
+            results = [(row, score) for row, score in results if score >= score_threshold]
+        return results
+
+    def save(self, directory: Path, vectors_file: Optional[str] = None):
+        """
+        Write the vectors file and index.json to a directory.
+
+        Both are written to temporary files and renamed into place, so an
+        index that still memory-maps the previous file keeps reading intact
+        data. ``vectors_file`` names the vectors file (default: the current one).
+        """
+        directory.mkdir(parents=True, exist_ok=True)
+        self.vectors_file = vectors_file or self.vectors_file
+        write_atomic(directory / self.vectors_file, lambda handle: np.save(handle, self.vectors))
+        metadata = json.dumps(self.to_metadata()).encode("utf-8")
+        write_atomic(directory / INDEX_FILENAME, lambda handle: handle.write(metadata))
+
+    def to_metadata(self) -> Dict[str, Any]:
+        return {"dim": self.dim, "count": len(self.chunks), "chunks": self.chunks, "files": self.files,
+                "vectors_file": self.vectors_file}
+
+    @classmethod
+    def load(cls, directory: Path, ivf_min_vectors: int = 2048, nprobe: int = 8, mmap: bool = True) -> "VectorIndex":
+        """Load an index written by save(); vectors are memory-mapped read-only."""
+        metadata = json.loads((directory / INDEX_FILENAME).read_text(encoding="utf-8"))
+        return cls.from_metadata(metadata, directory, ivf_min_vectors=ivf_min_vectors, nprobe=nprobe, mmap=mmap)
+
+    @classmethod
+    def from_metadata(cls, metadata: Dict[str, Any], directory: Path, ivf_min_vectors: int = 2048,
+                      nprobe: int = 8, mmap: bool = True) -> "VectorIndex":
+        """Index from parsed index.json metadata and the vectors file it names in ``directory``."""
+        index = cls(metadata["dim"], ivf_min_vectors=ivf_min_vectors, nprobe=nprobe)
+        index.vectors_file = metadata.get("vectors_file", VECTORS_FILENAME)
+        vectors = np.load(directory / index.vectors_file, mmap_mode="r" if mmap else None)
+        if len(vectors) != metadata["count"]:
+            raise ValueError(f"Index at {directory} has {len(vectors)} vectors for {metadata['count']} chunks")
+        index.vectors = vectors if len(vectors) else np.zeros((0, index.dim), dtype=np.float32)
+        index.chunks = metadata["chunks"]
+        index.files = metadata["files"]
+        return index
+
+
+def write_atomic(path: Path, write):
+    """Write a file through a temporary file in the same directory, then rename it into place."""
+    temporary = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        with open(temporary, "wb") as handle:
+            write(handle)
+        os.replace(temporary, path)
+    finally:
+        if temporary.exists():
+            temporary.unlink()
@@ -4,12 +4,19 @@ A high-performance async web crawler with proxy support and intelligent document
 """
 
 from .advanced_crawler import AdvancedCrawler
+from .crawl_engine import CrawlEngine
 from .file_downloader import FileDownloader
 from .link_extractor import LinkExtractor
 from .proxy_manager import ProxyManager
+from .rate_limiter import RateLimitScheduler, get_rate_limiter
+from .response_cache import ResponseCache, get_response_cache
+from .domain_profiles import DomainProfileStore, get_domain_profile_store
+from .page_extractor import ExtractedPage, PageExtractor
+from .url_normalizer import SeenUrlSet, canonicalize_url
 from .settings_manager import SettingsManager
 from .smart_scrapingbee_manager import SmartScrapingBeeManager
 from .s3_document_storage import S3DocumentStorage
+from .binary_content import BinaryContent
 from .utils import (
     get_optimal_thread_count,
     get_optimal_delay,
@@ -26,12 +33,24 @@ __author__ = "Stock Market Crawler Team"
 
 __all__ = [
     'AdvancedCrawler',
+    'CrawlEngine',
     'FileDownloader',
     'LinkExtractor',
     'ProxyManager',
+    'RateLimitScheduler',
+    'get_rate_limiter',
+    'ResponseCache',
+    'get_response_cache',
+    'DomainProfileStore',
+    'get_domain_profile_store',
+    'ExtractedPage',
+    'PageExtractor',
+    'SeenUrlSet',
+    'canonicalize_url',
     'SettingsManager',
     'SmartScrapingBeeManager',
     'S3DocumentStorage',
+    'BinaryContent',
     'get_optimal_thread_count',
     'get_optimal_delay',
     'load_settings_from_file',
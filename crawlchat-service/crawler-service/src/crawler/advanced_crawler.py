@@ -9,11 +9,16 @@ from typing import Optional, Dict, Any, List
 from urllib.parse import urlparse
 import mimetypes
 import json
-import base64 # Added for base64 encoding
 
+import requests
 from scrapingbee import ScrapingBeeClient
 from .settings_manager import SettingsManager
 from .utils import get_file_extension, is_valid_url
+from .url_normalizer import clean_url
+from .binary_content import BinaryContent
+from .rate_limiter import get_rate_limiter
+from .response_cache import get_response_cache
+from .domain_profiles import get_domain_profile_store
 from .smart_scrapingbee_manager import ContentCheckers
 from .enhanced_scrapingbee_manager import JavaScriptScenarios
 
@@ -24,6 +29,9 @@ class AdvancedCrawler:
     Advanced crawler with progressive proxy strategy and enhanced features.
     """
     
+    # ScrapingBee file download limit (2MB per ScrapingBee documentation)
+    MAX_FILE_SIZE = 2 * 1024 * 1024
+    
     def __init__(self, api_key: str = None, settings: Dict[str, Any] = None):
         self.settings_manager = SettingsManager()
         self.settings = settings or self.settings_manager.get_all_settings()
@@ -36,6 +44,20 @@ class AdvancedCrawler:
         self.scrapingbee_client = ScrapingBeeClient(api_key=api_key)
         logger.info("Advanced crawler initialized with official ScrapingBee client")
         
+        # Shared per-domain / per-API-key pacing
+        self.rate_limiter = get_rate_limiter()
+        
+        # Shared response cache (local disk + S3) to avoid re-spending credits
+        self.response_cache = get_response_cache()
+        
+        # Learned per-domain proxy mode / JS requirements, persisted across invocations
+        self.domain_profiles = get_domain_profile_store()
+        
+        # Pooled HTTP session shared by all crawl workers for file downloads
+        self.session = requests.Session()
+        self.session.mount('http://', requests.adapters.HTTPAdapter(pool_connections=10, pool_maxsize=10))
+        self.session.mount('https://', requests.adapters.HTTPAdapter(pool_connections=10, pool_maxsize=10))
+        
         # Content checkers mapping (simplified for now)
         self.content_checkers = {
             "news": ContentCheckers.news_site_checker,
@@ -54,38 +76,9 @@ class AdvancedCrawler:
             url: URL to clean
             
         Returns:
-            Cleaned URL or None if invalid
+            Canonical URL or None if invalid
         """
-        if not url:
-            return None
-            
-        # Remove JavaScript code that might be appended
-        if ');' in url:
-            url = url.split(');')[0]
-        
-        # Remove any trailing JavaScript
-        if 'javascript:' in url.lower():
-            return None
-        
-        # Remove any trailing HTML entities or malformed parts
-        if '&amp;' in url:
-            url = url.split('&amp;')[0]
-        
-        # Remove any trailing spaces or newlines
-        url = url.strip()
-        
-        # Ensure URL starts with http/https
-        if not url.startswith(('http://', 'https://')):
-            return None
-        
-        # Basic URL validation
-        try:
-            parsed = urlparse(url)
-            if not parsed.netloc:
-                return None
-            return url
-        except Exception:
-            return None
+        return clean_url(url)
     
     def crawl_url(self, url: str, content_type: str = "generic", 
                   use_js_scenario: bool = False, js_scenario: Dict[str, Any] = None,
@@ -207,24 +200,30 @@ class AdvancedCrawler:
             if js_scenario:
                 params['js_scenario'] = json.dumps(js_scenario)
             
-            response = self.scrapingbee_client.get(url, params=params)
+            cache_key = self.response_cache.make_key(
+                url, kind="page", render_js=render_js, premium_proxy=premium_proxy,
+                stealth_proxy=stealth_proxy, country_code=country_code, js_scenario=js_scenario,
+                wait_for=wait_for, scraping_config=scraping_config
+            )
+            response = self._get_page_with_cache(url, params, cache_key)
             
             crawl_time = time.time() - start_time
             
             result = {
                 "success": True,
                 "url": url,
-                "status_code": response.status_code,
-                "content": response.text,
-                "content_length": len(response.text),
+                "status_code": response["status_code"],
+                "content": response["text"],
+                "content_length": len(response["text"]),
                 "crawl_time": round(crawl_time, 2),
                 "content_type": "html",
-                "headers": dict(response.headers),
+                "headers": response["headers"],
                 "proxy_mode": "standard",
-                "stats": {"requests": 1, "successes": 1, "failures": 0},
+                "from_cache": response["from_cache"],
+                "stats": {"requests": 0 if response["from_cache"] else 1, "successes": 1, "failures": 0},
             }
             
-            logger.info(f"Successfully crawled {url} in {crawl_time:.2f}s")
+            logger.info(f"Successfully crawled {url} in {crawl_time:.2f}s{' (cached)' if response['from_cache'] else ''}")
             return result
             
         except Exception as e:
@@ -262,22 +261,24 @@ class AdvancedCrawler:
                 'js_scenario': json.dumps(scenario),
                 'render_js': 'True'
             }
-            response = self.scrapingbee_client.get(url, params=params)
+            cache_key = self.response_cache.make_key(url, kind="page", render_js=True, js_scenario=scenario)
+            response = self._get_page_with_cache(url, params, cache_key)
             
             crawl_time = time.time() - start_time
             
             result = {
                 "success": True,
                 "url": url,
-                "status_code": response.status_code,
-                "content": response.text,
-                "content_length": len(response.text),
+                "status_code": response["status_code"],
+                "content": response["text"],
+                "content_length": len(response["text"]),
                 "crawl_time": round(crawl_time, 2),
                 "content_type": "html",
                 "js_scenario": scenario,
                 "proxy_mode": "premium",
-                "headers": dict(response.headers),
-                "stats": {"requests": 1, "successes": 1, "failures": 0},
+                "headers": response["headers"],
+                "from_cache": response["from_cache"],
+                "stats": {"requests": 0 if response["from_cache"] else 1, "successes": 1, "failures": 0},
             }
             
             logger.info(f"Successfully crawled {url} with JS scenario in {crawl_time:.2f}s")
@@ -296,6 +297,49 @@ class AdvancedCrawler:
                 "stats": {"requests": 1, "successes": 0, "failures": 1},
             }
     
+    def _get_page_with_cache(self, url: str, params: Dict[str, Any], cache_key: str) -> Dict[str, Any]:
+        """
+        Fetch a page through ScrapingBee, serving fresh entries from the response
+        cache and revalidating stale ones with ETag / Last-Modified.
+        
+        Returns:
+            Dictionary with status_code, text, headers and from_cache
+        """
+        cached = self.response_cache.get(cache_key)
+        if cached and cached.is_fresh(self.response_cache.ttl):
+            self.response_cache.record_hit()
+            return self._page_response_from_cache(cached)
+        
+        conditional_headers = cached.conditional_headers() if cached else {}
+        self.rate_limiter.acquire(url, self.api_key)
+        response = self.scrapingbee_client.get(url, params=params, headers=conditional_headers or None)
+        self.rate_limiter.record_response(url, response.status_code, response.headers, self.api_key)
+        
+        if cached and self.response_cache.is_not_modified(response.status_code, response.headers):
+            logger.info(f"Revalidated cached response for {url}")
+            self.response_cache.refresh(cache_key, cached)
+            return self._page_response_from_cache(cached)
+        
+        self.response_cache.record_miss()
+        if response.status_code == 200:
+            self.response_cache.put(cache_key, url, response.status_code, response.content,
+                                    dict(response.headers), content_type='text/html')
+        return {
+            "status_code": response.status_code,
+            "text": response.text,
+            "headers": dict(response.headers),
+            "from_cache": False,
+        }
+    
+    def _page_response_from_cache(self, cached) -> Dict[str, Any]:
+        """Build a page response dictionary from a cache entry."""
+        return {
+            "status_code": cached.status_code,
+            "text": cached.body.decode('utf-8', errors='replace'),
+            "headers": cached.headers,
+            "from_cache": True,
+        }
+    
     def download_file(self, url: str) -> Dict[str, Any]:
         """
         Download file from URL using ScrapingBee API with retry logic.
@@ -317,13 +361,22 @@ class AdvancedCrawler:
                 'url': url
             }
         
-        # Check file size limit (2MB = 2 * 1024 * 1024 bytes)
-        MAX_FILE_SIZE = 2 * 1024 * 1024  # 2MB limit per ScrapingBee documentation
+        MAX_FILE_SIZE = self.MAX_FILE_SIZE
         
         start_time = time.time()
         max_retries = 3
         base_delay = 2  # Start with 2 second delay
         
+        # Serve from the response cache when possible; stale entries are revalidated below
+        cache_key = self.response_cache.make_key(url, kind="file", render_js=False, premium_proxy=True, country_code='in')
+        cached = self.response_cache.get(cache_key)
+        if cached and cached.is_fresh(self.response_cache.ttl):
+            self.response_cache.record_hit()
+            logger.info(f"Serving {url} from response cache ({cached.size} bytes)")
+            return self._build_file_result(url, cached.body, cached.content_type, cached.status_code,
+                                           cached.headers, start_time, from_cache=True)
+        
+        last_status = None
         for attempt in range(max_retries):
             try:
                 # Use optimized parameters for binary file downloads
@@ -341,8 +394,8 @@ class AdvancedCrawler:
                     'block_ads': 'false',  # Don't block ads for file downloads
                 }
                 
-                # Add delay between retries to avoid rate limiting
-                if attempt > 0:
+                # Back off between retries after errors (rate limits are paced by the scheduler)
+                if attempt > 0 and last_status != 429:
                     delay = base_delay * (2 ** (attempt - 1))  # Exponential backoff: 2s, 4s, 8s
                     logger.info(f"Retry attempt {attempt + 1}/{max_retries}, waiting {delay}s...")
                     time.sleep(delay)
@@ -361,11 +414,12 @@ class AdvancedCrawler:
                     'Pragma': 'no-cache',
                     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
                 }
+                if cached:
+                    # forward_headers is enabled, so Spb- prefixed headers reach the origin
+                    for name, value in cached.conditional_headers().items():
+                        headers[f'Spb-{name}'] = value
                 
-                # Make the request using requests directly instead of scrapingbee_client
-                import requests
-                from urllib.parse import quote
-                
+                # Make the request using the pooled session instead of scrapingbee_client
                 # ScrapingBee base URL
                 scrapingbee_url = "https://app.scrapingbee.com/api/v1/"
                 
@@ -384,11 +438,20 @@ class AdvancedCrawler:
                 logger.debug(f"Final ScrapingBee request URL: {scrapingbee_url}?url={params['url']}")
                 logger.info(f"Making request to ScrapingBee API for: {url}")
                 
-                # Perform request
-                response = requests.get(scrapingbee_url, params=params, headers=headers, timeout=70)
+                # Perform request once the shared scheduler allows it
+                self.rate_limiter.acquire(url, self.api_key)
+                response = self.session.get(scrapingbee_url, params=params, headers=headers, timeout=70)
+                self.rate_limiter.record_response(url, response.status_code, response.headers, self.api_key)
+                last_status = response.status_code
                 
                 logger.info(f"Response status: {response.status_code}")
                 
+                if cached and self.response_cache.is_not_modified(response.status_code, response.headers):
+                    logger.info(f"Revalidated cached file for {url}")
+                    self.response_cache.refresh(cache_key, cached)
+                    return self._build_file_result(url, cached.body, cached.content_type, cached.status_code,
+                                                   cached.headers, start_time, from_cache=True)
+                
                 # Log response content for error diagnosis
                 if response.status_code != 200:
                     try:
@@ -450,10 +513,6 @@ class AdvancedCrawler:
                     preview = content[:100] if content else b''
                     logger.info(f"Content preview: {preview}")
                     
-                    # Determine content type
-                    content_type = response.headers.get('Content-Type', 'unknown')
-                    file_type = self._determine_file_type(url, content_type)
-                    
                     # Additional check: Look for HTML content in the response body
                     # This is a backup check in case Content-Type header is missing or incorrect
                     if content_length < 50000 and (b'<!DOCTYPE html>' in content[:2000] or b'<html' in content[:2000]):
@@ -480,22 +539,11 @@ class AdvancedCrawler:
                     # regardless of their internal structure or validity
                     
                     # Success!
-                    download_time = time.time() - start_time
-                    logger.info(f"Successfully downloaded {url} ({content_length} bytes, {file_type}) in {download_time:.2f}s")
-                    
-                    return {
-                        'success': True,
-                        'url': url,
-                        'content': content,
-                        'content_type': file_type,
-                        'content_length': content_length,
-                        'download_time': download_time,
-                        'is_binary': True,
-                        'content_base64': base64.b64encode(content).decode('utf-8'),
-                        'status_code': response.status_code,
-                        'headers': dict(response.headers),
-                        'file_size_ok': content_length <= MAX_FILE_SIZE
-                    }
+                    self.response_cache.record_miss()
+                    self.response_cache.put(cache_key, url, response.status_code, content,
+                                            dict(response.headers), content_type=content_type)
+                    return self._build_file_result(url, content, content_type, response.status_code,
+                                                   dict(response.headers), start_time)
                 
                 elif response.status_code in [301, 302, 307, 308]:
                     # Handle redirects
@@ -514,6 +562,11 @@ class AdvancedCrawler:
                             'status_code': response.status_code
                         }
                 
+                elif response.status_code == 429 and attempt < max_retries - 1:
+                    # The scheduler has recorded Retry-After; the next acquire waits it out
+                    logger.warning(f"Rate limited on attempt {attempt + 1} for {url}, retrying after scheduler backoff")
+                    continue
+                
                 elif response.status_code == 500:
                     logger.warning(f"HTTP 500 error on attempt {attempt + 1} for {url}")
                     if attempt < max_retries - 1:
@@ -563,6 +616,29 @@ class AdvancedCrawler:
             'url': url
         }
     
+    def _build_file_result(self, url: str, content: bytes, content_type_header: str, status_code: int,
+                           headers: Dict[str, Any], start_time: float, from_cache: bool = False) -> Dict[str, Any]:
+        """Build the download_file result for fresh or cached content."""
+        content_length = len(content)
+        file_type = self._determine_file_type(url, content_type_header or 'unknown')
+        download_time = time.time() - start_time
+        logger.info(f"Successfully downloaded {url} ({content_length} bytes, {file_type}) in {download_time:.2f}s{' (cached)' if from_cache else ''}")
+        
+        return {
+            'success': True,
+            'url': url,
+            'content': content,
+            'content_type': file_type,
+            'content_length': content_length,
+            'download_time': download_time,
+            'is_binary': True,
+            'binary': BinaryContent(content, file_type),
+            'status_code': status_code,
+            'headers': headers,
+            'file_size_ok': content_length <= self.MAX_FILE_SIZE,
+            'from_cache': from_cache
+        }
+    
     def take_screenshot(self, url: str, full_page: bool = True, 
                        selector: str = None) -> Dict[str, Any]:
         """
@@ -617,12 +693,9 @@ class AdvancedCrawler:
             logger.info(f"Crawling URL {i}/{len(urls)}: {url}")
             
             try:
+                # Pacing is handled by the shared rate limiter inside crawl_url
                 result = self.crawl_url(url, content_type)
                 results.append(result)
-                
-                # Brief delay between requests
-                if i < len(urls):
-                    time.sleep(1)
                     
             except Exception as e:
                 logger.error(f"Failed to crawl {url}: {e}")
@@ -644,10 +717,13 @@ class AdvancedCrawler:
         pass
     
     def save_site_requirements(self, filename: str = None):
-        pass
+        """Flush learned domain profiles to S3."""
+        self.domain_profiles.flush(force=True)
     
     def load_site_requirements(self, filename: str = None):
-        pass
+        """Load learned domain profiles from S3 (no-op once loaded)."""
+        profiles = self.domain_profiles.all_profiles()
+        logger.info(f"{len(profiles)} domain profiles available")
     
     def reset_stats(self):
         pass
@@ -780,11 +856,12 @@ class AdvancedCrawler:
     
     def _get_used_proxy_mode(self, url: str) -> str:
         """Get the proxy mode that was used for a URL."""
-        return "unknown"
+        profile = self.domain_profiles.get(urlparse(url).netloc)
+        return profile.proxy_mode if profile and profile.proxy_mode else "unknown"
     
     def close(self):
         """Close the crawler and cleanup resources."""
-        pass
+        self.session.close()
         logger.info("Advanced crawler closed")
 
 
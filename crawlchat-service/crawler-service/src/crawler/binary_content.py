@@ -0,0 +1,77 @@
+"""
+Binary payloads for crawled documents.
+Downloaded files travel from AdvancedCrawler.download_file to S3 as the
+original bytes object instead of a base64 string, and never end up in JSON
+responses.
+"""
+
+import io
+import logging
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Document key holding the BinaryContent of a downloaded file
+BINARY_KEY = "binary"
+
+
+class BinaryContent:
+    """
+    Handle on the raw bytes of a downloaded file.
+
+    Wraps the bytes object returned by the HTTP client without copying it.
+    ``open()`` and ``view()`` share the same buffer, and ``release()`` drops
+    the reference once the bytes are safely in S3 so a long crawl does not
+    keep every downloaded file in memory.
+    """
+
+    __slots__ = ("_data", "size", "content_type")
+
+    def __init__(self, data: bytes, content_type: str = "application/octet-stream"):
+        if isinstance(data, (bytearray, memoryview)):
+            data = bytes(data)
+        self._data: Optional[bytes] = data
+        self.size = len(data)
+        self.content_type = content_type
+
+    def __repr__(self) -> str:
+        state = "released" if self.released else f"{self.size} bytes"
+        return f"BinaryContent({self.content_type}, {state})"
+
+    @property
+    def released(self) -> bool:
+        return self._data is None
+
+    @property
+    def data(self) -> bytes:
+        """The underlying bytes (no copy)."""
+        if self._data is None:
+            raise ValueError("Binary content has already been released")
+        return self._data
+
+    def view(self) -> memoryview:
+        """Zero-copy view of the bytes."""
+        return memoryview(self.data)
+
+    def open(self) -> io.BytesIO:
+        """File object over the bytes; BytesIO shares the buffer until written to."""
+        return io.BytesIO(self.data)
+
+    def release(self):
+        """Drop the bytes; ``size`` and ``content_type`` stay available."""
+        self._data = None
+
+
+def without_binary(document: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Copy of a document without its binary payload, safe for JSON responses.
+
+    Args:
+        document: Crawled document
+
+    Returns:
+        The same document when it carries no binary payload, else a shallow copy without it
+    """
+    if BINARY_KEY not in document:
+        return document
+    return {key: value for key, value in document.items() if key != BINARY_KEY}
@@ -0,0 +1,218 @@
+"""
+Frontier-based crawl engine with bounded concurrency.
+Replaces recursive per-level thread pools with a single priority frontier,
+a fixed pool of asyncio workers and atomic visited/budget accounting.
+"""
+
+import asyncio
+import itertools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .url_normalizer import SeenUrlSet, canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+# Frontier priorities (lower is crawled first)
+PRIORITY_PDF = 0
+PRIORITY_DOCUMENT = 1
+PRIORITY_PAGE = 2
+
+
+@dataclass(order=True)
+class FrontierItem:
+    """A URL waiting in the crawl frontier."""
+    priority: int
+    sequence: int
+    url: str = field(compare=False)
+    depth: int = field(compare=False, default=0)
+    is_file: bool = field(compare=False, default=False)
+
+
+class CrawlEngine:
+    """
+    Bounded-concurrency crawl engine.
+
+    All frontier, visited and budget bookkeeping happens on the event loop
+    thread, so it is atomic without locks. Blocking fetches run on one shared
+    executor sized to ``max_workers``, so the total thread count never exceeds
+    ``max_workers`` regardless of crawl depth.
+    """
+
+    def __init__(self,
+                 fetch_page: Callable[[str], Optional[Dict[str, Any]]],
+                 fetch_file: Callable[[str], Optional[Dict[str, Any]]],
+                 extract_links: Callable[[Dict[str, Any], str], Tuple[List[str], List[str]]],
+                 max_doc_count: int = 1,
+                 max_depth: int = 2,
+                 max_workers: int = 3,
+                 max_page_links: int = 10,
+                 on_document: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 on_links_skipped: Optional[Callable[[Dict[str, Any], str], None]] = None):
+        """
+        Initialize the crawl engine.
+
+        Args:
+            fetch_page: Blocking callable returning a page document or None
+            fetch_file: Blocking callable returning a file document or None
+            extract_links: Callable returning (page_links, document_links) for a page document
+            max_doc_count: Maximum number of documents to collect
+            max_depth: Maximum link depth for page crawling (seed is depth 0)
+            max_workers: Number of concurrent workers (and executor threads)
+            max_page_links: Maximum sub-page links followed from a single page
+            on_document: Optional blocking callback invoked for every collected document
+            on_links_skipped: Optional callback invoked (on the event loop) with a collected
+                document and its URL when extract_links will not be called for it, so
+                state kept for link extraction can be released
+        """
+        self.fetch_page = fetch_page
+        self.fetch_file = fetch_file
+        self.extract_links = extract_links
+        self.max_doc_count = max(1, int(max_doc_count))
+        self.max_depth = max_depth
+        self.max_workers = max(1, int(max_workers))
+        self.max_page_links = max_page_links
+        self.on_document = on_document
+        self.on_links_skipped = on_links_skipped
+
+        self.documents: List[Dict[str, Any]] = []
+        self.visited_urls = SeenUrlSet()
+        self._seen_urls = SeenUrlSet()
+        self._sequence = itertools.count()
+        self._in_flight = 0
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._budget_changed: Optional[asyncio.Condition] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def budget_exhausted(self) -> bool:
+        """Check whether the document budget has been met."""
+        return len(self.documents) >= self.max_doc_count
+
+    def enqueue(self, url: str, depth: int = 0, is_file: bool = False) -> bool:
+        """
+        Add a URL to the frontier if it is new and within the depth budget.
+
+        URLs are canonicalized first, so different spellings of one page are
+        queued once.
+
+        Returns:
+            True if the URL was queued
+        """
+        url = canonicalize_url(url)
+        if not url or url in self._seen_urls or self.budget_exhausted():
+            return False
+        if not is_file and depth > self.max_depth:
+            return False
+
+        if is_file:
+            priority = PRIORITY_PDF if url.lower().endswith('.pdf') else PRIORITY_DOCUMENT
+        else:
+            priority = PRIORITY_PAGE + depth
+
+        self._seen_urls.add(url)
+        self._queue.put_nowait(FrontierItem(priority, next(self._sequence), url, depth, is_file))
+        return True
+
+    async def run(self, seed_url: str) -> List[Dict[str, Any]]:
+        """
+        Crawl from the seed URL until the frontier is empty or the budget is met.
+
+        Args:
+            seed_url: Starting page URL
+
+        Returns:
+            List of collected documents
+        """
+        self._queue = asyncio.PriorityQueue()
+        self._budget_changed = asyncio.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="crawl")
+
+        self.enqueue(seed_url, depth=0)
+        workers = [asyncio.create_task(self._worker()) for _ in range(self.max_workers)]
+        try:
+            await self._queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            self._executor.shutdown(wait=False)
+
+        logger.info(f"Crawl engine finished: {len(self.documents)} documents, {len(self.visited_urls)} URLs fetched")
+        return self.documents
+
+    async def _worker(self):
+        """Pull items from the frontier and process them until cancelled."""
+        while True:
+            item = await self._queue.get()
+            try:
+                await self._process(item)
+            except Exception as e:
+                logger.error(f"Crawl worker failed on {item.url}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _acquire_budget(self) -> bool:
+        """
+        Reserve one document slot before a request is sent.
+
+        Waits while in-flight requests could still free a slot, and gives up
+        once the budget is met by completed documents.
+        """
+        async with self._budget_changed:
+            while len(self.documents) + self._in_flight >= self.max_doc_count:
+                if self.budget_exhausted():
+                    return False
+                await self._budget_changed.wait()
+            self._in_flight += 1
+            return True
+
+    async def _release_budget(self, document: Optional[Dict[str, Any]]):
+        """Release a reserved slot, recording the document if one was produced."""
+        async with self._budget_changed:
+            self._in_flight -= 1
+            if document:
+                self.documents.append(document)
+            self._budget_changed.notify_all()
+
+    async def _process(self, item: FrontierItem):
+        """Fetch a frontier item and expand its links."""
+        if not await self._acquire_budget():
+            return
+
+        loop = asyncio.get_running_loop()
+        self.visited_urls.add(item.url)
+        fetch = self.fetch_file if item.is_file else self.fetch_page
+
+        document = None
+        try:
+            document = await loop.run_in_executor(self._executor, fetch, item.url)
+        finally:
+            await self._release_budget(document)
+
+        if not document:
+            return
+
+        logger.info(f"Added document: {item.url} (total: {len(self.documents)}/{self.max_doc_count})")
+        extracting = False
+        try:
+            if self.on_document:
+                await loop.run_in_executor(self._executor, self.on_document, document)
+
+            if item.is_file or self.budget_exhausted():
+                return
+
+            extracting = True
+            page_links, document_links = await loop.run_in_executor(
+                self._executor, self.extract_links, document, item.url
+            )
+        finally:
+            if not extracting and self.on_links_skipped:
+                self.on_links_skipped(document, item.url)
+
+        for doc_url in document_links:
+            self.enqueue(doc_url, depth=item.depth + 1, is_file=True)
+        if item.depth < self.max_depth:
+            for page_url in page_links[:self.max_page_links]:
+                self.enqueue(page_url, depth=item.depth + 1)
@@ -177,7 +177,7 @@ async def crawl_url(
         enhanced_crawler = EnhancedCrawlerService(api_key=api_key, user_id="default")
         
         # Use enhanced crawler with max document count
-        result = enhanced_crawler.crawl_with_max_docs(url, max_doc_count=max_documents, task_id="direct_crawl")
+        result = await enhanced_crawler.crawl_with_max_docs_async(url, max_doc_count=max_documents, task_id="direct_crawl")
         
         logger.info(f"Crawl completed for URL: {url}")
         return {
@@ -355,7 +355,7 @@ async def run_crawl_task(task_id: str):
             
             try:
                 logger.error(f"CRAWLER: Calling crawl_with_max_docs NOW...")
-                result = enhanced_crawler.crawl_with_max_docs(url, max_doc_count=max_documents)
+                result = await enhanced_crawler.crawl_with_max_docs_async(url, max_doc_count=max_documents)
                 logger.error(f"CRAWLER: crawl_with_max_docs returned: {result}")
                 logger.error(f"CRAWLER: Result type: {type(result)}")
                 logger.error(f"CRAWLER: Result keys: {result.keys() if isinstance(result, dict) else 'Not a dict'}")
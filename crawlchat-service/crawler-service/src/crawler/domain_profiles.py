@@ -0,0 +1,225 @@
+"""
+Persistent per-domain crawl profiles.
+Records the cheapest working proxy mode, whether JavaScript rendering is
+needed, typical latency and failure rate for each domain. Profiles are loaded
+lazily from S3 on first use (once per cold start) and flushed incrementally,
+so what one Lambda invocation learns is reused by the next.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Optional
+
+from .s3_cache_manager import S3CacheManager
+
+logger = logging.getLogger(__name__)
+
+PROFILES_KEY = "cache/domain_profiles.json"
+
+# Flush after this many changes or this many seconds, whichever comes first
+FLUSH_EVERY_CHANGES = 10
+FLUSH_INTERVAL_SECONDS = 30.0
+
+# Weight of the newest sample in the latency moving average
+LATENCY_EWMA_ALPHA = 0.3
+
+
+@dataclass
+class DomainProfile:
+    """What we have learned about crawling one domain."""
+    domain: str
+    proxy_mode: Optional[str] = None
+    requires_js: Optional[bool] = None
+    requests: int = 0
+    failures: int = 0
+    avg_latency: float = 0.0
+    updated_at: float = field(default_factory=time.time)
+
+    @property
+    def failure_rate(self) -> float:
+        return self.failures / self.requests if self.requests else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'DomainProfile':
+        return cls(**{k: v for k, v in data.items() if k in cls.__dataclass_fields__})
+
+
+class DomainProfileStore:
+    """S3-backed store of domain profiles shared by all crawler components."""
+
+    def __init__(self, s3_cache: Optional[S3CacheManager] = None, key: str = PROFILES_KEY):
+        self.s3_cache = s3_cache
+        self.key = key
+        self._lock = threading.RLock()
+        self._profiles: Dict[str, DomainProfile] = {}
+        self._dirty: set = set()
+        self._loaded = False
+        self._last_flush = time.monotonic()
+        # Serializes the S3 read-merge-write, which runs without holding _lock
+        self._flush_lock = threading.Lock()
+        # No automatic flush before this time (set after a failed write)
+        self._retry_at = 0.0
+
+    def _ensure_loaded(self):
+        """Load profiles from S3 on first access, seeding from the legacy requirement caches."""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            if not self.s3_cache:
+                return
+            for domain, data in self.s3_cache.load_cache_data(self.key).items():
+                try:
+                    self._profiles[domain] = DomainProfile.from_dict(data)
+                except TypeError:
+                    continue
+            if not self._profiles:
+                for domain, mode in self.s3_cache.load_site_requirements().items():
+                    self._profiles.setdefault(domain, DomainProfile(domain)).proxy_mode = mode
+                for domain, requires_js in self.s3_cache.load_site_js_requirements().items():
+                    self._profiles.setdefault(domain, DomainProfile(domain)).requires_js = bool(requires_js)
+            logger.info(f"Loaded {len(self._profiles)} domain profiles")
+
+    def get(self, domain: str) -> Optional[DomainProfile]:
+        """Get the profile for a domain, if any."""
+        self._ensure_loaded()
+        with self._lock:
+            return self._profiles.get(domain)
+
+    def all_profiles(self) -> Dict[str, DomainProfile]:
+        self._ensure_loaded()
+        with self._lock:
+            return dict(self._profiles)
+
+    def _profile_for_update(self, domain: str) -> DomainProfile:
+        profile = self._profiles.get(domain)
+        if profile is None:
+            profile = DomainProfile(domain)
+            self._profiles[domain] = profile
+        profile.updated_at = time.time()
+        self._dirty.add(domain)
+        return profile
+
+    def record_request(self, domain: str, success: bool, latency: Optional[float] = None):
+        """Record the outcome and latency of one request to a domain."""
+        self._ensure_loaded()
+        with self._lock:
+            profile = self._profile_for_update(domain)
+            profile.requests += 1
+            if not success:
+                profile.failures += 1
+            if latency is not None and success:
+                if profile.avg_latency:
+                    profile.avg_latency += LATENCY_EWMA_ALPHA * (latency - profile.avg_latency)
+                else:
+                    profile.avg_latency = latency
+        self.flush()
+
+    def set_proxy_mode(self, domain: str, mode: str):
+        """
+        Record the proxy mode that worked for a domain.
+
+        Callers try modes cheapest first (standard, premium, stealth), so the
+        latest working mode is the cheapest one the domain currently accepts.
+        """
+        self._ensure_loaded()
+        with self._lock:
+            current = self._profiles.get(domain)
+            if current and current.proxy_mode == mode:
+                return
+            self._profile_for_update(domain).proxy_mode = mode
+        self.flush()
+
+    def set_requires_js(self, domain: str, requires_js: bool):
+        """Record whether the domain needs JavaScript rendering."""
+        self._ensure_loaded()
+        with self._lock:
+            current = self._profiles.get(domain)
+            if current and current.requires_js == requires_js:
+                return
+            self._profile_for_update(domain).requires_js = requires_js
+        self.flush()
+
+    def flush(self, force: bool = False) -> bool:
+        """
+        Persist changed profiles to S3.
+
+        Without ``force``, writes only once enough changes or time have
+        accumulated, and not again within FLUSH_INTERVAL_SECONDS of a failed
+        write. Remote profiles changed by other instances are merged in so
+        concurrent invocations do not clobber each other. The S3 round trips
+        happen outside the lock, so crawl threads recording requests never
+        wait for them; only one flush runs at a time.
+        """
+        if not self.s3_cache:
+            return False
+        # A forced flush waits for a running one; an automatic flush just skips
+        if not self._flush_lock.acquire(blocking=force):
+            return False
+        try:
+            return self._flush_locked(force)
+        finally:
+            self._flush_lock.release()
+
+    def _flush_locked(self, force: bool) -> bool:
+        with self._lock:
+            if not self._dirty:
+                return False
+            now = time.monotonic()
+            due = (len(self._dirty) >= FLUSH_EVERY_CHANGES or
+                   now - self._last_flush >= FLUSH_INTERVAL_SECONDS) and now >= self._retry_at
+            if not (force or due):
+                return False
+            self._last_flush = now
+            changed = {domain: self._profiles[domain].to_dict() for domain in self._dirty}
+
+        saved = False
+        remote = {}
+        payload = {}
+        try:
+            remote = self.s3_cache.load_cache_data(self.key)
+            payload = dict(remote)
+            payload.update(changed)
+            saved = self.s3_cache.save_cache_data(payload, self.key)
+        except Exception as e:
+            logger.warning(f"Failed to flush domain profiles: {e}")
+
+        with self._lock:
+            for domain, data in remote.items():
+                if domain in self._dirty:
+                    continue
+                try:
+                    self._profiles[domain] = DomainProfile.from_dict(data)
+                except TypeError:
+                    continue
+            if not saved:
+                self._retry_at = time.monotonic() + FLUSH_INTERVAL_SECONDS
+                return False
+            # Profiles changed again during the write stay dirty for the next flush
+            for domain, data in changed.items():
+                profile = self._profiles.get(domain)
+                if profile is None or profile.to_dict() == data:
+                    self._dirty.discard(domain)
+            logger.info(f"Flushed {len(changed)} changed domain profiles ({len(payload)} total)")
+            return True
+
+
+_profile_store: Optional[DomainProfileStore] = None
+_profile_store_lock = threading.Lock()
+
+
+def get_domain_profile_store() -> DomainProfileStore:
+    """Get the process-wide domain profile store."""
+    global _profile_store
+    if _profile_store is None:
+        with _profile_store_lock:
+            if _profile_store is None:
+                _profile_store = DomainProfileStore(S3CacheManager())
+    return _profile_store
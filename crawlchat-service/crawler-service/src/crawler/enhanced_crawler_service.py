@@ -6,12 +6,10 @@ Implements max_doc_count logic and document extraction
 import logging
 import os
 import sys
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from urllib.parse import urlparse
-from bs4 import BeautifulSoup
 import json
 from datetime import datetime
-import concurrent.futures
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 
@@ -20,23 +18,38 @@ crawler_path = os.path.join(os.path.dirname(__file__))
 sys.path.insert(0, crawler_path)
 
 from .advanced_crawler import AdvancedCrawler
+from .binary_content import BinaryContent, without_binary
+from .crawl_engine import CrawlEngine
 from .link_extractor import LinkExtractor
+from .page_extractor import ExtractedPage, PageExtractor
 from .s3_document_storage import S3DocumentStorage
+from .url_normalizer import SeenUrlSet, canonicalize_url
 
 logger = logging.getLogger(__name__)
 
+try:
+    from common.src.services.extraction_executor import extraction_executor
+except ImportError:
+    # Standalone crawler image (no common package): PDFs are parsed on the crawl threads
+    extraction_executor = None
+
 class EnhancedCrawlerService:
     """Enhanced crawler service with max document count support and S3 storage."""
     
-    def __init__(self, api_key: str, user_id: str = "default", task_id: str = None, max_threads: int = 3):
+    def __init__(self, api_key: str, user_id: str = "default", task_id: str = None, max_threads: int = 3, max_depth: int = 2):
         self.api_key = api_key
         self.user_id = user_id
         self.task_id = task_id
         self.documents = []
-        self.visited_urls = set()
+        self.visited_urls = SeenUrlSet()
         self.s3_storage = S3DocumentStorage()
         self.mongodb_helper = None
         self.max_threads = max_threads
+        self.max_depth = max_depth
+        self.page_extractor = PageExtractor()
+        # Extraction results kept between page fetch and link expansion (one parse per page);
+        # released by link extraction or, for pages whose links are not expanded, by the engine
+        self._extracted_pages: Dict[str, ExtractedPage] = {}
         # Initialize MongoDB helper for progress updates
         try:
             from .mongodb_helper import MongoDBHelper
@@ -45,9 +58,21 @@ class EnhancedCrawlerService:
             logger.warning("MongoDB helper not available for progress tracking")
     
     def crawl_with_max_docs(self, base_url: str, max_doc_count: int = 1, task_id: str = None, max_threads: int = None) -> Dict[str, Any]:
+        """Synchronous wrapper around crawl_with_max_docs_async for Lambda and legacy callers."""
+        coro = self.crawl_with_max_docs_async(base_url, max_doc_count=max_doc_count, task_id=task_id, max_threads=max_threads)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coro)
+        # Called from inside a running event loop: run the crawl on its own loop in a helper thread
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, coro).result()
+
+    async def crawl_with_max_docs_async(self, base_url: str, max_doc_count: int = 1, task_id: str = None, max_threads: int = None) -> Dict[str, Any]:
         logger.info(f"Starting enhanced crawl for {base_url} with max_doc_count: {max_doc_count}, max_threads: {max_threads or self.max_threads}")
         self.documents = []
-        self.visited_urls = set()
+        self.visited_urls = SeenUrlSet()
+        self._extracted_pages = {}
         if task_id:
             self.task_id = task_id
         if max_threads is not None:
@@ -55,80 +80,48 @@ class EnhancedCrawlerService:
         try:
             crawler = AdvancedCrawler(self.api_key)
             self._update_progress(0, max_doc_count, "Starting crawl...")
-            domain = urlparse(base_url).netloc
-            logger.info(f"Crawling main page: {base_url}")
-            main_page_doc = self._crawl_and_save_page(crawler, base_url, domain)
-            if main_page_doc:
-                self.documents.append(main_page_doc)
-                logger.info(f"Added main page document: {base_url}")
-                self._update_progress(len(self.documents), max_doc_count, f"Found main page document")
-            if len(self.documents) < max_doc_count:
-                logger.info(f"Starting recursive crawl for additional documents (current: {len(self.documents)}, target: {max_doc_count})")
-                if main_page_doc and main_page_doc.get('raw_html'):
-                    try:
-                        soup = BeautifulSoup(main_page_doc['raw_html'], 'html.parser')
-                        link_extractor = LinkExtractor(domain)
-                        page_links, document_links = link_extractor.extract_links(soup, base_url, self.visited_urls)
-                        logger.info(f"Found {len(page_links)} page links and {len(document_links)} document links on main page")
-                        
-                        # Prioritize PDF documents first
-                        pdf_links = [url for url in document_links if url.lower().endswith('.pdf')]
-                        other_doc_links = [url for url in document_links if not url.lower().endswith('.pdf')]
-                        prioritized_doc_links = pdf_links + other_doc_links
-                        
-                        logger.info(f"Prioritized document links: {len(pdf_links)} PDFs, {len(other_doc_links)} other documents")
-                        
-                        # Multithreaded document downloads with priority
-                        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_threads) as executor:
-                            futures = []
-                            for doc_url in prioritized_doc_links:
-                                if len(self.documents) >= max_doc_count:
-                                    break
-                                futures.append(executor.submit(self._crawl_and_save_file, crawler, doc_url))
-                            for future in concurrent.futures.as_completed(futures):
-                                if len(self.documents) >= max_doc_count:
-                                    break
-                                doc = future.result()
-                                if doc:
-                                    self.documents.append(doc)
-                                    logger.info(f"Added document: {doc['url']} (total: {len(self.documents)}/{max_doc_count})")
-                                    self._update_progress(len(self.documents), max_doc_count, f"Found document: {doc['url']}")
-                        
-                        # Only crawl sub-pages if we still need more documents
-                        if len(self.documents) < max_doc_count:
-                            # Multithreaded sub-page crawling (limit to first 10)
-                            sub_pages_to_crawl = page_links[:10]
-                            logger.info(f"Crawling {len(sub_pages_to_crawl)} sub-pages out of {len(page_links)} found")
-                            with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_threads) as executor:
-                                futures = []
-                                for page_url in sub_pages_to_crawl:
-                                    if len(self.documents) >= max_doc_count:
-                                        break
-                                    futures.append(executor.submit(self._crawl_recursive, crawler, page_url, domain, max_doc_count, 1))
-                                for future in concurrent.futures.as_completed(futures):
-                                    if len(self.documents) >= max_doc_count:
-                                        break
-                                    # No need to collect result, _crawl_recursive updates self.documents
-                        else:
-                            logger.info(f"Reached max document count ({max_doc_count}) after downloading documents, skipping sub-page crawl")
-                    except Exception as e:
-                        logger.error(f"Error in recursive crawl for main page: {e}")
-                else:
-                    logger.warning(f"No raw HTML found in main page, skipping link extraction")
-            else:
-                logger.info(f"Already have {len(self.documents)} documents, no need for recursive crawl")
-            crawler.close()
+            # Links are compared in canonical form, so derive the domain from the canonical seed
+            domain = urlparse(canonicalize_url(base_url) or base_url).netloc
+            # Persist documents to S3 as soon as they are crawled instead of in one burst at the end
+            s3_writer = None
+            if task_id and self.s3_storage.s3_client:
+                s3_writer = self.s3_storage.streaming_writer(self.user_id, task_id)
+            engine = CrawlEngine(
+                fetch_page=lambda url: self._crawl_and_save_page(crawler, url, domain),
+                fetch_file=lambda url: self._crawl_and_save_file(crawler, url),
+                extract_links=lambda document, url: self._extract_document_links(document, url, domain),
+                max_doc_count=max_doc_count,
+                max_depth=self.max_depth,
+                max_workers=self.max_threads,
+                on_document=lambda document: self._on_document(document, max_doc_count, s3_writer),
+                on_links_skipped=lambda document, url: self._extracted_pages.pop(url, None)
+            )
+            # Share the engine's bookkeeping so partial results survive failures
+            self.documents = engine.documents
+            self.visited_urls = engine.visited_urls
             s3_results = None
-            if task_id and self.documents:
-                logger.info(f"Storing {len(self.documents)} documents in S3 for task {task_id}")
+            try:
+                await engine.run(base_url)
+            finally:
+                # Pages fetched by workers cancelled at the end of the crawl never reach the engine
+                self._extracted_pages = {}
+                crawler.save_site_requirements()
+                crawler.close()
+                if s3_writer:
+                    s3_results = await asyncio.get_running_loop().run_in_executor(None, s3_writer.finish)
+            if not self.documents:
+                s3_results = None
+            elif task_id and not s3_writer:
+                # No S3 client: report the failure the same way the batch path always has
                 s3_results = self.s3_storage.store_documents_batch(self.user_id, task_id, self.documents)
+            if s3_results:
                 logger.info(f"S3 storage results: {s3_results['stored_count']} stored, {s3_results['failed_count']} failed")
             response = {
                 "success": True,
                 "url": base_url,
                 "documents_found": len(self.documents),
                 "max_doc_count": max_doc_count,
-                "documents": self.documents,
+                "documents": [without_binary(document) for document in self.documents],
                 "crawl_time": datetime.utcnow().isoformat(),
                 "total_pages": len(self.visited_urls),
                 "total_documents": len(self.documents),
@@ -143,100 +136,89 @@ class EnhancedCrawlerService:
                 "url": base_url,
                 "error": str(e),
                 "documents_found": len(self.documents),
-                "documents": self.documents
+                "documents": [without_binary(document) for document in self.documents]
             }
-    def _crawl_recursive(self, crawler: AdvancedCrawler, url: str, domain: str, max_doc_count: int, depth: int = 0):
-        if len(self.documents) >= max_doc_count:
-            logger.info(f"Reached max document count ({max_doc_count}), stopping crawl")
-            return
-        if url in self.visited_urls:
-            return
-        if depth > 2:
-            logger.info(f"Reached max depth ({depth}), stopping recursion for {url}")
-            return
-        logger.info(f"Crawling: {url} (documents found: {len(self.documents)}/{max_doc_count})")
+
+    def _on_document(self, document: Dict[str, Any], max_doc_count: int, s3_writer=None):
+        """Hand a newly crawled document to the S3 writer and report progress."""
+        if s3_writer:
+            s3_writer.submit(document)
+        self._update_progress(len(self.documents), max_doc_count, f"Found document: {document['url']}")
+
+    def _extract_document_links(self, document: Dict[str, Any], url: str, domain: str) -> Tuple[List[str], List[str]]:
+        """Extract (page_links, document_links) from a crawled page document."""
+        page = self._extracted_pages.pop(url, None)
+        if not document.get('raw_html'):
+            logger.warning(f"No raw HTML found in page {url}, skipping link extraction")
+            return [], []
         try:
-            page_doc = self._crawl_and_save_page(crawler, url, domain)
-            if page_doc:
-                self.documents.append(page_doc)
-                logger.info(f"Added page document: {url}")
-            if len(self.documents) >= max_doc_count:
-                logger.info(f"Reached max document count after adding page {url}")
-                return
-            if page_doc and page_doc.get('raw_html'):
-                try:
-                    soup = BeautifulSoup(page_doc['raw_html'], 'html.parser')
-                    link_extractor = LinkExtractor(domain)
-                    page_links, document_links = link_extractor.extract_links(soup, url, self.visited_urls)
-                    logger.info(f"Found {len(page_links)} page links and {len(document_links)} document links on {url}")
-                    # Multithreaded document downloads
-                    with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_threads) as executor:
-                        futures = []
-                        for doc_url in document_links:
-                            if len(self.documents) >= max_doc_count:
-                                break
-                            futures.append(executor.submit(self._crawl_and_save_file, crawler, doc_url))
-                        for future in concurrent.futures.as_completed(futures):
-                            if len(self.documents) >= max_doc_count:
-                                break
-                            doc = future.result()
-                            if doc:
-                                self.documents.append(doc)
-                                logger.info(f"Added document: {doc['url']} (total: {len(self.documents)}/{max_doc_count})")
-                    # Multithreaded sub-page crawling
-                    with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_threads) as executor:
-                        futures = []
-                        for page_url in page_links:
-                            if len(self.documents) >= max_doc_count:
-                                break
-                            futures.append(executor.submit(self._crawl_recursive, crawler, page_url, domain, max_doc_count, depth + 1))
-                        for future in concurrent.futures.as_completed(futures):
-                            if len(self.documents) >= max_doc_count:
-                                break
-                except Exception as e:
-                    logger.error(f"Error in recursive crawl for {url}: {e}")
-            else:
-                logger.warning(f"No raw HTML found in page {url}, skipping link extraction")
+            page = page or self.page_extractor.extract(document['raw_html'])
+            link_extractor = LinkExtractor(domain)
+            page_links, document_links = link_extractor.extract_page_links(page, url, self.visited_urls)
+            logger.info(f"Found {len(page_links)} page links and {len(document_links)} document links on {url}")
+            return page_links, document_links
         except Exception as e:
-            logger.error(f"Error crawling {url}: {e}")
+            logger.error(f"Error extracting links from {url}: {e}")
+            return [], []
     
     def _crawl_and_save_page(self, crawler: AdvancedCrawler, url: str, domain: str) -> Optional[Dict[str, Any]]:
         """Crawl a single page and save as document."""
-        if url in self.visited_urls:
-            return None
-            
-        self.visited_urls.add(url)
-        
         try:
-            # Crawl the page with optimized settings for speed
-            # Try without JavaScript first for speed, fallback to JS if needed
-            result = crawler.crawl_url(
-                url, 
-                content_type="generic",
-                render_js=False,  # Disable JS for speed
-                timeout=30000,  # 30 second timeout in milliseconds
-                block_resources=True,  # Block images/CSS for speed
-                wait=1000  # Wait 1 second after page load
-            )
+            # Use what we learned about this domain on earlier crawls: known JS sites
+            # skip the no-JS attempt, known static sites skip the JS retry for thin pages
+            profile = crawler.domain_profiles.get(domain)
+            requires_js = profile.requires_js if profile else None
+            proxy_mode = profile.proxy_mode if profile and profile.proxy_mode else "standard"
+            if proxy_mode == "stealth":
+                requires_js = True  # Stealth proxies require JS rendering
+            proxy_options = {
+                "premium_proxy": proxy_mode == "premium",
+                "stealth_proxy": proxy_mode == "stealth",
+            }
             
-            # If no content or very little content, try with JavaScript
-            if not result.get('success') or len(result.get('content', '')) < 1000:
-                logger.info(f"Retrying {url} with JavaScript rendering")
+            result = None
+            if not requires_js:
+                # Try without JavaScript first for speed
+                result = crawler.crawl_url(
+                    url, 
+                    content_type="generic",
+                    render_js=False,  # Disable JS for speed
+                    timeout=30000,  # 30 second timeout in milliseconds
+                    block_resources=True,  # Block images/CSS for speed
+                    wait=1000,  # Wait 1 second after page load
+                    **proxy_options
+                )
+                self._record_page_outcome(crawler, domain, result)
+            
+            no_js_thin = result is not None and len(result.get('content', '')) < 1000
+            if requires_js or not result.get('success') or (requires_js is None and no_js_thin):
+                if result is not None:
+                    logger.info(f"Retrying {url} with JavaScript rendering")
                 result = crawler.crawl_url(
                     url, 
                     content_type="generic",
                     render_js=True,
                     timeout=30000,  # 30 second timeout in milliseconds
-                    wait=2000  # Wait 2 seconds for JS to load
+                    wait=2000,  # Wait 2 seconds for JS to load
+                    **proxy_options
                 )
+                self._record_page_outcome(crawler, domain, result)
+                if requires_js is None and no_js_thin and len(result.get('content', '')) >= 1000:
+                    crawler.domain_profiles.set_requires_js(domain, True)
+            elif requires_js is None and result.get('success'):
+                crawler.domain_profiles.set_requires_js(domain, False)
+            
+            if result.get('success') and not (profile and profile.proxy_mode):
+                crawler.domain_profiles.set_proxy_mode(domain, proxy_mode)
             
             if not result.get('success'):
                 logger.warning(f"Failed to crawl {url}: {result.get('error')}")
                 return None
             
-            # Extract title and clean content from HTML
-            title = self._extract_title(result['content'])
-            clean_content = self._extract_clean_content(result['content'])
+            # Parse once for title, clean content and link candidates
+            page = self.page_extractor.extract(result['content'])
+            title = page.title
+            clean_content = page.text
             
             # Debug: Log content lengths
             raw_content_length = len(result.get('content', ''))
@@ -264,6 +246,8 @@ class EnhancedCrawlerService:
                 "domain": domain
             }
             
+            # Only cached once the document is returned, so the engine always releases it
+            self._extracted_pages[url] = page
             logger.info(f"Saved HTML document: {url}")
             return document
             
@@ -271,13 +255,14 @@ class EnhancedCrawlerService:
             logger.error(f"Error crawling page {url}: {e}")
             return None
     
+    def _record_page_outcome(self, crawler: AdvancedCrawler, domain: str, result: Dict[str, Any]):
+        """Feed a live (non-cached) page fetch into the domain profile."""
+        if result.get('from_cache'):
+            return
+        crawler.domain_profiles.record_request(domain, bool(result.get('success')), result.get('crawl_time'))
+    
     def _crawl_and_save_file(self, crawler: AdvancedCrawler, url: str) -> Optional[Dict[str, Any]]:
         """Crawl and save a file (PDF, Excel, etc.)."""
-        if url in self.visited_urls:
-            return None
-            
-        self.visited_urls.add(url)
-        
         try:
             logger.info(f"Attempting to download file: {url}")
             
@@ -293,14 +278,13 @@ class EnhancedCrawlerService:
             file_type = result.get('content_type', 'unknown')
             content_type = result.get('content_type', 'unknown')
             raw_content = result.get('content', b'')
+            binary = result.get('binary') or BinaryContent(raw_content, content_type)
             
             logger.info(f"Successfully downloaded {url}: {len(raw_content)} bytes, type: {file_type}")
             
             # Handle different file types appropriately
             if file_type == 'application/pdf' or url.lower().endswith('.pdf'):
-                # For PDFs, convert binary content to base64 and extract text if possible
-                import base64
-                content_base64 = base64.b64encode(raw_content).decode('utf-8')
+                # For PDFs, keep the raw bytes and extract text if possible
                 
                 # Try to extract text from PDF (simplified - in production you'd use PyPDF2 or similar)
                 pdf_text = self._extract_pdf_text(raw_content)
@@ -310,7 +294,7 @@ class EnhancedCrawlerService:
                     "url": url,
                     "title": filename,
                     "content": pdf_text,  # Extracted text content
-                    "content_base64": content_base64,  # Binary content as base64
+                    "binary": binary,  # Raw bytes, uploaded to S3 as-is
                     "content_type": "application/pdf",
                     "file_type": "pdf",
                     "content_length": len(raw_content),
@@ -324,16 +308,14 @@ class EnhancedCrawlerService:
                 }
                 
             elif file_type.startswith('image/'):
-                # For images, convert to base64 and add description
-                import base64
-                content_base64 = base64.b64encode(raw_content).decode('utf-8')
+                # For images, keep the raw bytes and add description
                 
                 document = {
                     "id": self._generate_document_id(url),
                     "url": url,
                     "title": filename,
                     "content": f"Image file: {filename} ({file_type})",
-                    "content_base64": content_base64,
+                    "binary": binary,
                     "content_type": file_type,
                     "file_type": "image",
                     "content_length": len(raw_content),
@@ -346,16 +328,14 @@ class EnhancedCrawlerService:
                 }
                 
             elif file_type in ['application/vnd.ms-excel', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet']:
-                # For Excel files, convert to base64 and add description
-                import base64
-                content_base64 = base64.b64encode(raw_content).decode('utf-8')
+                # For Excel files, keep the raw bytes and add description
                 
                 document = {
                     "id": self._generate_document_id(url),
                     "url": url,
                     "title": filename,
                     "content": f"Excel file: {filename} - Contains spreadsheet data",
-                    "content_base64": content_base64,
+                    "binary": binary,
                     "content_type": file_type,
                     "file_type": "excel",
                     "content_length": len(raw_content),
@@ -368,16 +348,14 @@ class EnhancedCrawlerService:
                 }
                 
             elif file_type in ['application/msword', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document']:
-                # For Word documents, convert to base64 and add description
-                import base64
-                content_base64 = base64.b64encode(raw_content).decode('utf-8')
+                # For Word documents, keep the raw bytes and add description
                 
                 document = {
                     "id": self._generate_document_id(url),
                     "url": url,
                     "title": filename,
                     "content": f"Word document: {filename} - Contains document content",
-                    "content_base64": content_base64,
+                    "binary": binary,
                     "content_type": file_type,
                     "file_type": "word",
                     "content_length": len(raw_content),
@@ -417,16 +395,14 @@ class EnhancedCrawlerService:
                 }
                 
             else:
-                # For other file types, convert to base64 and add generic description
-                import base64
-                content_base64 = base64.b64encode(raw_content).decode('utf-8')
+                # For other file types, keep the raw bytes and add generic description
                 
                 document = {
                     "id": self._generate_document_id(url),
                     "url": url,
                     "title": filename,
                     "content": f"File: {filename} ({file_type}) - Binary content available",
-                    "content_base64": content_base64,
+                    "binary": binary,
                     "content_type": file_type,
                     "file_type": "binary",
                     "content_length": len(raw_content),
@@ -448,31 +424,43 @@ class EnhancedCrawlerService:
     def _extract_pdf_text(self, pdf_content: bytes) -> str:
         """Extract text from PDF content."""
         try:
+            extracted_text = None
+            # Parse page ranges in the extraction worker processes when the common package is deployed
+            if extraction_executor is not None:
+                try:
+                    pages = extraction_executor.extract_pdf_pages_blocking(pdf_content, "crawled PDF")
+                    extracted_text = '\n'.join(pages[page_num] for page_num in sorted(pages))
+                    if extracted_text.strip():
+                        return extracted_text
+                except Exception as e:
+                    logger.warning(f"Worker PDF extraction failed, parsing on this thread: {e}")
+            
             # Try to extract text using PyPDF2 if available
-            try:
-                import PyPDF2
-                import io
+            if extracted_text is None:
+                try:
+                    import PyPDF2
+                    import io
                 
-                pdf_file = io.BytesIO(pdf_content)
-                pdf_reader = PyPDF2.PdfReader(pdf_file)
+                    pdf_file = io.BytesIO(pdf_content)
+                    pdf_reader = PyPDF2.PdfReader(pdf_file)
                 
-                text_content = []
-                for page_num in range(len(pdf_reader.pages)):
-                    try:
-                        page = pdf_reader.pages[page_num]
-                        text_content.append(page.extract_text())
-                    except Exception as e:
-                        logger.warning(f"Failed to extract text from PDF page {page_num}: {e}")
-                        continue
+                    text_content = []
+                    for page_num in range(len(pdf_reader.pages)):
+                        try:
+                            page = pdf_reader.pages[page_num]
+                            text_content.append(page.extract_text())
+                        except Exception as e:
+                            logger.warning(f"Failed to extract text from PDF page {page_num}: {e}")
+                            continue
                 
-                extracted_text = '\n'.join(text_content)
-                if extracted_text.strip():
-                    return extracted_text
+                    extracted_text = '\n'.join(text_content)
+                    if extracted_text.strip():
+                        return extracted_text
                     
-            except ImportError:
-                logger.info("PyPDF2 not available, using fallback PDF text extraction")
-            except Exception as e:
-                logger.warning(f"PyPDF2 extraction failed: {e}")
+                except ImportError:
+                    logger.info("PyPDF2 not available, using fallback PDF text extraction")
+                except Exception as e:
+                    logger.warning(f"PyPDF2 extraction failed: {e}")
             
             # Fallback: Check if it's a valid PDF and return basic info
             if pdf_content.startswith(b'%PDF'):
@@ -487,76 +475,14 @@ class EnhancedCrawlerService:
     def _extract_title(self, html_content: str) -> str:
         """Extract title from HTML content."""
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
-            title_tag = soup.find('title')
-            if title_tag:
-                return title_tag.get_text(strip=True)
-            
-            # Fallback to h1
-            h1_tag = soup.find('h1')
-            if h1_tag:
-                return h1_tag.get_text(strip=True)
-            
-            return "Untitled Document"
+            return self.page_extractor.extract(html_content).title
         except Exception:
             return "Untitled Document"
     
     def _extract_clean_content(self, html_content: str) -> str:
         """Extract clean text content from HTML with focus on financial content."""
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
-            # Remove script and style elements
-            for script in soup(["script", "style", "nav", "footer", "header"]):
-                script.decompose()
-            
-            # Prioritize financial content areas
-            financial_content = []
-            
-            # Look for financial-specific content areas
-            financial_selectors = [
-                'div[class*="financial"]', 'div[class*="earnings"]', 'div[class*="report"]',
-                'div[class*="statement"]', 'div[class*="filing"]', 'div[class*="disclosure"]',
-                'div[class*="announcement"]', 'div[class*="press"]', 'div[class*="news"]',
-                'div[class*="data"]', 'div[class*="metrics"]', 'div[class*="results"]',
-                'section[class*="financial"]', 'section[class*="earnings"]',
-                'article[class*="financial"]', 'article[class*="earnings"]',
-                'table[class*="financial"]', 'table[class*="data"]', 'table[class*="results"]',
-                
-                # News and economics content areas
-                'div[class*="news"]', 'div[class*="article"]', 'div[class*="story"]',
-                'div[class*="headline"]', 'div[class*="breaking"]', 'div[class*="latest"]',
-                'div[class*="economics"]', 'div[class*="economic"]', 'div[class*="macro"]',
-                'div[class*="policy"]', 'div[class*="central-bank"]', 'div[class*="fed"]',
-                'div[class*="market"]', 'div[class*="trading"]', 'div[class*="analysis"]',
-                'div[class*="commentary"]', 'div[class*="opinion"]', 'div[class*="editorial"]',
-                'section[class*="news"]', 'section[class*="article"]', 'section[class*="economics"]',
-                'article[class*="news"]', 'article[class*="article"]', 'article[class*="economics"]',
-                'div[class*="content"]', 'div[class*="main-content"]', 'div[class*="body"]'
-            ]
-            
-            for selector in financial_selectors:
-                elements = soup.select(selector)
-                for element in elements:
-                    text = element.get_text(strip=True)
-                    if text and len(text) > 50:  # Only include substantial content
-                        financial_content.append(text)
-            
-            # If no financial-specific content found, get all text
-            if not financial_content:
-                text = soup.get_text()
-            else:
-                # Combine financial content with general content
-                general_text = soup.get_text()
-                financial_content.append(general_text)
-                text = ' '.join(financial_content)
-            
-            # Clean up whitespace
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            text = ' '.join(chunk for chunk in chunks if chunk)
-            
-            return text
+            return self.page_extractor.extract(html_content).text
         except Exception as e:
             logger.error(f"Error extracting clean content: {e}")
             return html_content
@@ -663,7 +589,10 @@ class EnhancedCrawlerService:
 
     async def download_files(self, file_urls: List[str], max_threads: int = 3) -> List[Dict[str, Any]]:
         """
-        Download multiple files concurrently with rate limiting.
+        Download multiple files concurrently.
+        
+        Pacing is handled by the shared per-domain / per-API-key rate limiter
+        inside AdvancedCrawler.download_file, so no fixed delays are needed here.
         
         Args:
             file_urls: List of file URLs to download
@@ -674,29 +603,20 @@ class EnhancedCrawlerService:
         """
         logger.info(f"Starting download of {len(file_urls)} files with {max_threads} threads")
         
-        results = []
-        
-        # Process files in batches to avoid overwhelming the server
-        batch_size = max(1, max_threads // 2)  # Use fewer concurrent downloads
-        delay_between_batches = 3  # 3 second delay between batches
-        
-        for i in range(0, len(file_urls), batch_size):
-            batch = file_urls[i:i + batch_size]
-            logger.info(f"Processing batch {i//batch_size + 1}: {len(batch)} files")
-            
-            # Download batch concurrently
-            with ThreadPoolExecutor(max_workers=len(batch)) as executor:
-                batch_results = list(executor.map(self.crawler.download_file, batch))
-                results.extend(batch_results)
-            
-            # Add delay between batches to avoid rate limiting
-            if i + batch_size < len(file_urls):
-                logger.info(f"Waiting {delay_between_batches}s before next batch...")
-                await asyncio.sleep(delay_between_batches)
+        crawler = AdvancedCrawler(self.api_key)
+        loop = asyncio.get_running_loop()
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, max_threads)) as executor:
+                results = await asyncio.gather(
+                    *(loop.run_in_executor(executor, crawler.download_file, url) for url in file_urls)
+                )
+        finally:
+            crawler.close()
+        results = list(results)
         
         # Log summary
         successful = sum(1 for r in results if r.get('success', False))
         failed = len(results) - successful
         logger.info(f"Download complete: {successful} successful, {failed} failed")
         
-        return results 
\ No newline at end of file
+        return results 
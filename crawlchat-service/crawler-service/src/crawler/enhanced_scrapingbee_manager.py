@@ -14,6 +14,8 @@ import urllib3
 from dataclasses import dataclass
 from enum import Enum
 from .s3_cache_manager import S3CacheManager
+from .rate_limiter import get_rate_limiter
+from .domain_profiles import get_domain_profile_store
 
 # Suppress SSL warnings
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -92,12 +94,16 @@ class EnhancedScrapingBeeManager:
             ProxyMode.STEALTH: {"requests": 0, "successes": 0, "failures": 0},
         }
         
-        # Site-specific requirements cache
+        # Site-specific requirements cache (backed by the persistent domain profiles)
         self.site_requirements = {}
+        self.domain_profiles = get_domain_profile_store()
         
         # S3 cache manager
         self.s3_cache = S3CacheManager()
         
+        # Shared per-domain / per-API-key pacing
+        self.rate_limiter = get_rate_limiter()
+        
         # Connection pooling
         self.session.mount('http://', requests.adapters.HTTPAdapter(pool_connections=10, pool_maxsize=10))
         self.session.mount('https://', requests.adapters.HTTPAdapter(pool_connections=10, pool_maxsize=10))
@@ -124,6 +130,10 @@ class EnhancedScrapingBeeManager:
         domain = urlparse(url).netloc
         
         # Check if we know this site requires specific mode
+        if domain not in self.site_requirements:
+            profile = self.domain_profiles.get(domain)
+            if profile and profile.proxy_mode:
+                self.site_requirements[domain] = ProxyMode(profile.proxy_mode)
         if domain in self.site_requirements and not force_mode:
             required_mode = self.site_requirements[domain]
             logger.info(f"Site {domain} requires {required_mode.value} mode")
@@ -144,6 +154,7 @@ class EnhancedScrapingBeeManager:
                     # Cache successful mode for this domain
                     if not force_mode:
                         self.site_requirements[domain] = mode
+                        self.domain_profiles.set_proxy_mode(domain, mode.value)
                         logger.info(f"Cached {mode.value} mode for {domain}")
                     
                     return response
@@ -171,6 +182,8 @@ class EnhancedScrapingBeeManager:
                 
                 logger.debug(f"Making {mode.value} request (attempt {attempt + 1})")
                 
+                self.rate_limiter.acquire(url, self.api_key)
+                request_start = time.time()
                 response = self.session.get(
                     self.base_url,
                     params=params,
@@ -178,6 +191,9 @@ class EnhancedScrapingBeeManager:
                     timeout=config.timeout,
                     verify=False
                 )
+                self.rate_limiter.record_response(url, response.status_code, response.headers, self.api_key)
+                self.domain_profiles.record_request(urlparse(url).netloc, response.status_code == 200,
+                                                    time.time() - request_start)
                 
                 # Update statistics
                 self.request_stats[mode]["requests"] += 1
@@ -485,7 +501,9 @@ class EnhancedScrapingBeeManager:
                 domain: mode.value for domain, mode in self.site_requirements.items()
             }
             
-            self.s3_cache.save_site_requirements(serializable_requirements)
+            for domain, mode in serializable_requirements.items():
+                self.domain_profiles.set_proxy_mode(domain, mode)
+            self.domain_profiles.flush(force=True)
             logger.info("Site requirements saved to S3")
         except Exception as e:
             logger.error(f"Failed to save site requirements to S3: {e}")
@@ -493,11 +511,12 @@ class EnhancedScrapingBeeManager:
     def load_site_requirements(self, filename: str = None):
         """Load site requirements from S3."""
         try:
-            requirements = self.s3_cache.load_site_requirements()
+            profiles = self.domain_profiles.all_profiles()
             
             # Convert string back to enum
             self.site_requirements = {
-                domain: ProxyMode(mode) for domain, mode in requirements.items()
+                domain: ProxyMode(profile.proxy_mode)
+                for domain, profile in profiles.items() if profile.proxy_mode
             }
             logger.info("Site requirements loaded from S3")
         except Exception as e:
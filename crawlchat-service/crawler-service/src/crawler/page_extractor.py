@@ -0,0 +1,287 @@
+"""
+Single-pass HTML extraction for crawled pages.
+Produces the title, boilerplate-stripped main text and link candidates in one
+streaming traversal (lxml target parser, or the stdlib HTML parser when lxml
+is unavailable) instead of building several BeautifulSoup trees per page.
+"""
+
+import logging
+import re
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from lxml import etree
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Subtrees whose text never belongs to the main content
+SKIP_TAGS = {"script", "style", "nav", "footer", "header", "noscript", "template"}
+
+# Elements that never have children (the stdlib parser emits no end tag for them)
+VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link",
+    "meta", "param", "source", "track", "wbr",
+}
+
+# Elements that separate words in rendered text
+BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "br", "dd", "div", "dl", "dt",
+    "fieldset", "figcaption", "figure", "form", "h1", "h2", "h3", "h4", "h5", "h6",
+    "hr", "li", "main", "ol", "p", "pre", "section", "table", "tbody", "td",
+    "tfoot", "th", "thead", "title", "tr", "ul",
+}
+
+ONCLICK_TAGS = {"button", "div", "span"}
+
+# Content areas (by tag and class keyword) whose text is placed first in the
+# extracted text, mirroring the financial/news selectors of the old extractor
+CONTENT_AREA_KEYWORDS = {
+    "div": [
+        "financial", "earnings", "report", "statement", "filing", "disclosure",
+        "announcement", "press", "news", "data", "metrics", "results",
+        "article", "story", "headline", "breaking", "latest", "economics",
+        "economic", "macro", "policy", "central-bank", "fed", "market",
+        "trading", "analysis", "commentary", "opinion", "editorial",
+        "content", "main-content", "body",
+    ],
+    "section": ["financial", "earnings", "news", "article", "economics"],
+    "article": ["financial", "earnings", "news", "article", "economics"],
+    "table": ["financial", "data", "results"],
+}
+CONTENT_AREA_PATTERNS = {
+    tag: re.compile("|".join(re.escape(keyword) for keyword in keywords))
+    for tag, keywords in CONTENT_AREA_KEYWORDS.items()
+}
+
+# Minimum text length for a content area to be prioritized
+MIN_CONTENT_AREA_LENGTH = 50
+
+DEFAULT_TITLE = "Untitled Document"
+
+
+@dataclass
+class ExtractedPage:
+    """Everything the crawler needs from one HTML page."""
+    title: str = DEFAULT_TITLE
+    text: str = ""
+    anchors: List[Tuple[str, str]] = field(default_factory=list)
+    onclick_handlers: List[str] = field(default_factory=list)
+    data_urls: List[str] = field(default_factory=list)
+    scripts: List[str] = field(default_factory=list)
+
+
+def normalize_whitespace(text: str) -> str:
+    """Collapse whitespace the same way the crawler always has."""
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return ' '.join(chunk for chunk in chunks if chunk)
+
+
+class _ExtractionTarget:
+    """
+    Streaming event handler shared by the lxml and stdlib parsers.
+
+    Receives start/end/data events and accumulates the title, text and link
+    candidates without building a tree.
+    """
+
+    def __init__(self):
+        self._stack: List[Tuple[str, bool, bool, bool]] = []  # (tag, skip, content_area, anchor)
+        self._skip_depth = 0
+        self._content_parts: Optional[List[str]] = None
+        self._main_parts: List[str] = []
+        self._other_parts: List[str] = []
+        self._title_parts: Optional[List[str]] = None
+        self._title: Optional[str] = None
+        self._h1_parts: Optional[List[str]] = None
+        self._h1: Optional[str] = None
+        self._open_anchors: List[Tuple[str, List[str]]] = []
+        self._script_parts: Optional[List[str]] = None
+        self.page = ExtractedPage()
+
+    # Parser target interface
+
+    def start(self, tag: str, attrib: Dict[str, str]):
+        tag = tag.lower() if isinstance(tag, str) else ""
+        self._collect_attributes(tag, attrib)
+        if tag in BLOCK_TAGS:
+            self._append_text("\n")
+        if tag in VOID_TAGS:
+            return
+
+        skip = tag in SKIP_TAGS
+        if skip:
+            self._skip_depth += 1
+        content_area = False
+        if self._content_parts is None and tag in CONTENT_AREA_PATTERNS:
+            class_attr = (attrib.get("class") or "")
+            if class_attr and CONTENT_AREA_PATTERNS[tag].search(class_attr):
+                content_area = True
+                self._content_parts = []
+        anchor = tag == "a" and bool(attrib.get("href"))
+        if anchor:
+            self._open_anchors.append((attrib.get("href"), []))
+
+        if tag == "title" and self._title is None:
+            self._title_parts = []
+        elif tag == "h1" and self._h1 is None:
+            self._h1_parts = []
+        elif tag == "script":
+            self._script_parts = []
+
+        self._stack.append((tag, skip, content_area, anchor))
+
+    def end(self, tag: str):
+        tag = tag.lower() if isinstance(tag, str) else ""
+        if tag in VOID_TAGS:
+            return
+        # Tolerate unbalanced markup: close everything up to the matching tag
+        if not any(entry[0] == tag for entry in self._stack):
+            return
+        while self._stack:
+            entry = self._stack.pop()
+            self._close(entry)
+            if entry[0] == tag:
+                break
+
+    def data(self, text: str):
+        if self._title_parts is not None:
+            self._title_parts.append(text)
+        if self._h1_parts is not None:
+            self._h1_parts.append(text)
+        for _, parts in self._open_anchors:
+            parts.append(text)
+        if self._script_parts is not None:
+            self._script_parts.append(text)
+        self._append_text(text)
+
+    def comment(self, text: str):
+        pass
+
+    def close(self) -> ExtractedPage:
+        while self._stack:
+            self._close(self._stack.pop())
+        page = self.page
+        page.title = self._title or self._h1 or DEFAULT_TITLE
+        page.text = normalize_whitespace(' '.join(self._main_parts + self._other_parts))
+        return page
+
+    # Internals
+
+    def _collect_attributes(self, tag: str, attrib: Dict[str, str]):
+        if tag in ONCLICK_TAGS and attrib.get("onclick"):
+            self.page.onclick_handlers.append(attrib.get("onclick"))
+        if attrib.get("data-url"):
+            self.page.data_urls.append(attrib.get("data-url"))
+
+    def _append_text(self, text: str):
+        if self._skip_depth:
+            return
+        if self._content_parts is not None:
+            self._content_parts.append(text)
+        else:
+            self._other_parts.append(text)
+
+    def _close(self, entry: Tuple[str, bool, bool, bool]):
+        tag, skip, content_area, anchor = entry
+        if skip:
+            self._skip_depth -= 1
+        if anchor and self._open_anchors:
+            href, parts = self._open_anchors.pop()
+            self.page.anchors.append((href, _strip_join(parts)))
+        if tag == "title" and self._title_parts is not None:
+            self._title = _strip_join(self._title_parts) or None
+            self._title_parts = None
+        elif tag == "h1" and self._h1_parts is not None:
+            self._h1 = _strip_join(self._h1_parts) or None
+            self._h1_parts = None
+        elif tag == "script" and self._script_parts is not None:
+            script = ''.join(self._script_parts)
+            if script.strip():
+                self.page.scripts.append(script)
+            self._script_parts = None
+        if tag in BLOCK_TAGS:
+            self._append_text("\n")
+        if content_area:
+            text = ''.join(self._content_parts)
+            self._content_parts = None
+            if len(text.strip()) > MIN_CONTENT_AREA_LENGTH:
+                self._main_parts.append(text)
+            else:
+                self._other_parts.append(text)
+
+
+def _strip_join(parts: List[str]) -> str:
+    """Join text fragments like BeautifulSoup's get_text(strip=True)."""
+    return ''.join(part.strip() for part in parts if part.strip())
+
+
+class _StdlibParser(HTMLParser):
+    """Adapter feeding stdlib HTMLParser events into an extraction target."""
+
+    def __init__(self, target: _ExtractionTarget):
+        super().__init__(convert_charrefs=True)
+        self.target = target
+
+    def handle_starttag(self, tag, attrs):
+        self.target.start(tag, {name: value or "" for name, value in attrs})
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        self.target.end(tag)
+
+    def handle_endtag(self, tag):
+        self.target.end(tag)
+
+    def handle_data(self, data):
+        self.target.data(data)
+
+
+class PageExtractor:
+    """Extracts title, main text and link candidates from HTML in a single pass."""
+
+    def __init__(self, use_lxml: Optional[bool] = None):
+        """
+        Initialize the extractor.
+
+        Args:
+            use_lxml: Force the lxml (True) or stdlib (False) parser; defaults to lxml when installed
+        """
+        self.use_lxml = LXML_AVAILABLE if use_lxml is None else (use_lxml and LXML_AVAILABLE)
+
+    def extract(self, html_content: str) -> ExtractedPage:
+        """
+        Parse an HTML page once.
+
+        Args:
+            html_content: Raw HTML
+
+        Returns:
+            ExtractedPage with title, clean text and link candidates
+        """
+        if not html_content:
+            return ExtractedPage()
+        if self.use_lxml:
+            try:
+                return self._extract_with_lxml(html_content)
+            except Exception as e:
+                logger.warning(f"lxml extraction failed, falling back to html.parser: {e}")
+        return self._extract_with_stdlib(html_content)
+
+    def _extract_with_lxml(self, html_content: str) -> ExtractedPage:
+        target = _ExtractionTarget()
+        parser = etree.HTMLParser(target=target, remove_comments=True)
+        parser.feed(html_content)
+        return parser.close()
+
+    def _extract_with_stdlib(self, html_content: str) -> ExtractedPage:
+        target = _ExtractionTarget()
+        parser = _StdlibParser(target)
+        parser.feed(html_content)
+        parser.close()
+        return target.close()
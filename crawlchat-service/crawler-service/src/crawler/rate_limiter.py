@@ -0,0 +1,193 @@
+"""
+Per-domain and per-API-key rate limiting for the crawler.
+Token buckets are shared by every crawler entry point in the process and adapt
+to 429 / Retry-After responses (AIMD) instead of relying on fixed sleeps.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Mapping, Optional
+from urllib.parse import urlparse
+
+from .utils import get_header, get_optimal_delay
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds for adaptive rates (requests per second)
+MAX_DOMAIN_RATE = float(os.getenv('CRAWLER_MAX_DOMAIN_RPS', '5'))
+MAX_API_KEY_RATE = float(os.getenv('SCRAPINGBEE_MAX_RPS', '10'))
+MIN_RATE = 0.1
+
+DOMAIN_BURST = 3
+DOMAIN_RATE_INCREASE = 0.1
+API_KEY_RATE_INCREASE = 0.5
+
+# Fallback pause when a 429 carries no Retry-After header
+DEFAULT_RETRY_AFTER = 5.0
+
+
+class TokenBucket:
+    """Token bucket with additive-increase / multiplicative-decrease rate control."""
+
+    def __init__(self, rate: float, capacity: float, max_rate: float, increase: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_rate = max_rate
+        self.increase = increase
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated_at
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated_at = now
+
+    def reserve(self, now: float) -> float:
+        """
+        Take one token, allowing the balance to go negative.
+
+        Returns:
+            Seconds the caller must wait before sending its request
+        """
+        self._refill(now)
+        self.tokens -= 1
+        wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        return max(wait, self.blocked_until - now)
+
+    def on_success(self):
+        """Additive increase towards the configured maximum rate."""
+        self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttled(self, now: float, retry_after: Optional[float]):
+        """Multiplicative decrease and pause until Retry-After has elapsed."""
+        self.rate = max(MIN_RATE, self.rate / 2)
+        self.tokens = min(self.tokens, 0.0)
+        pause = retry_after if retry_after is not None else DEFAULT_RETRY_AFTER
+        self.blocked_until = max(self.blocked_until, now + pause)
+
+
+class RateLimitScheduler:
+    """
+    Shared scheduler that paces requests per target domain and per ScrapingBee API key.
+
+    Callers block in ``acquire`` before sending a request and report the outcome
+    with ``record_response`` so the allowed rate converges on what the target
+    and ScrapingBee actually accept.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._domain_buckets: Dict[str, TokenBucket] = {}
+        self._api_key_buckets: Dict[str, TokenBucket] = {}
+
+    @staticmethod
+    def _key_id(api_key: str) -> str:
+        """Identify an API key bucket without holding the raw key."""
+        return hashlib.sha1(api_key.encode('utf-8')).hexdigest()[:12]
+
+    def _domain_bucket(self, url: str) -> TokenBucket:
+        domain = urlparse(url).netloc.lower()
+        bucket = self._domain_buckets.get(domain)
+        if bucket is None:
+            initial_rate = min(MAX_DOMAIN_RATE, 1.0 / get_optimal_delay(url))
+            bucket = TokenBucket(initial_rate, DOMAIN_BURST, MAX_DOMAIN_RATE, DOMAIN_RATE_INCREASE)
+            self._domain_buckets[domain] = bucket
+        return bucket
+
+    def _api_key_bucket(self, api_key: Optional[str]) -> Optional[TokenBucket]:
+        if not api_key:
+            return None
+        key_id = self._key_id(api_key)
+        bucket = self._api_key_buckets.get(key_id)
+        if bucket is None:
+            bucket = TokenBucket(MAX_API_KEY_RATE, MAX_API_KEY_RATE, MAX_API_KEY_RATE, API_KEY_RATE_INCREASE)
+            self._api_key_buckets[key_id] = bucket
+        return bucket
+
+    def acquire(self, url: str, api_key: Optional[str] = None) -> float:
+        """
+        Block until a request to ``url`` through ``api_key`` is allowed.
+
+        Returns:
+            Seconds spent waiting
+        """
+        with self._lock:
+            now = time.monotonic()
+            wait = self._domain_bucket(url).reserve(now)
+            key_bucket = self._api_key_bucket(api_key)
+            if key_bucket:
+                wait = max(wait, key_bucket.reserve(now))
+
+        if wait > 0:
+            logger.debug(f"Rate limiter delaying request to {urlparse(url).netloc} by {wait:.2f}s")
+            time.sleep(wait)
+        return wait
+
+    def record_response(self, url: str, status_code: int, headers: Optional[Mapping[str, str]] = None,
+                        api_key: Optional[str] = None):
+        """
+        Feed a response back into the scheduler.
+
+        A 429 from ScrapingBee itself throttles the API key; a 429 forwarded
+        from the target site (Spb-Initial-Status-Code) throttles the domain.
+        """
+        headers = headers or {}
+        with self._lock:
+            now = time.monotonic()
+            domain_bucket = self._domain_bucket(url)
+            key_bucket = self._api_key_bucket(api_key)
+
+            if status_code != 429:
+                if 200 <= status_code < 400:
+                    domain_bucket.on_success()
+                    if key_bucket:
+                        key_bucket.on_success()
+                return
+
+            retry_after = parse_retry_after(get_header(headers, 'Retry-After'))
+            initial_status = get_header(headers, 'Spb-Initial-Status-Code')
+            if initial_status == '429' or key_bucket is None:
+                domain_bucket.on_throttled(now, retry_after)
+                logger.warning(f"Domain {urlparse(url).netloc} rate limited, slowing to {domain_bucket.rate:.2f} req/s")
+            else:
+                key_bucket.on_throttled(now, retry_after)
+                logger.warning(f"ScrapingBee API key rate limited, slowing to {key_bucket.rate:.2f} req/s")
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """Get current per-domain rates."""
+        with self._lock:
+            return {domain: {'rate': round(bucket.rate, 2)} for domain, bucket in self._domain_buckets.items()}
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given either as seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+_rate_limiter: Optional[RateLimitScheduler] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimitScheduler:
+    """Get the process-wide rate limit scheduler."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                _rate_limiter = RateLimitScheduler()
+    return _rate_limiter
@@ -0,0 +1,322 @@
+"""
+Content-addressed response cache for ScrapingBee fetches.
+Entries are keyed by normalized URL plus the render options that change the
+response. Bodies are stored once per SHA-256 digest in a local disk tier
+(LRU-evicted, survives warm Lambda invocations) and an S3 tier shared across
+instances and cold starts. Stale entries are revalidated with ETag /
+Last-Modified when the origin supports it.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import Counter, OrderedDict
+from dataclasses import asdict, dataclass, field, replace
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse, urlunparse
+
+from .s3_cache_manager import S3CacheManager
+from .url_normalizer import canonicalize_url
+from .utils import get_header
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'crawlchat_response_cache')
+DEFAULT_TTL_SECONDS = int(os.getenv('CRAWLER_CACHE_TTL', str(24 * 3600)))
+DEFAULT_MAX_ENTRIES = int(os.getenv('CRAWLER_CACHE_MAX_ENTRIES', '2000'))
+DEFAULT_MAX_BYTES = int(os.getenv('CRAWLER_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+S3_PREFIX = "cache/responses"
+
+
+@dataclass
+class CachedResponse:
+    """Metadata for a cached response; the body is stored separately by digest."""
+    url: str
+    status_code: int
+    body_hash: str
+    size: int
+    stored_at: float
+    content_type: str = ""
+    headers: Dict[str, str] = field(default_factory=dict)
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    body: Optional[bytes] = field(default=None, repr=False)
+
+    def is_fresh(self, ttl: int) -> bool:
+        """Check whether the entry can be served without contacting the origin."""
+        return (time.time() - self.stored_at) < ttl
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Request headers for conditional revalidation of this entry."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data.pop('body', None)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'CachedResponse':
+        data = {k: v for k, v in data.items() if k in cls.__dataclass_fields__ and k != 'body'}
+        return cls(**data)
+
+
+class ResponseCache:
+    """Two-tier (local disk + S3) content-addressed HTTP response cache."""
+
+    def __init__(self, cache_dir: Optional[str] = None, ttl: int = None,
+                 max_entries: int = None, max_bytes: int = None,
+                 s3_cache: Optional[S3CacheManager] = None):
+        """
+        Initialize the response cache.
+
+        Args:
+            cache_dir: Local cache directory (defaults to CRAWLER_CACHE_DIR or the temp dir)
+            ttl: Seconds an entry is served without revalidation
+            max_entries: Maximum number of local index entries before LRU eviction
+            max_bytes: Maximum total size of local bodies before LRU eviction
+            s3_cache: S3 tier (None disables it)
+        """
+        self.cache_dir = cache_dir or os.getenv('CRAWLER_CACHE_DIR', DEFAULT_CACHE_DIR)
+        self.ttl = ttl if ttl is not None else DEFAULT_TTL_SECONDS
+        self.max_entries = max_entries or DEFAULT_MAX_ENTRIES
+        self.max_bytes = max_bytes or DEFAULT_MAX_BYTES
+        self.s3_cache = s3_cache
+
+        self._lock = threading.Lock()
+        self._index: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._blob_refs: Counter = Counter()
+        self._total_bytes = 0
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0, "s3_hits": 0}
+
+        self._index_dir = os.path.join(self.cache_dir, 'index')
+        self._blob_dir = os.path.join(self.cache_dir, 'blobs')
+        try:
+            os.makedirs(self._index_dir, exist_ok=True)
+            os.makedirs(self._blob_dir, exist_ok=True)
+            self._load_local_index()
+        except OSError as e:
+            logger.warning(f"Local response cache unavailable at {self.cache_dir}: {e}")
+
+    @staticmethod
+    def make_key(url: str, **options: Any) -> str:
+        """
+        Build a cache key from the normalized URL and the options that affect the response.
+
+        A ``js_scenario`` dict is hashed so equivalent scenarios share a key.
+        """
+        normalized = canonicalize_url(url)
+        if not normalized:
+            parsed = urlparse(url.strip())
+            normalized = urlunparse((parsed.scheme.lower(), parsed.netloc.lower(), parsed.path or '/',
+                                     parsed.params, parsed.query, ''))
+        material = {}
+        for name, value in options.items():
+            if value is None:
+                continue
+            if name == 'js_scenario' and not isinstance(value, str):
+                value = hashlib.sha256(json.dumps(value, sort_keys=True).encode('utf-8')).hexdigest()
+            material[name] = value
+        raw = normalized + '|' + json.dumps(material, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """
+        Look up an entry (local tier first, then S3) with its body loaded.
+
+        Returns:
+            Cached response, fresh or stale, or None on miss
+        """
+        with self._lock:
+            entry = self._index.get(key)
+            if entry:
+                body = self._read_blob(entry.body_hash)
+                if body is not None:
+                    self._index.move_to_end(key)
+                    return replace(entry, body=body)
+                self._remove_local(key)
+
+        entry = self._get_from_s3(key)
+        if entry:
+            self.stats["s3_hits"] += 1
+            with self._lock:
+                self._store_local(key, entry, entry.body)
+            return entry
+        return None
+
+    def put(self, key: str, url: str, status_code: int, body: bytes,
+            headers: Optional[Dict[str, str]] = None, content_type: str = "") -> CachedResponse:
+        """Store a successful response in both tiers."""
+        headers = dict(headers or {})
+        entry = CachedResponse(
+            url=url,
+            status_code=status_code,
+            body_hash=hashlib.sha256(body).hexdigest(),
+            size=len(body),
+            stored_at=time.time(),
+            content_type=content_type,
+            headers=headers,
+            etag=get_header(headers, 'ETag') or get_header(headers, 'Spb-ETag'),
+            last_modified=get_header(headers, 'Last-Modified') or get_header(headers, 'Spb-Last-Modified'),
+            body=body,
+        )
+        with self._lock:
+            self._store_local(key, entry, body)
+        self._put_to_s3(key, entry, body)
+        return entry
+
+    def refresh(self, key: str, entry: CachedResponse) -> CachedResponse:
+        """Mark an entry fresh again after the origin answered 304 Not Modified."""
+        entry.stored_at = time.time()
+        self.stats["revalidated"] += 1
+        with self._lock:
+            if key in self._index:
+                self._index[key].stored_at = entry.stored_at
+                self._write_index(key, entry)
+        if self.s3_cache:
+            self.s3_cache.save_cache_data(entry.to_dict(), f"{S3_PREFIX}/meta/{key}.json")
+        return entry
+
+    def record_hit(self):
+        self.stats["hits"] += 1
+
+    def record_miss(self):
+        self.stats["misses"] += 1
+
+    @staticmethod
+    def is_not_modified(status_code: int, headers: Optional[Dict[str, str]] = None) -> bool:
+        """Detect a 304 either directly or as forwarded by ScrapingBee."""
+        if status_code == 304:
+            return True
+        return get_header(headers or {}, 'Spb-Initial-Status-Code') == '304'
+
+    # Local tier
+
+    def _load_local_index(self):
+        entries = []
+        for name in os.listdir(self._index_dir):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self._index_dir, name)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    entry = CachedResponse.from_dict(json.load(f))
+                entries.append((os.path.getmtime(path), name[:-5], entry))
+            except Exception:
+                continue
+        for _, key, entry in sorted(entries, key=lambda item: item[0]):
+            self._index[key] = entry
+            if self._blob_refs[entry.body_hash] == 0:
+                self._total_bytes += entry.size
+            self._blob_refs[entry.body_hash] += 1
+        if entries:
+            logger.info(f"Loaded {len(entries)} cached responses from {self.cache_dir}")
+
+    def _blob_path(self, body_hash: str) -> str:
+        return os.path.join(self._blob_dir, body_hash)
+
+    def _read_blob(self, body_hash: str) -> Optional[bytes]:
+        try:
+            with open(self._blob_path(body_hash), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write_index(self, key: str, entry: CachedResponse):
+        try:
+            with open(os.path.join(self._index_dir, f"{key}.json"), 'w', encoding='utf-8') as f:
+                json.dump(entry.to_dict(), f)
+        except OSError as e:
+            logger.warning(f"Failed to write response cache index entry: {e}")
+
+    def _store_local(self, key: str, entry: CachedResponse, body: bytes):
+        if key in self._index:
+            self._remove_local(key)
+        try:
+            blob_path = self._blob_path(entry.body_hash)
+            if self._blob_refs[entry.body_hash] == 0:
+                if not os.path.exists(blob_path):
+                    with open(blob_path, 'wb') as f:
+                        f.write(body)
+                self._total_bytes += entry.size
+            self._blob_refs[entry.body_hash] += 1
+            self._index[key] = replace(entry, body=None)
+            self._write_index(key, entry)
+        except OSError as e:
+            logger.warning(f"Failed to write response cache blob: {e}")
+            return
+        self._evict()
+
+    def _remove_local(self, key: str):
+        entry = self._index.pop(key, None)
+        if not entry:
+            return
+        try:
+            os.remove(os.path.join(self._index_dir, f"{key}.json"))
+        except OSError:
+            pass
+        self._blob_refs[entry.body_hash] -= 1
+        if self._blob_refs[entry.body_hash] <= 0:
+            del self._blob_refs[entry.body_hash]
+            self._total_bytes -= entry.size
+            try:
+                os.remove(self._blob_path(entry.body_hash))
+            except OSError:
+                pass
+
+    def _evict(self):
+        """Evict least recently used entries until within entry and size limits."""
+        while self._index and (len(self._index) > self.max_entries or self._total_bytes > self.max_bytes):
+            oldest_key = next(iter(self._index))
+            self._remove_local(oldest_key)
+
+    # S3 tier
+
+    def _get_from_s3(self, key: str) -> Optional[CachedResponse]:
+        if not self.s3_cache:
+            return None
+        metadata = self.s3_cache.load_cache_data(f"{S3_PREFIX}/meta/{key}.json")
+        if not metadata:
+            return None
+        try:
+            entry = CachedResponse.from_dict(metadata)
+        except TypeError:
+            return None
+        body = self.s3_cache.load_cache_bytes(f"{S3_PREFIX}/blobs/{entry.body_hash}")
+        if body is None:
+            return None
+        entry.body = body
+        return entry
+
+    def _put_to_s3(self, key: str, entry: CachedResponse, body: bytes):
+        if not self.s3_cache:
+            return
+        self.s3_cache.save_cache_bytes(body, f"{S3_PREFIX}/blobs/{entry.body_hash}",
+                                       entry.content_type or 'application/octet-stream')
+        self.s3_cache.save_cache_data(entry.to_dict(), f"{S3_PREFIX}/meta/{key}.json")
+
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Get the process-wide response cache (S3 tier enabled unless CRAWLER_CACHE_S3 is 'false')."""
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                s3_cache = None
+                if os.getenv('CRAWLER_CACHE_S3', 'true').lower() != 'false':
+                    s3_cache = S3CacheManager()
+                _response_cache = ResponseCache(s3_cache=s3_cache)
+    return _response_cache
@@ -242,6 +242,60 @@ class S3CacheManager:
             logger.warning(f"Failed to load cache data from S3: {e}")
             return {}
     
+    def save_cache_bytes(self, body: bytes, key: str, content_type: str = 'application/octet-stream') -> bool:
+        """
+        Save raw bytes to S3.
+        
+        Args:
+            body: Content to store
+            key: S3 object key
+            content_type: Content type of the object
+        """
+        if not self.s3_client:
+            logger.warning("S3 client not available, skipping save")
+            return False
+        
+        try:
+            self.s3_client.put_object(
+                Bucket=self.bucket_name,
+                Key=key,
+                Body=body,
+                ContentType=content_type
+            )
+            
+            logger.info(f"Cache bytes saved to S3: s3://{self.bucket_name}/{key} ({len(body)} bytes)")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to save cache bytes to S3: {e}")
+            return False
+    
+    def load_cache_bytes(self, key: str) -> Optional[bytes]:
+        """
+        Load raw bytes from S3.
+        
+        Args:
+            key: S3 object key
+            
+        Returns:
+            Object content (None if not found or error)
+        """
+        if not self.s3_client:
+            return None
+        
+        try:
+            response = self.s3_client.get_object(
+                Bucket=self.bucket_name,
+                Key=key
+            )
+            return response['Body'].read()
+            
+        except self.s3_client.exceptions.NoSuchKey:
+            return None
+        except Exception as e:
+            logger.warning(f"Failed to load cache bytes from S3: {e}")
+            return None
+    
     def delete_cache_data(self, key: str) -> bool:
         """
         Delete cache data from S3.
@@ -3,18 +3,89 @@ S3 Document Storage for crawled documents
 Stores documents in S3 with structure: crawlchat-data/crawled_documents/user_id/task_id/
 """
 
+import io
 import json
 import logging
 import os
+import threading
 import boto3
-import base64
+from botocore.config import Config
+from boto3.s3.transfer import TransferConfig
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 from urllib.parse import urlparse
 import hashlib
 
+from .binary_content import BINARY_KEY, BinaryContent
+
 logger = logging.getLogger(__name__)
 
+# Concurrent uploads per batch / streaming writer
+S3_UPLOAD_WORKERS = int(os.getenv('S3_UPLOAD_WORKERS', '8'))
+
+# Bodies at or above this size use multipart upload
+MULTIPART_THRESHOLD = int(os.getenv('S3_MULTIPART_THRESHOLD', str(8 * 1024 * 1024)))
+MULTIPART_CHUNKSIZE = int(os.getenv('S3_MULTIPART_CHUNKSIZE', str(8 * 1024 * 1024)))
+
+# Per-task manifest: one compact JSON line per stored document, so a task can be
+# listed with a single GET instead of a listing plus a request per object
+MANIFEST_FILENAME = "_manifest.jsonl"
+MANIFEST_FIELDS = (
+    "document_id", "url", "title", "domain", "filename", "content_type",
+    "s3_key", "metadata_key", "size", "stored_at",
+)
+# Streaming writers rewrite the manifest after this many new documents
+MANIFEST_FLUSH_INTERVAL = int(os.getenv('S3_MANIFEST_FLUSH_INTERVAL', '25'))
+# Serializes read-modify-write manifest updates within the process
+_manifest_lock = threading.Lock()
+
+# Maximum keys per delete_objects request
+DELETE_BATCH_SIZE = 1000
+
+# One client (and botocore connection pool) per region, shared by all storage instances
+_shared_clients: Dict[str, Any] = {}
+_shared_clients_lock = threading.Lock()
+
+
+def get_shared_s3_client(region: str):
+    """Get the process-wide S3 client for a region, sized for concurrent uploads."""
+    client = _shared_clients.get(region)
+    if client is None:
+        with _shared_clients_lock:
+            client = _shared_clients.get(region)
+            if client is None:
+                config = Config(
+                    max_pool_connections=max(10, S3_UPLOAD_WORKERS * 2),
+                    retries={'max_attempts': 5, 'mode': 'standard'},
+                )
+                client = boto3.client('s3', region_name=region, config=config)
+                _shared_clients[region] = client
+    return client
+
+
+def sanitize_key(key: str) -> str:
+    """Sanitize a string for use in an S3 key."""
+    for char in '/\\ :*?"<>|':
+        key = key.replace(char, '_')
+    return key
+
+
+def task_prefix(user_id: str, task_id: str) -> str:
+    """S3 prefix holding every object of a crawl task."""
+    return f"crawled_documents/{sanitize_key(user_id)}/{sanitize_key(task_id)}/"
+
+
+def manifest_key(user_id: str, task_id: str) -> str:
+    """
+    S3 key of a task's document manifest.
+
+    Read back through crawl_manifest_key() in common/src/services/document_service.py,
+    which builds the same key; change both together.
+    """
+    return f"{task_prefix(user_id, task_id)}{MANIFEST_FILENAME}"
+
+
 class S3DocumentStorage:
     """S3-based document storage for crawled content."""
     
@@ -29,6 +100,11 @@ class S3DocumentStorage:
         self.bucket_name = bucket_name or os.getenv('S3_BUCKET', 'crawlchat-data')
         self.region = region or os.getenv('AWS_REGION', 'ap-south-1')
         self.s3_client = None
+        self.transfer_config = TransferConfig(
+            multipart_threshold=MULTIPART_THRESHOLD,
+            multipart_chunksize=MULTIPART_CHUNKSIZE,
+            max_concurrency=4,
+        )
         self._init_s3_client()
     
     def _init_s3_client(self):
@@ -37,11 +113,11 @@ class S3DocumentStorage:
             if os.getenv('AWS_LAMBDA_FUNCTION_NAME'):
                 # Running in Lambda - use IAM role
                 logger.info("Initializing S3 client using IAM role")
-                self.s3_client = boto3.client('s3', region_name=self.region)
+                self.s3_client = get_shared_s3_client(self.region)
             else:
                 # Running locally - use default credential chain
                 logger.info("Initializing S3 client using default credentials")
-                self.s3_client = boto3.client('s3', region_name=self.region)
+                self.s3_client = get_shared_s3_client(self.region)
             
             logger.info(f"S3 document storage initialized for bucket: {self.bucket_name}")
             
@@ -74,11 +150,7 @@ class S3DocumentStorage:
     
     def _sanitize_key(self, key: str) -> str:
         """Sanitize string for use as S3 key."""
-        # Replace problematic characters
-        sanitized = key.replace('/', '_').replace('\\', '_').replace(' ', '_')
-        sanitized = sanitized.replace(':', '_').replace('*', '_').replace('?', '_')
-        sanitized = sanitized.replace('"', '_').replace('<', '_').replace('>', '_').replace('|', '_')
-        return sanitized
+        return sanitize_key(key)
     
     def _get_extension_for_content_type(self, content_type: str) -> str:
         """Get file extension based on content type."""
@@ -130,7 +202,23 @@ class S3DocumentStorage:
         else:
             return "application/octet-stream"  # Binary file
     
-    def store_document(self, user_id: str, task_id: str, document: Dict[str, Any]) -> Dict[str, Any]:
+    def _task_prefix(self, user_id: str, task_id: str) -> str:
+        """S3 prefix holding every object of a task."""
+        return task_prefix(user_id, task_id)
+    
+    def _metadata_key(self, user_id: str, task_id: str, document_id: str) -> str:
+        """S3 key of a document's metadata file."""
+        return f"{self._task_prefix(user_id, task_id)}{self._sanitize_key(document_id)}_metadata.json"
+    
+    def _legacy_metadata_key(self, user_id: str, task_id: str, document_id: str) -> str:
+        """Metadata key used by older crawls (the "json" content type mapped to ".bin")."""
+        return self._generate_document_key(user_id, task_id, document_id, "json").replace(".json", "_metadata.json")
+    
+    def _manifest_key(self, user_id: str, task_id: str) -> str:
+        """S3 key of a task's document manifest."""
+        return manifest_key(user_id, task_id)
+    
+    def store_document(self, user_id: str, task_id: str, document: Dict[str, Any], update_manifest: bool = True) -> Dict[str, Any]:
         """
         Store a document in S3.
         
@@ -138,6 +226,8 @@ class S3DocumentStorage:
             user_id: User identifier
             task_id: Task identifier
             document: Document object with content and metadata
+            update_manifest: Add the document to the task manifest (batch and streaming
+                writers pass False and write the manifest once for many documents)
             
         Returns:
             Dictionary with storage results
@@ -158,7 +248,7 @@ class S3DocumentStorage:
             s3_key = self._generate_document_key(user_id, task_id, document_id, content_type)
             
             # Generate S3 key for metadata file
-            metadata_key = self._generate_document_key(user_id, task_id, document_id, "json").replace(".json", "_metadata.json")
+            metadata_key = self._metadata_key(user_id, task_id, document_id)
             
             # Prepare content for storage
             content = document.get("content", "")
@@ -194,17 +284,11 @@ class S3DocumentStorage:
                 content_to_store = raw_html
                 s3_content_type = "text/html"
             
-            # Handle binary content (PDFs, images, etc.)
-            if document.get("is_binary", False) and document.get("content_base64"):
-                # Convert base64 back to binary for storage
-                try:
-                    binary_content = base64.b64decode(document["content_base64"])
-                    content_to_store = binary_content
-                    logger.info(f"Storing binary content: {len(binary_content)} bytes")
-                except Exception as e:
-                    logger.error(f"Failed to decode base64 content: {e}")
-                    # Fallback to text content
-                    content_to_store = content
+            # Handle binary content (PDFs, images, etc.): upload the downloaded bytes as-is
+            binary = document.get(BINARY_KEY)
+            if isinstance(binary, BinaryContent) and not binary.released:
+                content_to_store = binary.data
+                logger.info(f"Storing binary content: {binary.size} bytes")
             
             # Prepare body for S3 upload
             if isinstance(content_to_store, str):
@@ -214,23 +298,21 @@ class S3DocumentStorage:
             else:
                 body = str(content_to_store).encode('utf-8')
             
-            # Upload content file to S3
-            self.s3_client.put_object(
-                Bucket=self.bucket_name,
-                Key=s3_key,
-                Body=body,
-                ContentType=s3_content_type,
-                Metadata={
-                    'document_id': document_id,
-                    'user_id': user_id,
-                    'task_id': task_id,
-                    'content_type': content_type,
-                    'stored_at': metadata_object['stored_at']
-                }
-            )
+            # Upload content file to S3 (multipart for large files)
+            self._upload_body(s3_key, body, s3_content_type, {
+                'document_id': document_id,
+                'user_id': user_id,
+                'task_id': task_id,
+                'content_type': content_type,
+                'stored_at': metadata_object['stored_at']
+            })
+            
+            # The bytes are in S3 now; don't keep them alive for the rest of the crawl
+            if isinstance(binary, BinaryContent):
+                binary.release()
             
             # Store metadata file
-            json_metadata = json.dumps(metadata_object, indent=2, ensure_ascii=False)
+            json_metadata = json.dumps(metadata_object, separators=(',', ':'), ensure_ascii=False, default=str)
             self.s3_client.put_object(
                 Bucket=self.bucket_name,
                 Key=metadata_key,
@@ -250,7 +332,7 @@ class S3DocumentStorage:
             
             logger.info(f"Document stored in S3: {s3_url}")
             
-            return {
+            result = {
                 "success": True,
                 "s3_url": s3_url,
                 "s3_key": s3_key,
@@ -258,9 +340,19 @@ class S3DocumentStorage:
                 "document_id": document_id,
                 "content_type": content_type,
                 "size": len(body),
-                "metadata_size": len(json_metadata)
+                "metadata_size": len(json_metadata),
+                "url": metadata_object["url"],
+                "title": metadata_object["title"],
+                "domain": metadata_object["domain"],
+                "filename": metadata_object["filename"],
+                "stored_at": metadata_object["stored_at"]
             }
             
+            if update_manifest:
+                self.update_manifest(user_id, task_id, [result])
+            
+            return result
+            
         except Exception as e:
             logger.error(f"Failed to store document in S3: {e}")
             return {
@@ -291,18 +383,27 @@ class S3DocumentStorage:
                 "results": []
             }
         
-        results = []
-        stored_count = 0
-        failed_count = 0
+        results = self._store_concurrently(user_id, task_id, documents)
+        self.update_manifest(user_id, task_id, results)
+        return self._summarize_results(results, len(documents))
+    
+    def _store_concurrently(self, user_id: str, task_id: str, documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Store documents on a bounded worker pool, returning results in input order."""
+        if len(documents) <= 1:
+            return [self.store_document(user_id, task_id, document, update_manifest=False) for document in documents]
         
-        for document in documents:
-            result = self.store_document(user_id, task_id, document)
-            results.append(result)
-            
-            if result["success"]:
-                stored_count += 1
-            else:
-                failed_count += 1
+        max_workers = min(S3_UPLOAD_WORKERS, len(documents))
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="s3-upload") as executor:
+            return list(executor.map(
+                lambda document: self.store_document(user_id, task_id, document, update_manifest=False),
+                documents
+            ))
+    
+    @staticmethod
+    def _summarize_results(results: List[Dict[str, Any]], total_count: int) -> Dict[str, Any]:
+        """Build the batch storage summary."""
+        stored_count = sum(1 for result in results if result.get("success"))
+        failed_count = len(results) - stored_count
         
         logger.info(f"Batch storage completed: {stored_count} stored, {failed_count} failed")
         
@@ -310,10 +411,123 @@ class S3DocumentStorage:
             "success": stored_count > 0,
             "stored_count": stored_count,
             "failed_count": failed_count,
-            "total_count": len(documents),
+            "total_count": total_count,
             "results": results
         }
     
+    def _upload_body(self, key: str, body: bytes, content_type: str, metadata: Dict[str, str]):
+        """Upload an object, switching to multipart upload for large bodies."""
+        if len(body) >= MULTIPART_THRESHOLD:
+            logger.info(f"Using multipart upload for {key} ({len(body)} bytes)")
+            self.s3_client.upload_fileobj(
+                io.BytesIO(body),
+                self.bucket_name,
+                key,
+                ExtraArgs={'ContentType': content_type, 'Metadata': metadata},
+                Config=self.transfer_config
+            )
+        else:
+            self.s3_client.put_object(
+                Bucket=self.bucket_name,
+                Key=key,
+                Body=body,
+                ContentType=content_type,
+                Metadata=metadata
+            )
+    
+    def streaming_writer(self, user_id: str, task_id: str, max_workers: int = None) -> 'StreamingDocumentWriter':
+        """Create a writer that persists documents as soon as they are crawled."""
+        return StreamingDocumentWriter(self, user_id, task_id, max_workers)
+    
+    @staticmethod
+    def _manifest_entry(result: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the manifest line for a successful store result."""
+        return {field: result.get(field) for field in MANIFEST_FIELDS}
+    
+    def read_manifest(self, user_id: str, task_id: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Read a task's document manifest with a single GET.
+        
+        Args:
+            user_id: User identifier
+            task_id: Task identifier
+            
+        Returns:
+            Manifest entries keyed by document_id (in storage order), or None if the
+            task has no manifest
+        """
+        if not self.s3_client:
+            return None
+        
+        manifest_key = self._manifest_key(user_id, task_id)
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=manifest_key)
+        except self.s3_client.exceptions.NoSuchKey:
+            return None
+        except Exception as e:
+            logger.warning(f"Error reading manifest {manifest_key}: {e}")
+            return None
+        
+        entries = {}
+        for line in response['Body'].read().decode('utf-8').splitlines():
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                logger.warning(f"Skipping malformed manifest line in {manifest_key}")
+                continue
+            # Later lines win, so a re-stored document replaces its earlier entry
+            entries.pop(entry.get('document_id'), None)
+            entries[entry.get('document_id')] = entry
+        return entries
+    
+    def write_manifest(self, user_id: str, task_id: str, entries: List[Dict[str, Any]]) -> bool:
+        """
+        Write a task's document manifest as one JSON-lines object.
+        
+        Args:
+            user_id: User identifier
+            task_id: Task identifier
+            entries: Manifest entries
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        if not self.s3_client:
+            return False
+        
+        manifest_key = self._manifest_key(user_id, task_id)
+        body = ''.join(
+            json.dumps(entry, separators=(',', ':'), ensure_ascii=False, default=str) + '\n'
+            for entry in entries
+        )
+        try:
+            self.s3_client.put_object(
+                Bucket=self.bucket_name,
+                Key=manifest_key,
+                Body=body.encode('utf-8'),
+                ContentType="application/x-ndjson"
+            )
+            logger.info(f"Wrote manifest with {len(entries)} documents: s3://{self.bucket_name}/{manifest_key}")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to write manifest {manifest_key}: {e}")
+            return False
+    
+    def update_manifest(self, user_id: str, task_id: str, results: List[Dict[str, Any]]) -> bool:
+        """Merge successful store results into a task's manifest."""
+        new_entries = [self._manifest_entry(result) for result in results if result.get("success")]
+        if not new_entries:
+            return False
+        
+        with _manifest_lock:
+            entries = self.read_manifest(user_id, task_id) or {}
+            for entry in new_entries:
+                entries.pop(entry['document_id'], None)
+                entries[entry['document_id']] = entry
+            return self.write_manifest(user_id, task_id, list(entries.values()))
+    
     def get_document(self, user_id: str, task_id: str, document_id: str) -> Optional[Dict[str, Any]]:
         """
         Retrieve a document from S3.
@@ -332,13 +546,21 @@ class S3DocumentStorage:
         
         try:
             # First, try to get the metadata file
-            metadata_key = self._generate_document_key(user_id, task_id, document_id, "json").replace(".json", "_metadata.json")
+            metadata_key = self._metadata_key(user_id, task_id, document_id)
             
             try:
-                metadata_response = self.s3_client.get_object(
-                    Bucket=self.bucket_name,
-                    Key=metadata_key
-                )
+                try:
+                    metadata_response = self.s3_client.get_object(
+                        Bucket=self.bucket_name,
+                        Key=metadata_key
+                    )
+                except self.s3_client.exceptions.NoSuchKey:
+                    # Documents stored by older crawls keep their metadata under the legacy key
+                    metadata_key = self._legacy_metadata_key(user_id, task_id, document_id)
+                    metadata_response = self.s3_client.get_object(
+                        Bucket=self.bucket_name,
+                        Key=metadata_key
+                    )
                 
                 # Parse metadata
                 metadata_content = metadata_response['Body'].read().decode('utf-8')
@@ -346,7 +568,7 @@ class S3DocumentStorage:
                 
                 # Get the content file
                 content_type = metadata.get("content_type", "html")
-                s3_key = self._generate_document_key(user_id, task_id, document_id, content_type)
+                s3_key = metadata.get("s3_key") or self._generate_document_key(user_id, task_id, document_id, content_type)
                 
                 content_response = self.s3_client.get_object(
                     Bucket=self.bucket_name,
@@ -448,6 +670,9 @@ class S3DocumentStorage:
         """
         List all documents for a specific task.
         
+        Reads the task manifest with a single GET. Tasks stored before manifests
+        existed are listed from S3 once and the manifest is backfilled.
+        
         Args:
             user_id: User identifier
             task_id: Task identifier
@@ -460,71 +685,16 @@ class S3DocumentStorage:
             return []
         
         try:
-            safe_user_id = self._sanitize_key(user_id)
-            safe_task_id = self._sanitize_key(task_id)
-            prefix = f"crawled_documents/{safe_user_id}/{safe_task_id}/"
-            
-            response = self.s3_client.list_objects_v2(
-                Bucket=self.bucket_name,
-                Prefix=prefix
-            )
-            
-            documents = []
-            metadata_files = {}
-            
-            for obj in response.get('Contents', []):
-                key = obj['Key']
-                
-                # Skip metadata files for now, collect them separately
-                if key.endswith('_metadata.json'):
-                    try:
-                        # Get metadata file content
-                        metadata_response = self.s3_client.get_object(
-                            Bucket=self.bucket_name,
-                            Key=key
-                        )
-                        metadata_content = metadata_response['Body'].read().decode('utf-8')
-                        metadata = json.loads(metadata_content)
-                        
-                        document_id = metadata.get('document_id', '')
-                        metadata_files[document_id] = metadata
-                        
-                    except Exception as e:
-                        logger.warning(f"Error reading metadata file {key}: {e}")
-                        continue
-                
-                # Process content files
-                elif not key.endswith('_metadata.json'):
-                    try:
-                        # Get object metadata
-                        obj_response = self.s3_client.head_object(
-                            Bucket=self.bucket_name,
-                            Key=key
-                        )
-                        
-                        s3_metadata = obj_response.get('Metadata', {})
-                        document_id = s3_metadata.get('document_id', '')
-                        
-                        # Get corresponding metadata if available
-                        metadata = metadata_files.get(document_id, {})
-                        
-                        documents.append({
-                            "s3_key": key,
-                            "s3_url": f"s3://{self.bucket_name}/{key}",
-                            "size": obj['Size'],
-                            "last_modified": obj['LastModified'].isoformat(),
-                            "document_id": document_id,
-                            "content_type": s3_metadata.get('content_type', ''),
-                            "stored_at": s3_metadata.get('stored_at', ''),
-                            "title": metadata.get('title', ''),
-                            "url": metadata.get('url', ''),
-                            "domain": metadata.get('domain', '')
-                        })
-                        
-                    except Exception as e:
-                        logger.warning(f"Error getting metadata for {key}: {e}")
-                        continue
-            
+            manifest = self.read_manifest(user_id, task_id)
+            if manifest is not None:
+                documents = [self._listing_from_entry(entry) for entry in manifest.values()]
+                logger.info(f"Found {len(documents)} documents for task {task_id} (manifest)")
+                return documents
+            
+            entries = self._scan_task_objects(user_id, task_id)
+            if entries:
+                self.write_manifest(user_id, task_id, entries)
+            documents = [self._listing_from_entry(entry) for entry in entries]
             logger.info(f"Found {len(documents)} documents for task {task_id}")
             return documents
             
@@ -532,6 +702,69 @@ class S3DocumentStorage:
             logger.error(f"Failed to list documents: {e}")
             return []
     
+    def _listing_from_entry(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Shape a manifest entry like a document listing."""
+        s3_key = entry.get('s3_key', '')
+        return {
+            "s3_key": s3_key,
+            "s3_url": f"s3://{self.bucket_name}/{s3_key}",
+            "size": entry.get('size', 0),
+            "last_modified": entry.get('stored_at', ''),
+            "document_id": entry.get('document_id', ''),
+            "content_type": entry.get('content_type', ''),
+            "stored_at": entry.get('stored_at', ''),
+            "title": entry.get('title', ''),
+            "url": entry.get('url', ''),
+            "domain": entry.get('domain', '')
+        }
+    
+    def _iter_task_objects(self, user_id: str, task_id: str):
+        """Yield every object under a task prefix, across all listing pages."""
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix=self._task_prefix(user_id, task_id)):
+            for obj in page.get('Contents', []):
+                yield obj
+    
+    def _scan_task_objects(self, user_id: str, task_id: str) -> List[Dict[str, Any]]:
+        """Rebuild manifest entries for a task that has no manifest."""
+        objects = [obj for obj in self._iter_task_objects(user_id, task_id)
+                   if not obj['Key'].endswith(MANIFEST_FILENAME)]
+        metadata_keys = [obj['Key'] for obj in objects if obj['Key'].endswith('_metadata.json')]
+        content_objects = [obj for obj in objects if not obj['Key'].endswith('_metadata.json')]
+        
+        metadata_files = {}
+        for key in metadata_keys:
+            try:
+                metadata_response = self.s3_client.get_object(Bucket=self.bucket_name, Key=key)
+                metadata = json.loads(metadata_response['Body'].read().decode('utf-8'))
+                metadata_files[metadata.get('s3_key') or metadata.get('document_id', '')] = metadata
+            except Exception as e:
+                logger.warning(f"Error reading metadata file {key}: {e}")
+        
+        entries = []
+        for obj in content_objects:
+            key = obj['Key']
+            try:
+                metadata = metadata_files.get(key)
+                if metadata is None:
+                    obj_response = self.s3_client.head_object(Bucket=self.bucket_name, Key=key)
+                    s3_metadata = obj_response.get('Metadata', {})
+                    metadata = metadata_files.get(s3_metadata.get('document_id', ''), {})
+                    metadata = {**s3_metadata, **metadata}
+                    if metadata.get('content_type') == 'metadata':
+                        # Metadata file stored under the legacy key
+                        continue
+                
+                entry = self._manifest_entry({**metadata, "s3_key": key, "size": obj['Size']})
+                entry['stored_at'] = entry.get('stored_at') or obj['LastModified'].isoformat()
+                entries.append(entry)
+                
+            except Exception as e:
+                logger.warning(f"Error getting metadata for {key}: {e}")
+                continue
+        
+        return entries
+    
     def delete_documents(self, user_id: str, task_id: str) -> bool:
         """
         Delete all documents for a specific task.
@@ -548,31 +781,119 @@ class S3DocumentStorage:
             return False
         
         try:
-            safe_user_id = self._sanitize_key(user_id)
-            safe_task_id = self._sanitize_key(task_id)
-            prefix = f"crawled_documents/{safe_user_id}/{safe_task_id}/"
-            
-            # List all objects with the prefix
-            response = self.s3_client.list_objects_v2(
-                Bucket=self.bucket_name,
-                Prefix=prefix
-            )
+            manifest = self.read_manifest(user_id, task_id)
+            if manifest is not None:
+                keys = [key for entry in manifest.values()
+                        for key in (entry.get('s3_key'), entry.get('metadata_key')) if key]
+                keys.append(self._manifest_key(user_id, task_id))
+            else:
+                keys = [obj['Key'] for obj in self._iter_task_objects(user_id, task_id)]
             
-            if 'Contents' not in response:
+            if not keys:
                 logger.info(f"No documents found to delete for task {task_id}")
                 return True
             
-            # Delete all objects
-            objects_to_delete = [{'Key': obj['Key']} for obj in response['Contents']]
-            
-            self.s3_client.delete_objects(
-                Bucket=self.bucket_name,
-                Delete={'Objects': objects_to_delete}
-            )
+            # delete_objects accepts at most 1000 keys per request
+            failed = 0
+            for start in range(0, len(keys), DELETE_BATCH_SIZE):
+                response = self.s3_client.delete_objects(
+                    Bucket=self.bucket_name,
+                    Delete={'Objects': [{'Key': key} for key in keys[start:start + DELETE_BATCH_SIZE]], 'Quiet': True}
+                )
+                for error in response.get('Errors', []):
+                    failed += 1
+                    logger.warning(f"Failed to delete {error.get('Key')}: {error.get('Message')}")
             
-            logger.info(f"Deleted {len(objects_to_delete)} documents for task {task_id}")
-            return True
+            logger.info(f"Deleted {len(keys) - failed} objects for task {task_id}")
+            return failed == 0
             
         except Exception as e:
             logger.error(f"Failed to delete documents: {e}")
-            return False 
\ No newline at end of file
+            return False 
+
+
+class StreamingDocumentWriter:
+    """
+    Persists documents to S3 while the crawl is still running.
+
+    ``submit`` hands a document to a bounded upload pool and returns
+    immediately; when uploads fall behind, ``submit`` blocks so crawled
+    documents never pile up unbounded in memory. The task manifest is
+    rewritten every ``MANIFEST_FLUSH_INTERVAL`` stored documents so listings
+    stay current during long crawls. ``finish`` waits for the outstanding
+    uploads, writes the final manifest and returns the same summary as
+    ``S3DocumentStorage.store_documents_batch``.
+    """
+
+    def __init__(self, storage: S3DocumentStorage, user_id: str, task_id: str, max_workers: int = None):
+        self.storage = storage
+        self.user_id = user_id
+        self.task_id = task_id
+        self.max_workers = max_workers or S3_UPLOAD_WORKERS
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="s3-stream")
+        self._slots = threading.BoundedSemaphore(self.max_workers * 2)
+        self._futures: List[Future] = []
+        self._lock = threading.Lock()
+        self._manifest_entries: Dict[str, Dict[str, Any]] = storage.read_manifest(user_id, task_id) or {}
+        self._unflushed = 0
+        self._flush_lock = threading.Lock()
+
+    def submit(self, document: Dict[str, Any]) -> Future:
+        """Queue a document for upload."""
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(
+                self.storage.store_document, self.user_id, self.task_id, document, False
+            )
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(self._on_stored)
+        with self._lock:
+            self._futures.append(future)
+        return future
+
+    def _on_stored(self, future: Future):
+        """Record a finished upload in the manifest."""
+        self._slots.release()
+        try:
+            result = future.result()
+        except Exception:
+            return
+        if not result.get("success"):
+            return
+        entry = self.storage._manifest_entry(result)
+        with self._lock:
+            self._manifest_entries.pop(entry['document_id'], None)
+            self._manifest_entries[entry['document_id']] = entry
+            self._unflushed += 1
+            flush = self._unflushed >= MANIFEST_FLUSH_INTERVAL
+        if flush:
+            self._flush_manifest()
+
+    def _flush_manifest(self):
+        """Rewrite the manifest with every document stored so far."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._unflushed:
+                    return
+                entries = list(self._manifest_entries.values())
+                unflushed, self._unflushed = self._unflushed, 0
+            if not self.storage.write_manifest(self.user_id, self.task_id, entries):
+                with self._lock:
+                    self._unflushed += unflushed
+
+    def finish(self) -> Dict[str, Any]:
+        """Wait for all queued uploads and summarize the results."""
+        with self._lock:
+            futures = list(self._futures)
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                logger.error(f"Streaming upload failed: {e}")
+                results.append({"success": False, "error": str(e), "s3_url": None})
+        self._executor.shutdown(wait=True)
+        self._flush_manifest()
+        return self.storage._summarize_results(results, len(futures))
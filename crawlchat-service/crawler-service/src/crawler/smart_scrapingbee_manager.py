@@ -10,6 +10,8 @@ from typing import Optional, Dict, Any, Tuple
 from urllib.parse import urlparse
 import urllib3
 from .s3_cache_manager import S3CacheManager
+from .rate_limiter import get_rate_limiter
+from .domain_profiles import get_domain_profile_store
 
 # Suppress SSL warnings
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -42,12 +44,16 @@ class SmartScrapingBeeManager:
         self.js_successes = 0
         self.retry_with_js_count = 0
         
-        # Site-specific JS requirements (cache)
+        # Site-specific JS requirements (cache backed by the persistent domain profiles)
         self.site_js_requirements = {}
+        self.domain_profiles = get_domain_profile_store()
         
         # S3 cache manager
         self.s3_cache = S3CacheManager()
         
+        # Shared per-domain / per-API-key pacing
+        self.rate_limiter = get_rate_limiter()
+        
         # Connection pooling
         self.session.mount('http://', requests.adapters.HTTPAdapter(pool_connections=10, pool_maxsize=10))
         self.session.mount('https://', requests.adapters.HTTPAdapter(pool_connections=10, pool_maxsize=10))
@@ -91,6 +97,7 @@ class SmartScrapingBeeManager:
         }
         
         try:
+            self.rate_limiter.acquire(url, self.api_key)
             response = self.session.get(
                 self.base_url,
                 params=params,
@@ -98,6 +105,7 @@ class SmartScrapingBeeManager:
                 timeout=timeout,
                 verify=False
             )
+            self.rate_limiter.record_response(url, response.status_code, response.headers, self.api_key)
             
             logger.info(f"Binary request completed for {url}: status={response.status_code}, size={len(response.content)} bytes")
             return response
@@ -121,6 +129,10 @@ class SmartScrapingBeeManager:
         domain = urlparse(url).netloc
         
         # Check if we know this site requires JS
+        if domain not in self.site_js_requirements:
+            profile = self.domain_profiles.get(domain)
+            if profile and profile.requires_js is not None:
+                self.site_js_requirements[domain] = profile.requires_js
         if domain in self.site_js_requirements and self.site_js_requirements[domain]:
             logger.debug(f"Site {domain} known to require JS, skipping no-JS attempt")
             return self._make_js_request(url, timeout)
@@ -136,6 +148,9 @@ class SmartScrapingBeeManager:
                 if content_checker is None or content_checker(response.text, url):
                     self.no_js_successes += 1
                     logger.info(f"No-JS request successful for {url}")
+                    if domain not in self.site_js_requirements:
+                        self.site_js_requirements[domain] = False
+                        self.domain_profiles.set_requires_js(domain, False)
                     return response
                 else:
                     logger.info(f"No-JS content incomplete for {url}, retrying with JS")
@@ -158,6 +173,7 @@ class SmartScrapingBeeManager:
                 
                 # Cache that this site requires JS
                 self.site_js_requirements[domain] = True
+                self.domain_profiles.set_requires_js(domain, True)
                 
                 return response
             else:
@@ -178,6 +194,7 @@ class SmartScrapingBeeManager:
         
         headers = self._get_headers()
         
+        self.rate_limiter.acquire(url, self.api_key)
         response = self.session.get(
             self.base_url,
             params=params,
@@ -185,6 +202,7 @@ class SmartScrapingBeeManager:
             timeout=timeout,
             verify=False
         )
+        self.rate_limiter.record_response(url, response.status_code, response.headers, self.api_key)
         
         return response
     
@@ -200,6 +218,7 @@ class SmartScrapingBeeManager:
         
         headers = self._get_headers()
         
+        self.rate_limiter.acquire(url, self.api_key)
         response = self.session.get(
             self.base_url,
             params=params,
@@ -207,6 +226,7 @@ class SmartScrapingBeeManager:
             timeout=timeout,
             verify=False
         )
+        self.rate_limiter.record_response(url, response.status_code, response.headers, self.api_key)
         
         return response
     
@@ -260,7 +280,9 @@ class SmartScrapingBeeManager:
     def save_site_requirements(self, filename: str = None):
         """Save site JS requirements to S3."""
         try:
-            self.s3_cache.save_site_js_requirements(self.site_js_requirements)
+            for domain, requires_js in self.site_js_requirements.items():
+                self.domain_profiles.set_requires_js(domain, bool(requires_js))
+            self.domain_profiles.flush(force=True)
             logger.info("Site JS requirements saved to S3")
         except Exception as e:
             logger.error(f"Failed to save site requirements to S3: {e}")
@@ -268,7 +290,11 @@ class SmartScrapingBeeManager:
     def load_site_requirements(self, filename: str = None):
         """Load site JS requirements from S3."""
         try:
-            self.site_js_requirements = self.s3_cache.load_site_js_requirements()
+            self.site_js_requirements = {
+                domain: profile.requires_js
+                for domain, profile in self.domain_profiles.all_profiles().items()
+                if profile.requires_js is not None
+            }
             logger.info("Site JS requirements loaded from S3")
         except Exception as e:
             logger.warning(f"Failed to load site requirements from S3: {e}")
@@ -8,10 +8,12 @@ import re
 import hashlib
 import random
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Mapping, Optional
 import logging
 import os
-from urllib.parse import urlparse, urljoin
+from urllib.parse import urlparse
+
+from .url_normalizer import canonicalize_url
 
 logger = logging.getLogger(__name__)
 
@@ -46,18 +48,18 @@ def is_valid_url(url: str) -> bool:
         return False
 
 def normalize_url(url: str, base_url: str = None) -> str:
-    """Normalize URL by resolving relative URLs and removing fragments."""
-    try:
-        if base_url:
-            url = urljoin(base_url, url)
-        parsed = urlparse(url)
-        # Remove fragment
-        normalized = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
-        if parsed.query:
-            normalized += f"?{parsed.query}"
-        return normalized
-    except:
-        return url
+    """Normalize URL by resolving relative URLs and canonicalizing it (see url_normalizer)."""
+    return canonicalize_url(url, base_url) or url
+
+def get_header(headers: Mapping[str, str], name: str) -> Optional[str]:
+    """Case-insensitive header lookup that also works on plain dicts."""
+    value = headers.get(name)
+    if value is None:
+        lowered = name.lower()
+        for key, candidate in headers.items():
+            if key.lower() == lowered:
+                return candidate
+    return value
 
 def sanitize_filename(filename: str) -> str:
     """Sanitize filename for safe file system usage."""
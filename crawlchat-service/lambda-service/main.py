@@ -174,6 +174,10 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("Shutting down CrawlChat - AI Document Analysis Platform...")
     
+    # Close the shared OpenAI client and its keep-alive connections
+    from common.src.core.openai_client import openai_client_pool
+    await openai_client_pool.close()
+    
     # Disconnect from MongoDB only if connected and not in Lambda
     if not os.environ.get('AWS_LAMBDA_FUNCTION_NAME'):
         await mongodb.disconnect()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for LinkExtractor classification.
+
+Usage:
+    python tests/benchmark_link_extractor.py [directory of saved .html pages]
+
+Without a directory a synthetic investor-relations portal page with thousands
+of anchors and a large inline script is used. Each page is compared against
+the previous keyword-loop implementation (reproduced below) for speed and for
+identical link sets.
+"""
+
+import os
+import re
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urljoin, urlparse
+
+# Add the crawler package to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "crawler-service", "src"))
+
+from crawler.link_extractor import LinkExtractor
+from crawler.page_extractor import PageExtractor
+
+BASE_URL = "https://www.example.com/investors"
+DOMAIN = "www.example.com"
+
+JSON_EXCLUDE_PATTERNS = [
+    'customresponse.json', 'api.json', 'config.json', 'settings.json', 'data.json',
+    'response.json', 'result.json', 'status.json', 'health.json', 'metrics.json',
+    'stats.json', 'customresponse', 'api/', 'config/', 'settings/', 'data/', 'response/',
+    'result/', 'status/', 'health/', 'metrics/', 'stats/', 'endpoint', 'service', 'rest',
+    'graphql', 'swagger', 'openapi', 'docs', 'documentation', 'schema', 'spec'
+]
+PDF_PATTERNS = ['/pdf/', '/document/', '/file/', '/download/', 'pdf', 'document', 'report', 'filing', 'statement']
+API_PATTERNS = ['/api/', '/v1/', '/v2/', '/v3/', '/rest/', '/graphql/']
+
+
+class LegacyLinkExtractor(LinkExtractor):
+    """The keyword-loop classification used before the compiled patterns."""
+
+    # Keywords that indicate relevant financial content
+    relevant_keywords = [
+        # Core financial terms
+        'stock', 'market', 'financial', 'investor', 'earnings', 'revenue',
+        'profit', 'dividend', 'share', 'equity', 'trading', 'quote',
+        'annual', 'quarterly', 'report', 'statement', 'filing', 'sec',
+        'board', 'governance', 'corporate', 'news', 'announcement',
+        'press', 'release', 'update', 'information', 'data', 'analysis',
+        
+        # Investment and trading terms
+        'investment', 'portfolio', 'fund', 'mutual', 'etf', 'bond',
+        'derivative', 'option', 'future', 'commodity', 'forex', 'currency',
+        'crypto', 'bitcoin', 'blockchain', 'asset', 'wealth', 'capital',
+        'return', 'yield', 'growth', 'value', 'momentum', 'volatility',
+        
+        # Company and business terms
+        'company', 'corporation', 'business', 'enterprise', 'firm',
+        'sector', 'industry', 'market', 'exchange', 'listing', 'ipo',
+        'merger', 'acquisition', 'takeover', 'buyout', 'restructuring',
+        
+        # Financial metrics and ratios
+        'pe', 'pb', 'roe', 'roa', 'debt', 'leverage', 'margin',
+        'cashflow', 'ebitda', 'eps', 'book', 'value', 'price',
+        'volume', 'marketcap', 'market-cap', 'market_cap',
+        
+        # Regulatory and compliance
+        'regulation', 'compliance', 'audit', 'disclosure', 'transparency',
+        'governance', 'policy', 'guideline', 'standard', 'requirement',
+        
+        # Research and analysis
+        'research', 'analyst', 'rating', 'target', 'forecast', 'outlook',
+        'projection', 'estimate', 'prediction', 'trend', 'pattern',
+        'technical', 'fundamental', 'chart', 'graph', 'indicator',
+        
+        # Market data and feeds
+        'price', 'quote', 'ticker', 'symbol', 'index', 'benchmark',
+        'sector', 'industry', 'market', 'exchange', 'listing',
+        
+        # Content types
+        'report', 'presentation', 'webinar', 'conference', 'call',
+        'transcript', 'filing', 'document', 'prospectus', 'offering',
+        'circular', 'notice', 'bulletin', 'newsletter', 'update',
+        
+        # News and media
+        'news', 'breaking', 'latest', 'update', 'alert', 'flash',
+        'headline', 'story', 'article', 'coverage', 'analysis',
+        'commentary', 'opinion', 'editorial', 'feature', 'special',
+        
+        # Economics and macro
+        'economics', 'economic', 'gdp', 'inflation', 'unemployment',
+        'interest-rate', 'monetary', 'fiscal', 'policy', 'central-bank',
+        'federal-reserve', 'fed', 'ecb', 'boj', 'boe', 'rbi',
+        'recession', 'growth', 'recovery', 'stimulus', 'austerity',
+        'trade', 'tariff', 'import', 'export', 'balance', 'deficit',
+        'surplus', 'currency', 'exchange-rate', 'forex', 'commodity',
+        'oil', 'gold', 'silver', 'copper', 'agriculture', 'energy',
+        
+        # Market sentiment and indicators
+        'sentiment', 'confidence', 'survey', 'index', 'indicator',
+        'vix', 'fear', 'greed', 'momentum', 'trend', 'pattern',
+        'support', 'resistance', 'breakout', 'breakdown', 'consolidation',
+        'volatility', 'risk', 'uncertainty', 'stability', 'instability'
+    ]
+
+    def is_same_domain(self, url):
+        return urlparse(url).netloc == self.domain
+
+    def is_document_link(self, url):
+        url_lower = url.lower()
+        has_extension = any(ext in url_lower for ext in self.document_extensions)
+        has_pdf_pattern = any(pattern in url_lower for pattern in PDF_PATTERNS)
+        if not (has_extension or has_pdf_pattern):
+            return False
+        for pattern in JSON_EXCLUDE_PATTERNS:
+            if pattern in url_lower:
+                return False
+        if any(pattern in url_lower for pattern in API_PATTERNS):
+            return False
+        if '?' in url and any(param in url_lower for param in ['api_key', 'token', 'auth', 'callback']):
+            return False
+        return True
+
+    def is_relevant_link(self, url, link_text=""):
+        url_lower = url.lower()
+        text_lower = link_text.lower()
+        for pattern in self.exclude_patterns:
+            if pattern in url_lower or pattern in text_lower:
+                return False
+        for keyword in self.relevant_keywords:
+            if keyword in url_lower or keyword in text_lower:
+                return True
+        return True
+
+    def _extract_urls_from_javascript(self, code, base_url):
+        urls = []
+        for _ in range(4):
+            urls.extend(re.findall(r'["\']([^"\']*\.(?:pdf|doc|docx|xlsx|xls|ppt|pptx|csv|json))["\']', code, re.IGNORECASE))
+            urls.extend(re.findall(r'["\']([^"\']*(?:pdf|document|report|filing|statement)[^"\']*)["\']', code, re.IGNORECASE))
+        return list(set([urljoin(base_url, u) for u in urls]))
+
+    def extract_links_from_candidates(self, anchors, onclick_handlers, data_urls, scripts, base_url, visited_urls):
+        page_links, document_links = [], []
+
+        def consider(url, link_text=""):
+            url = self._clean_url(url)
+            if url and self.is_same_domain(url) and url not in visited_urls:
+                if self.is_document_link(url):
+                    document_links.append(url)
+                elif self.is_relevant_link(url, link_text):
+                    page_links.append(url)
+
+        for href, link_text in anchors:
+            consider(urljoin(base_url, href), link_text)
+        for onclick in onclick_handlers:
+            for url in self._extract_urls_from_javascript(onclick, base_url):
+                consider(url)
+        for url in data_urls:
+            consider(urljoin(base_url, url))
+        for script in scripts:
+            for url in self._extract_urls_from_javascript(script, base_url):
+                consider(url)
+        return list(set(page_links)), list(set(document_links))
+
+
+def build_portal_page(anchors: int = 3000) -> str:
+    """Build a large portal page with repeated navigation and a big inline script."""
+    sections = ["news", "reports", "financials", "governance", "press-releases", "events", "login", "careers"]
+    parts = ["<html><head><title>Investor Portal</title><script>var docs = ["]
+    parts.extend(f"'/files/annual-report-{year}.pdf', '/data/results-{year}.json', " for year in range(1990, 2030))
+    parts.append("];</script></head><body>")
+    for i in range(anchors):
+        section = sections[i % len(sections)]
+        parts.append(f"<a href='/{section}/item-{i % 400}'>{section} item {i}</a>")
+        if i % 5 == 0:
+            parts.append(f"<a href='/{section}/filing-{i}.pdf'>Filing {i}</a>")
+        if i % 50 == 0:
+            parts.append(f"<button onclick=\"window.open('/documents/statement-{i}.pdf')\">Open</button>")
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def load_corpus(directory: str = None):
+    if directory:
+        pages = []
+        for path in sorted(Path(directory).glob("*.htm*")):
+            pages.append((path.name, path.read_text(encoding="utf-8", errors="ignore")))
+        if pages:
+            return pages
+        print(f"❌ No .html files found in {directory}, using synthetic page")
+    return [("synthetic-portal", build_portal_page())]
+
+
+def timed(func, runs: int = 10):
+    start = time.perf_counter()
+    for _ in range(runs):
+        result = func()
+    return (time.perf_counter() - start) / runs, result
+
+
+def main():
+    corpus = load_corpus(sys.argv[1] if len(sys.argv) > 1 else None)
+    extractor = PageExtractor()
+    print(f"🔍 Benchmarking link classification on {len(corpus)} page(s)")
+    print("=" * 60)
+
+    total_old = total_new = 0.0
+    for name, html in corpus:
+        page = extractor.extract(html)
+        visited = {BASE_URL}
+        old_time, old_links = timed(lambda: LegacyLinkExtractor(DOMAIN).extract_page_links(page, BASE_URL, visited))
+        new_time, new_links = timed(lambda: LinkExtractor(DOMAIN).extract_page_links(page, BASE_URL, visited))
+        total_old += old_time
+        total_new += new_time
+
+        same = set(old_links[0]) == set(new_links[0]) and set(old_links[1]) == set(new_links[1])
+        print(f"{'✅' if same else '❌'} {name}: {len(page.anchors)} anchors, "
+              f"legacy {old_time * 1000:.1f} ms, compiled {new_time * 1000:.1f} ms "
+              f"({old_time / new_time:.1f}x)")
+
+    print("=" * 60)
+    print(f"Total: legacy {total_old * 1000:.1f} ms, compiled {total_new * 1000:.1f} ms "
+          f"({total_old / total_new:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
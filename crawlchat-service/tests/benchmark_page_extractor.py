@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark the single-pass PageExtractor against the old three-parse path
+(title parse + clean-content parse + link-extraction parse with BeautifulSoup).
+"""
+
+import os
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+# Add the crawler package to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "crawler-service", "src"))
+
+from crawler.link_extractor import LinkExtractor
+from crawler.page_extractor import PageExtractor, normalize_whitespace
+
+BASE_URL = "https://www.example.com/investors"
+DOMAIN = "www.example.com"
+
+FINANCIAL_SELECTORS = [
+    'div[class*="financial"]', 'div[class*="earnings"]', 'div[class*="report"]',
+    'div[class*="statement"]', 'div[class*="filing"]', 'div[class*="disclosure"]',
+    'div[class*="announcement"]', 'div[class*="press"]', 'div[class*="news"]',
+    'div[class*="data"]', 'div[class*="metrics"]', 'div[class*="results"]',
+    'section[class*="financial"]', 'section[class*="earnings"]',
+    'article[class*="financial"]', 'article[class*="earnings"]',
+    'table[class*="financial"]', 'table[class*="data"]', 'table[class*="results"]',
+    'div[class*="news"]', 'div[class*="article"]', 'div[class*="story"]',
+    'div[class*="headline"]', 'div[class*="breaking"]', 'div[class*="latest"]',
+    'div[class*="economics"]', 'div[class*="economic"]', 'div[class*="macro"]',
+    'div[class*="policy"]', 'div[class*="central-bank"]', 'div[class*="fed"]',
+    'div[class*="market"]', 'div[class*="trading"]', 'div[class*="analysis"]',
+    'div[class*="commentary"]', 'div[class*="opinion"]', 'div[class*="editorial"]',
+    'section[class*="news"]', 'section[class*="article"]', 'section[class*="economics"]',
+    'article[class*="news"]', 'article[class*="article"]', 'article[class*="economics"]',
+    'div[class*="content"]', 'div[class*="main-content"]', 'div[class*="body"]'
+]
+
+
+def build_sample_page(sections: int = 200) -> str:
+    """Build a realistic investor-relations style page."""
+    parts = [
+        "<html><head><title>Investor Relations - Example Corp</title>",
+        "<script>var reports = ['/files/annual-report-2023.pdf', '/files/q4-results.pdf'];</script>",
+        "<style>body { font-family: sans-serif; }</style></head><body>",
+        "<header><a href='/'>Home</a><a href='/about'>About</a></header>",
+        "<nav>" + "".join(f"<a href='/section/{i}'>Section {i}</a>" for i in range(30)) + "</nav>",
+        "<div class='main-content'>",
+    ]
+    for i in range(sections):
+        parts.append(
+            f"<div class='news-item'><h2>Quarterly earnings update {i}</h2>"
+            f"<p>Revenue grew {i % 17}% year over year while operating margin expanded, "
+            f"driven by strong demand in the market and disciplined cost management.</p>"
+            f"<a href='/news/{i}'>Read more</a> <a href='/reports/report-{i}.pdf'>Report PDF</a>"
+            f"<button onclick=\"window.open('/documents/statement-{i}.pdf')\">Download</button>"
+            f"<span data-url='/data/metrics-{i}.csv'>Data</span></div>"
+        )
+    parts.append("</div><footer>Copyright Example Corp</footer></body></html>")
+    return "".join(parts)
+
+
+def three_parse_path(html: str):
+    """The extraction path used before PageExtractor."""
+    soup = BeautifulSoup(html, 'html.parser')
+    title_tag = soup.find('title') or soup.find('h1')
+    title = title_tag.get_text(strip=True) if title_tag else "Untitled Document"
+
+    soup = BeautifulSoup(html, 'html.parser')
+    for script in soup(["script", "style", "nav", "footer", "header"]):
+        script.decompose()
+    financial_content = []
+    for selector in FINANCIAL_SELECTORS:
+        for element in soup.select(selector):
+            text = element.get_text(strip=True)
+            if text and len(text) > 50:
+                financial_content.append(text)
+    financial_content.append(soup.get_text())
+    text = normalize_whitespace(' '.join(financial_content))
+
+    soup = BeautifulSoup(html, 'html.parser')
+    links = LinkExtractor(DOMAIN).extract_links(soup, BASE_URL, set())
+    return title, text, links
+
+
+def single_pass_path(html: str, extractor: PageExtractor):
+    """The PageExtractor path."""
+    page = extractor.extract(html)
+    links = LinkExtractor(DOMAIN).extract_page_links(page, BASE_URL, set())
+    return page.title, page.text, links
+
+
+def timed(func, *args, runs: int = 20):
+    start = time.perf_counter()
+    for _ in range(runs):
+        result = func(*args)
+    elapsed = (time.perf_counter() - start) / runs
+    return elapsed, result
+
+
+def main():
+    html = build_sample_page()
+    print(f"🔍 Benchmarking page extraction on a {len(html) / 1024:.0f} KB page")
+    print("=" * 60)
+
+    old_time, (old_title, old_text, old_links) = timed(three_parse_path, html)
+    print(f"Three-parse BeautifulSoup path: {old_time * 1000:.1f} ms/page, text={len(old_text)} chars")
+
+    for use_lxml in (True, False):
+        extractor = PageExtractor(use_lxml=use_lxml)
+        name = "lxml" if extractor.use_lxml else "html.parser"
+        new_time, (new_title, new_text, new_links) = timed(single_pass_path, html, extractor)
+        print(f"Single-pass PageExtractor ({name}): {new_time * 1000:.1f} ms/page, "
+              f"text={len(new_text)} chars, speedup {old_time / new_time:.1f}x")
+
+        if new_title != old_title:
+            print(f"❌ Title mismatch: {new_title!r} != {old_title!r}")
+        if sorted(new_links[0]) != sorted(old_links[0]) or sorted(new_links[1]) != sorted(old_links[1]):
+            print("❌ Link sets differ from the three-parse path")
+        else:
+            print(f"✅ Same links: {len(new_links[0])} pages, {len(new_links[1])} documents")
+
+
+if __name__ == "__main__":
+    main()
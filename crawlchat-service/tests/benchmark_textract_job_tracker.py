@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Offline check of Textract job completion tracking against the local
+stand-ins: adaptive polling vs the old fixed 5 s poll, notification wake-ups,
+failures, deadlines and many concurrent jobs on one polling coroutine.
+"""
+
+import os
+import sys
+import time
+import asyncio
+
+# Add the repo root to Python path so common.src imports resolve
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from common.src.services.textract_job_tracker import (
+    TextractJobTracker, LocalTextractJobs, LocalNotificationChannel
+)
+
+
+async def timed_wait(tracker: TextractJobTracker, job_ids, timeout=None):
+    start = time.perf_counter()
+    results = await tracker.wait_many(job_ids, timeout=timeout)
+    return time.perf_counter() - start, results
+
+
+async def main():
+    # Polling only: a 2 s job used to cost at least one 5 s sleep
+    jobs = LocalTextractJobs()
+    tracker = TextractJobTracker(jobs.get_document_analysis, initial_interval=0.25, max_interval=2.0)
+    job_id = jobs.start_document_analysis(duration=1.2)["JobId"]
+    elapsed, results = await timed_wait(tracker, [job_id])
+    print(f"⏱️ 1.2 s job detected after {elapsed:.2f} s (fixed 5 s polling: 5.00 s), "
+          f"{jobs.status_calls} status calls, status {results[job_id]['JobStatus']}")
+
+    # 50 concurrent jobs tracked by one coroutine
+    job_ids = [jobs.start_document_analysis(duration=0.5 + (i % 5) * 0.2)["JobId"] for i in range(50)]
+    calls_before = jobs.status_calls
+    elapsed, results = await timed_wait(tracker, job_ids)
+    succeeded = sum(1 for result in results.values() if isinstance(result, dict) and result["JobStatus"] == "SUCCEEDED")
+    print(f"📚 {succeeded}/50 concurrent jobs done in {elapsed:.2f} s with {jobs.status_calls - calls_before} status calls")
+
+    # Notifications wake the tracker before the next scheduled poll
+    channel = LocalNotificationChannel(wait_seconds=0.5)
+    notified_jobs = LocalTextractJobs(notifications=channel)
+    notified = TextractJobTracker(notified_jobs.get_document_analysis, notifications=channel,
+                                  initial_interval=3.0, max_interval=10.0)
+    job_id = notified_jobs.start_document_analysis(duration=0.3)["JobId"]
+    elapsed, _ = await timed_wait(notified, [job_id])
+    print(f"🔔 Notified completion seen after {elapsed:.2f} s (first poll scheduled at 3.00 s)")
+
+    # Failures and deadlines
+    failed_id = jobs.start_document_analysis(duration=0.2, status="FAILED")["JobId"]
+    slow_id = jobs.start_document_analysis(duration=60)["JobId"]
+    elapsed, results = await timed_wait(tracker, [failed_id, slow_id], timeout=1.0)
+    print(f"❌ Failed job reported: {results[failed_id]['JobStatus']}, "
+          f"slow job timed out: {isinstance(results[slow_id], asyncio.TimeoutError)} after {elapsed:.2f} s, "
+          f"nothing left pending: {not tracker.pending_jobs()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())